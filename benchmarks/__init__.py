@@ -0,0 +1,18 @@
+"""
+Benchmarks do DOM v1
+
+@fileoverview Suíte de benchmarks e testes de carga do DOM v1
+@directory benchmarks
+@description Massa de dados reproduzível em um Postgres local, micro-benchmarks dos serviços,
+             cenários de carga HTTP contra a API FastAPI e comparação de resultados JSON com
+             limite de regressão
+
+Uso:
+    python -m benchmarks seed --households 200 --reset
+    python -m benchmarks micro --output benchmarks/results/micro-base.json
+    python -m benchmarks http --scenario mixed --concurrency 32 --requests 2000
+    python -m benchmarks compare benchmarks/results/micro-base.json benchmarks/results/micro-atual.json
+@created 2024-12-19
+@lastModified 2024-12-19
+@author Equipe DOM v1
+"""
@@ -0,0 +1,32 @@
+"""
+Ponto de entrada da suíte de benchmarks
+
+@fileoverview CLI `python -m benchmarks <comando>`
+@directory benchmarks
+@description Encaminha para seed, micro, http ou compare
+@created 2024-12-19
+@lastModified 2024-12-19
+@author Equipe DOM v1
+"""
+
+import sys
+import importlib
+
+COMMANDS = {
+    "seed": "benchmarks.seed",
+    "micro": "benchmarks.micro",
+    "http": "benchmarks.http_load",
+    "compare": "benchmarks.compare"
+}
+
+
+def main() -> None:
+    if len(sys.argv) < 2 or sys.argv[1] not in COMMANDS:
+        print(f"Uso: python -m benchmarks {{{'|'.join(COMMANDS)}}} [opções]")
+        raise SystemExit(2)
+    # Importa só o comando pedido (compare não precisa do banco)
+    importlib.import_module(COMMANDS[sys.argv[1]]).main(sys.argv[2:])
+
+
+if __name__ == "__main__":
+    main()
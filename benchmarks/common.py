@@ -0,0 +1,98 @@
+"""
+Utilitários comuns dos benchmarks
+
+@fileoverview Medição, resumo estatístico e gravação de resultados
+@directory benchmarks
+@description Funções compartilhadas pelos benchmarks: resumo de latências (p50/p95/p99),
+             metadados do ambiente e gravação dos resultados em JSON
+@created 2024-12-19
+@lastModified 2024-12-19
+@author Equipe DOM v1
+"""
+
+import os
+import sys
+import json
+import math
+import platform
+import statistics
+import subprocess
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_DIR not in sys.path:
+    sys.path.append(ROOT_DIR)
+
+RESULTS_DIR = os.path.join(ROOT_DIR, "benchmarks", "results")
+
+# Marcadores da massa de dados dos benchmarks (removida por `seed --reset`)
+BENCH_EMAIL_DOMAIN = "bench.dom.local"
+BENCH_GROUP_PREFIX = "Bench Casa"
+BENCH_PASSWORD = "Bench@2024"
+
+
+def percentile(ordered: List[float], quantile: float) -> float:
+    """Percentil pelo método nearest-rank (lista já ordenada)"""
+    return ordered[min(len(ordered) - 1, max(0, math.ceil(quantile * len(ordered)) - 1))]
+
+
+def summarize(samples_ms: List[float]) -> Dict[str, Any]:
+    """Resume uma lista de latências em milissegundos"""
+    if not samples_ms:
+        return {"n": 0}
+    ordered = sorted(samples_ms)
+    total_s = sum(ordered) / 1000
+    return {
+        "n": len(ordered),
+        "mean_ms": round(statistics.mean(ordered), 3),
+        "p50_ms": round(percentile(ordered, 0.50), 3),
+        "p95_ms": round(percentile(ordered, 0.95), 3),
+        "p99_ms": round(percentile(ordered, 0.99), 3),
+        "max_ms": round(ordered[-1], 3),
+        "ops_per_s": round(len(ordered) / total_s, 1) if total_s else None
+    }
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=ROOT_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def environment() -> Dict[str, Any]:
+    """Metadados que tornam os resultados comparáveis entre execuções"""
+    from domcore.core.config import config
+
+    return {
+        "timestamp": datetime.utcnow().isoformat(timespec="seconds"),
+        "git_commit": git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "database": f"{config.database.host}:{config.database.port}/{config.database.database}"
+    }
+
+
+def write_results(suite: str, payload: Dict[str, Any], output: Optional[str] = None) -> str:
+    """Grava os resultados em JSON (padrão: benchmarks/results/<suite>-<timestamp>.json)"""
+    if output is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        output = os.path.join(RESULTS_DIR, f"{suite}-{datetime.utcnow():%Y%m%dT%H%M%S}.json")
+    else:
+        directory = os.path.dirname(output)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+    document = {"suite": suite, "environment": environment(), **payload}
+    with open(output, "w", encoding="utf-8") as handle:
+        json.dump(document, handle, ensure_ascii=False, indent=2, default=str)
+    return output
+
+
+def load_results(path: str) -> Dict[str, Any]:
+    with open(path, encoding="utf-8") as handle:
+        return json.load(handle)
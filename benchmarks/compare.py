@@ -0,0 +1,113 @@
+"""
+Comparação de resultados dos benchmarks
+
+@fileoverview Checagem de regressão entre duas execuções
+@directory benchmarks
+@description Compara dois JSON de resultados (micro ou http) métrica a métrica e falha
+             (código de saída 1) quando alguma latência piora além do limite configurado
+@created 2024-12-19
+@lastModified 2024-12-19
+@author Equipe DOM v1
+
+Uso:
+    python -m benchmarks compare base.json atual.json --threshold 0.10 --metric p95_ms
+"""
+
+import argparse
+from typing import Any, Dict, List, Optional, Sequence
+
+from .common import load_results
+
+DEFAULT_METRICS = ("p50_ms", "p95_ms")
+# Diferença absoluta mínima para contar como regressão/melhora (use > 0 para ignorar o ruído
+# de casos muito rápidos; os casos de CPU já são médias de lotes e não precisam)
+DEFAULT_MIN_DELTA_MS = 0.0
+
+
+def collect_summaries(node: Any, prefix: str = "") -> Dict[str, Dict[str, Any]]:
+    """Achata os resultados: {"cenario/operacao": resumo} para cada dicionário com p50_ms"""
+    summaries: Dict[str, Dict[str, Any]] = {}
+    if isinstance(node, dict):
+        if "p50_ms" in node:
+            summaries[prefix] = node
+            return summaries
+        for key, value in node.items():
+            summaries.update(collect_summaries(value, f"{prefix}/{key}" if prefix else str(key)))
+    return summaries
+
+
+def compare(baseline: Dict[str, Any], current: Dict[str, Any], threshold: float,
+            metrics: Sequence[str] = DEFAULT_METRICS,
+            min_delta_ms: float = DEFAULT_MIN_DELTA_MS) -> List[Dict[str, Any]]:
+    """
+    Compara os resumos de `results` das duas execuções
+
+    Returns:
+        List[Dict]: Uma linha por (caso, métrica) com status regression, improvement, ok,
+        new (só na atual) ou missing (só na base)
+    """
+    base = collect_summaries(baseline.get("results", {}))
+    cur = collect_summaries(current.get("results", {}))
+    rows: List[Dict[str, Any]] = []
+    for name in sorted(set(base) | set(cur)):
+        if name not in cur:
+            rows.append({"name": name, "metric": None, "status": "missing"})
+            continue
+        if name not in base:
+            rows.append({"name": name, "metric": None, "status": "new"})
+            continue
+        for metric in metrics:
+            before, after = base[name].get(metric), cur[name].get(metric)
+            if before is None or after is None:
+                continue
+            delta = after - before
+            ratio = delta / before if before else 0.0
+            if delta > min_delta_ms and ratio > threshold:
+                row_status = "regression"
+            elif -delta > min_delta_ms and -ratio > threshold:
+                row_status = "improvement"
+            else:
+                row_status = "ok"
+            rows.append({
+                "name": name, "metric": metric, "baseline": before, "current": after,
+                "change": round(ratio, 4), "status": row_status
+            })
+    return rows
+
+
+def print_report(rows: List[Dict[str, Any]]) -> None:
+    icons = {"regression": "❌", "improvement": "🚀", "ok": "✅", "new": "🆕", "missing": "⚠️"}
+    for row in rows:
+        if row["metric"] is None:
+            print(f"{icons[row['status']]} {row['name']}: {row['status']}")
+            continue
+        print(f"{icons[row['status']]} {row['name']} {row['metric']}: "
+              f"{row['baseline']} -> {row['current']} ms ({row['change'] * 100:+.1f}%)")
+
+
+def check_regressions(baseline_path: str, current_path: str, threshold: float,
+                      metrics: Sequence[str] = DEFAULT_METRICS,
+                      min_delta_ms: float = DEFAULT_MIN_DELTA_MS) -> List[Dict[str, Any]]:
+    """Compara dois arquivos, imprime o relatório e encerra com código 1 se houver regressão"""
+    rows = compare(load_results(baseline_path), load_results(current_path), threshold, metrics, min_delta_ms)
+    print_report(rows)
+    regressions = [row for row in rows if row["status"] == "regression"]
+    if regressions:
+        print(f"❌ {len(regressions)} regressões acima de {threshold * 100:.0f}%")
+        raise SystemExit(1)
+    print(f"✅ Nenhuma regressão acima de {threshold * 100:.0f}%")
+    return rows
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks compare", description="Compara dois resultados de benchmark")
+    parser.add_argument("baseline", help="JSON de referência")
+    parser.add_argument("current", help="JSON da execução atual")
+    parser.add_argument("--threshold", type=float, default=0.15, help="Piora relativa tolerada (0.15 = 15%%)")
+    parser.add_argument("--metric", action="append", dest="metrics",
+                        help="Métrica comparada (repetível; padrão: p50_ms e p95_ms)")
+    parser.add_argument("--min-delta-ms", type=float, default=DEFAULT_MIN_DELTA_MS,
+                        help="Diferença absoluta mínima para contar como regressão")
+    args = parser.parse_args(argv)
+    check_regressions(args.baseline, args.current, args.threshold,
+                      tuple(args.metrics or DEFAULT_METRICS), args.min_delta_ms)
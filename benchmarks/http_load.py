@@ -0,0 +1,231 @@
+"""
+Carga HTTP contra a API
+
+@fileoverview Cenários de carga (login, polling do dashboard, CRUD de tarefas) na API FastAPI
+@directory benchmarks
+@description Dispara requisições concorrentes com httpx, em processo (ASGITransport, sem
+             servidor) ou contra um servidor em execução (--base-url), usando os usuários da
+             massa semeada, e grava latência por operação, status e vazão em JSON
+@created 2024-12-19
+@lastModified 2024-12-19
+@author Equipe DOM v1
+
+Uso:
+    python -m benchmarks http --scenario all --concurrency 32 --requests 1000
+    python -m benchmarks http --base-url http://localhost:8000 --scenario dashboard_polling
+"""
+
+import time
+import random
+import asyncio
+import argparse
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+import httpx
+
+# common ajusta o sys.path para importar o domcore ao rodar fora da raiz
+from .common import BENCH_PASSWORD, summarize, write_results
+from .compare import check_regressions
+from .seed import bench_cpf
+
+# (operação, latência em ms, status HTTP ou "error")
+Sample = Tuple[str, float, Any]
+
+# Pesos do cenário misto (proporção aproximada do tráfego real)
+MIXED_WEIGHTS = {"dashboard_polling": 70, "task_crud": 20, "login_burst": 10}
+
+
+@dataclass
+class LoadContext:
+    """Usuários da massa e tokens obtidos no aquecimento"""
+
+    users: List[str]
+    employers: List[str]
+    tokens: Dict[str, str] = field(default_factory=dict)
+
+    def headers(self, cpf: str) -> Dict[str, str]:
+        return {"Authorization": f"Bearer {self.tokens[cpf]}"}
+
+
+def bench_users(count: int, members: int) -> Tuple[List[str], List[str]]:
+    """
+    CPFs dos `count` primeiros usuários da massa e, entre eles, os empregadores
+
+    Segue a mesma numeração de benchmarks/seed.py (o primeiro de cada domicílio é o
+    empregador), então não precisa consultar o banco e funciona contra servidores remotos.
+    """
+    users = [bench_cpf(index) for index in range(count)]
+    employers = [bench_cpf(index) for index in range(0, count, members)]
+    return users, employers
+
+
+async def timed(client: httpx.AsyncClient, samples: List[Sample], operation: str,
+                method: str, url: str, **kwargs) -> Optional[httpx.Response]:
+    start = time.perf_counter()
+    try:
+        response = await client.request(method, url, **kwargs)
+    except httpx.HTTPError:
+        samples.append((operation, (time.perf_counter() - start) * 1000, "error"))
+        return None
+    samples.append((operation, (time.perf_counter() - start) * 1000, response.status_code))
+    return response
+
+
+async def login_burst(client: httpx.AsyncClient, context: LoadContext, index: int) -> List[Sample]:
+    samples: List[Sample] = []
+    cpf = context.users[index % len(context.users)]
+    await timed(client, samples, "login", "POST", "/api/auth/login",
+                json={"cpf": cpf, "password": BENCH_PASSWORD})
+    return samples
+
+
+async def dashboard_polling(client: httpx.AsyncClient, context: LoadContext, index: int) -> List[Sample]:
+    """Uma rodada de polling da tela inicial"""
+    samples: List[Sample] = []
+    headers = context.headers(context.users[index % len(context.users)])
+    await timed(client, samples, "dashboard_stats", "GET", "/api/dashboard/stats", headers=headers)
+    await timed(client, samples, "session_context", "GET", "/api/auth/session/context", headers=headers)
+    await timed(client, samples, "tasks_list", "GET", "/api/tasks", params={"limit": 20}, headers=headers)
+    return samples
+
+
+async def task_crud(client: httpx.AsyncClient, context: LoadContext, index: int) -> List[Sample]:
+    """Ciclo completo de uma tarefa criada por um empregador (a tarefa é apagada ao final)"""
+    samples: List[Sample] = []
+    headers = context.headers(context.employers[index % len(context.employers)])
+    response = await timed(client, samples, "task_create", "POST", "/api/tasks", headers=headers, json={
+        "titulo": f"Bench CRUD {index}",
+        "descricao": "Tarefa criada pelo benchmark de carga",
+        "prioridade": 2,
+        "categoria": "limpeza",
+        "tags": ["bench"]
+    })
+    if response is None or response.status_code != 200:
+        return samples
+    task_url = f"/api/tasks/{response.json()['id']}"
+    await timed(client, samples, "task_get", "GET", task_url, headers=headers)
+    await timed(client, samples, "task_update", "PUT", task_url, headers=headers,
+                json={"descricao": "Atualizada pelo benchmark de carga"})
+    await timed(client, samples, "task_status", "PATCH", f"{task_url}/status",
+                params={"status": "completed"}, headers=headers)
+    await timed(client, samples, "task_delete", "DELETE", task_url, headers=headers)
+    return samples
+
+
+SCENARIOS: Dict[str, Callable[[httpx.AsyncClient, LoadContext, int], Awaitable[List[Sample]]]] = {
+    "login_burst": login_burst,
+    "dashboard_polling": dashboard_polling,
+    "task_crud": task_crud
+}
+
+
+def mixed(seed: int) -> Callable[[httpx.AsyncClient, LoadContext, int], Awaitable[List[Sample]]]:
+    """Cenário misto: cada iteração sorteia (de forma reproduzível) um dos cenários"""
+    names, weights = list(MIXED_WEIGHTS), list(MIXED_WEIGHTS.values())
+
+    async def run(client: httpx.AsyncClient, context: LoadContext, index: int) -> List[Sample]:
+        name = random.Random(seed * 1_000_003 + index).choices(names, weights)[0]
+        return await SCENARIOS[name](client, context, index)
+    return run
+
+
+async def authenticate(client: httpx.AsyncClient, context: LoadContext, concurrency: int) -> None:
+    """Obtém um token por usuário (fora da medição)"""
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def login(cpf: str) -> None:
+        async with semaphore:
+            response = await client.post("/api/auth/login", json={"cpf": cpf, "password": BENCH_PASSWORD})
+        if response.status_code != 200:
+            raise SystemExit(f"❌ Login de {cpf} falhou ({response.status_code}): rode `python -m benchmarks seed` antes")
+        context.tokens[cpf] = response.json()["access_token"]
+
+    await asyncio.gather(*(login(cpf) for cpf in context.users))
+
+
+async def run_scenario(client: httpx.AsyncClient, context: LoadContext, operation, iterations: int,
+                       concurrency: int) -> Dict[str, Any]:
+    """Executa `iterations` rodadas do cenário com `concurrency` clientes simultâneos"""
+    samples: List[Sample] = []
+    next_index = iter(range(iterations))
+
+    async def worker() -> None:
+        for index in next_index:
+            samples.extend(await operation(client, context, index))
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    wall_s = time.perf_counter() - start
+
+    operations: Dict[str, Any] = {}
+    for name in sorted({sample[0] for sample in samples}):
+        latencies = [ms for op, ms, _ in samples if op == name]
+        statuses: Dict[str, int] = {}
+        for op, _, code in samples:
+            if op == name:
+                statuses[str(code)] = statuses.get(str(code), 0) + 1
+        operations[name] = {**summarize(latencies), "status": statuses}
+
+    errors = sum(1 for _, _, code in samples if code == "error" or int(code) >= 400)
+    return {
+        "requests": len(samples),
+        "errors": errors,
+        "wall_s": round(wall_s, 3),
+        "throughput_rps": round(len(samples) / wall_s, 1) if wall_s else None,
+        "operations": operations
+    }
+
+
+def build_client(base_url: Optional[str], timeout: float) -> httpx.AsyncClient:
+    """Cliente contra um servidor real ou, sem --base-url, contra a aplicação em processo"""
+    if base_url:
+        return httpx.AsyncClient(base_url=base_url, timeout=timeout)
+    import main as api
+    return httpx.AsyncClient(transport=httpx.ASGITransport(app=api.app), base_url="http://bench", timeout=timeout)
+
+
+async def run(args) -> Dict[str, Any]:
+    users, employers = bench_users(args.users, args.members)
+    context = LoadContext(users=users, employers=employers)
+    names = list(SCENARIOS) + ["mixed"] if args.scenario == "all" else [args.scenario]
+
+    results: Dict[str, Any] = {}
+    async with build_client(args.base_url, args.timeout) as client:
+        await authenticate(client, context, args.concurrency)
+        for name in names:
+            operation = mixed(args.seed) if name == "mixed" else SCENARIOS[name]
+            print(f"🚦 {name}: {args.requests} rodadas, {args.concurrency} clientes...")
+            results[name] = await run_scenario(client, context, operation, args.requests, args.concurrency)
+            print(f"   {results[name]['throughput_rps']} req/s | {results[name]['errors']} erros")
+    return results
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks http", description="Carga HTTP contra a API do DOM")
+    parser.add_argument("--scenario", default="all", choices=list(SCENARIOS) + ["mixed", "all"])
+    parser.add_argument("--requests", type=int, default=500, help="Rodadas por cenário")
+    parser.add_argument("--concurrency", type=int, default=16, help="Clientes simultâneos")
+    parser.add_argument("--users", type=int, default=40, help="Usuários da massa usados na carga")
+    parser.add_argument("--members", type=int, default=4, help="Mesmo --members usado no seed")
+    parser.add_argument("--seed", type=int, default=42, help="Semente do cenário misto")
+    parser.add_argument("--base-url", help="Servidor em execução (padrão: aplicação em processo)")
+    parser.add_argument("--timeout", type=float, default=30.0, help="Timeout por requisição (s)")
+    parser.add_argument("--output", help="Arquivo JSON de saída")
+    parser.add_argument("--baseline", help="Resultado anterior para checar regressões")
+    parser.add_argument("--threshold", type=float, default=0.15, help="Piora relativa tolerada (0.15 = 15%%)")
+    args = parser.parse_args(argv)
+
+    results = asyncio.run(run(args))
+    payload = {
+        "parameters": {
+            "requests": args.requests, "concurrency": args.concurrency, "users": args.users,
+            "seed": args.seed, "target": args.base_url or "in-process"
+        },
+        "results": results
+    }
+    path = write_results("http", payload, args.output)
+    print(f"✅ Resultados em {path}")
+
+    if args.baseline:
+        check_regressions(args.baseline, path, args.threshold)
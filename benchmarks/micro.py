@@ -0,0 +1,171 @@
+"""
+Micro-benchmarks dos serviços
+
+@fileoverview Latência dos métodos de serviço sobre a massa dos benchmarks
+@directory benchmarks
+@description Mede TaskService, NotificationService, GroupService, DashboardService e
+             CPFValidator diretamente (sem HTTP), com aquecimento, uma sessão nova por
+             iteração e caches de aplicação desligados, e grava p50/p95/p99 em JSON
+@created 2024-12-19
+@lastModified 2024-12-19
+@author Equipe DOM v1
+
+Uso:
+    python -m benchmarks micro --iterations 100 --output benchmarks/results/micro-base.json
+    python -m benchmarks micro --filter TaskService --baseline benchmarks/results/micro-base.json
+"""
+
+import time
+import argparse
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional
+
+from sqlalchemy.orm import Session
+
+# common ajusta o sys.path para importar o domcore ao rodar fora da raiz
+from .common import BENCH_EMAIL_DOMAIN, BENCH_GROUP_PREFIX, summarize, write_results
+from .compare import check_regressions
+from domcore.core.db import SessionLocal
+from domcore.core.enums import UserProfile
+from domcore.models.group import Group
+from domcore.models.user import UserDB
+from domcore.services.dashboard_service import DashboardService
+from domcore.services.group_service import GroupService
+from domcore.services.notification_service import NotificationService
+from domcore.services.permission_cache import GroupPermissionCache
+from domcore.services.task_service import TaskService
+from domcore.utils.cpf_validator import CPFValidator
+
+# Chamadas por amostra nos casos só de CPU (uma chamada isolada fica abaixo da resolução útil)
+CPU_BATCH = 1000
+SAMPLE_CPF = "529.982.247-25"
+
+
+@dataclass
+class BenchCase:
+    """Caso de benchmark: `run(db)` é medido; casos sem banco recebem db=None"""
+
+    name: str
+    run: Callable[[Optional[Session]], Any]
+    uses_db: bool = True
+    batch: int = 1
+
+
+@dataclass
+class BenchFixtures:
+    """Usuários e domicílios da massa usados pelos casos"""
+
+    employer: UserDB
+    employee: UserDB
+    group_id: str
+    group_ids: List[str]
+
+
+def load_fixtures(groups_sample: int) -> BenchFixtures:
+    """Escolhe de forma estável (menor CPF / menor nome) os registros da massa semeada"""
+    with SessionLocal() as db:
+        bench_users = db.query(UserDB).filter(
+            UserDB.email.like(f"%@{BENCH_EMAIL_DOMAIN}"),
+            UserDB.ativo == True
+        ).order_by(UserDB.cpf)
+        employer = bench_users.filter(UserDB.perfil == UserProfile.EMPREGADOR.value).first()
+        employee = bench_users.filter(UserDB.perfil == UserProfile.EMPREGADO.value).first()
+        groups = db.query(Group.id).filter(
+            Group.nome.like(f"{BENCH_GROUP_PREFIX} %")
+        ).order_by(Group.nome).limit(groups_sample).all()
+        if employer is None or employee is None or not groups:
+            raise SystemExit("❌ Massa dos benchmarks não encontrada: rode `python -m benchmarks seed` antes")
+        # Objetos desanexados continuam legíveis (atributos já carregados)
+        db.expunge_all()
+    group_ids = [str(group_id) for (group_id,) in groups]
+    return BenchFixtures(employer=employer, employee=employee, group_id=group_ids[0], group_ids=group_ids)
+
+
+def build_cases(fixtures: BenchFixtures) -> List[BenchCase]:
+    employer, employee = fixtures.employer, fixtures.employee
+    employer_profile = UserProfile(employer.perfil)
+    employee_profile = UserProfile(employee.perfil)
+
+    return [
+        BenchCase("TaskService.get_tasks_page", lambda db: TaskService.get_tasks_page(db, employer, limit=50)),
+        BenchCase("TaskService.get_tasks_page[employee]", lambda db: TaskService.get_tasks_page(db, employee, limit=50)),
+        BenchCase("TaskService.get_tasks_page[search]",
+                  lambda db: TaskService.get_tasks_page(db, employer, limit=50, search="limpar cozinha")),
+        BenchCase("TaskService.get_task_stats", lambda db: TaskService.get_task_stats(db, employer)),
+        BenchCase("NotificationService.get_user_notifications_page",
+                  lambda db: NotificationService(db).get_user_notifications_page(str(employee.id), employee_profile, limit=50)),
+        BenchCase("NotificationService.get_notification_stats",
+                  lambda db: NotificationService(db).get_notification_stats(str(employee.id), employee_profile)),
+        BenchCase("GroupService.get_group_members", lambda db: GroupService.get_group_members(db, fixtures.group_id)),
+        BenchCase("GroupService.get_groups_stats", lambda db: GroupService.get_groups_stats(db, fixtures.group_ids)),
+        # Consulta do mapa de permissões sem o cache de processo
+        BenchCase("GroupService.get_permission_map[cold]", lambda db: GroupPermissionCache.load(db, str(employer.id))),
+        BenchCase("DashboardService.get_dashboard_stats",
+                  lambda db: DashboardService(db).get_dashboard_stats(str(employer.id), employer_profile)),
+        BenchCase("CPFValidator.validate_cpf", lambda db: CPFValidator.validate_cpf(SAMPLE_CPF),
+                  uses_db=False, batch=CPU_BATCH),
+        BenchCase("CPFValidator.format_cpf", lambda db: CPFValidator.format_cpf(SAMPLE_CPF),
+                  uses_db=False, batch=CPU_BATCH),
+        BenchCase("CPFValidator.generate_valid_cpf", lambda db: CPFValidator.generate_valid_cpf(),
+                  uses_db=False, batch=CPU_BATCH)
+    ]
+
+
+def run_case(case: BenchCase, iterations: int, warmup: int) -> Dict[str, Any]:
+    """
+    Executa o caso `warmup + iterations` vezes e resume as `iterations` medidas
+
+    Cada iteração usa uma sessão nova (como uma requisição); abrir e fechar a sessão fica
+    fora da medida. Em casos de CPU, cada amostra é a média de `batch` chamadas.
+    """
+    samples: List[float] = []
+    for iteration in range(warmup + iterations):
+        db = SessionLocal() if case.uses_db else None
+        try:
+            start = time.perf_counter()
+            for _ in range(case.batch):
+                case.run(db)
+            elapsed_ms = (time.perf_counter() - start) * 1000 / case.batch
+        finally:
+            if db is not None:
+                db.rollback()
+                db.close()
+        if iteration >= warmup:
+            samples.append(elapsed_ms)
+    return summarize(samples)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks micro", description="Micro-benchmarks dos serviços")
+    parser.add_argument("--iterations", type=int, default=50, help="Medições por caso")
+    parser.add_argument("--warmup", type=int, default=5, help="Execuções descartadas por caso")
+    parser.add_argument("--groups", type=int, default=50, help="Domicílios usados em get_groups_stats")
+    parser.add_argument("--filter", help="Executa só os casos cujo nome contém este texto")
+    parser.add_argument("--output", help="Arquivo JSON de saída")
+    parser.add_argument("--baseline", help="Resultado anterior para checar regressões")
+    parser.add_argument("--threshold", type=float, default=0.15, help="Piora relativa tolerada (0.15 = 15%%)")
+    args = parser.parse_args(argv)
+
+    fixtures = load_fixtures(args.groups)
+    cases = [case for case in build_cases(fixtures) if not args.filter or args.filter in case.name]
+
+    results: Dict[str, Any] = {}
+    for case in cases:
+        print(f"⏱️  {case.name}...")
+        try:
+            results[case.name] = run_case(case, args.iterations, args.warmup)
+        except Exception as e:
+            message = f"{type(e).__name__}: {str(e).splitlines()[0] if str(e) else ''}"
+            results[case.name] = {"error": message}
+            print(f"⚠️ {case.name}: {message}")
+            continue
+        summary = results[case.name]
+        print(f"   p50 {summary['p50_ms']} ms | p95 {summary['p95_ms']} ms | p99 {summary['p99_ms']} ms")
+
+    payload = {"parameters": {"iterations": args.iterations, "warmup": args.warmup, "groups": args.groups},
+               "results": results}
+    path = write_results("micro", payload, args.output)
+    print(f"✅ Resultados em {path}")
+
+    if args.baseline:
+        check_regressions(args.baseline, path, args.threshold)
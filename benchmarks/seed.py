@@ -0,0 +1,281 @@
+"""
+Massa de dados dos benchmarks
+
+@fileoverview Popula um Postgres local com domicílios sintéticos em escala configurável
+@directory benchmarks
+@description Cria domicílios (grupos), usuários, papéis, tarefas e notificações de forma
+             determinística (--seed), em lotes via INSERT multi-linha, e roda ANALYZE ao
+             final para que os planos reflitam a escala semeada
+@created 2024-12-19
+@lastModified 2024-12-19
+@author Equipe DOM v1
+
+Uso:
+    python -m benchmarks seed --households 200 --members 4 --tasks-per-household 300 --reset
+    python -m benchmarks seed --reset-only
+"""
+
+import uuid
+import time
+import random
+import argparse
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from sqlalchemy import String, cast, delete, insert, or_, select
+
+# common ajusta o sys.path para importar o domcore ao rodar fora da raiz
+from .common import BENCH_EMAIL_DOMAIN, BENCH_GROUP_PREFIX, BENCH_PASSWORD, write_results
+from domcore.core.db import engine
+from domcore.core.enums import NotificationType, TaskStatus, UserProfile
+from domcore.core.password_hashing import password_hasher
+from domcore.models.group import Group
+from domcore.models.notification import NotificationDB
+from domcore.models.task import TaskDB
+from domcore.models.user import UserDB, UserGroupRole, UserSession
+from domcore.utils.cpf_validator import CPFValidator
+
+# Vocabulário das tarefas sintéticas (mesmo espírito de scripts/benchmark_task_search.py)
+ACTIONS = ["Limpar", "Organizar", "Lavar", "Passar", "Comprar", "Preparar", "Arrumar",
+           "Regar", "Trocar", "Levar", "Buscar", "Pagar", "Consertar", "Varrer"]
+OBJECTS = ["cozinha", "banheiro", "quarto", "sala", "roupas", "louça", "plantas", "janelas",
+           "geladeira", "quintal", "garagem", "almoço", "jantar", "compras do mês",
+           "crianças na escola", "conta de luz", "cachorro", "tapetes", "armários"]
+CATEGORIES = ["limpeza", "cozinha", "compras", "administração", "manutenção", "cuidado",
+              "financeiro", "agenda", "outros"]
+TAGS = ["urgente", "diário", "mensal", "importante", "fácil", "rápido", "recorrente"]
+
+# Distribuição de status (aproxima o uso real: maioria concluída ou pendente)
+TASK_STATUS_WEIGHTS = {
+    TaskStatus.PENDING: 30,
+    TaskStatus.IN_PROGRESS: 15,
+    TaskStatus.COMPLETED: 45,
+    TaskStatus.CANCELLED: 5,
+    TaskStatus.OVERDUE: 5
+}
+NOTIFICATION_PRIORITIES = ["baixa", "normal", "normal", "normal", "alta", "urgente"]
+
+# Janela de datas de criação das tarefas e notificações
+HISTORY_DAYS = 180
+
+# Prefixo dos IDs de tarefas e notificações semeadas
+BENCH_ID_PREFIX = "bench_"
+
+
+def bench_cpf(index: int) -> str:
+    """CPF válido e determinístico para o usuário `index` (prefixo 9 reservado à massa de teste)"""
+    digits = f"9{index:08d}"
+    digits += str(CPFValidator.calculate_digit(digits, 1))
+    digits += str(CPFValidator.calculate_digit(digits, 2))
+    return digits
+
+
+def _uuid(rng: random.Random) -> uuid.UUID:
+    return uuid.UUID(int=rng.getrandbits(128), version=4)
+
+
+def _insert_batches(conn, table, rows: List[Dict[str, Any]], batch_size: int) -> None:
+    for start in range(0, len(rows), batch_size):
+        conn.execute(insert(table), rows[start:start + batch_size])
+
+
+def reset(conn) -> None:
+    """Remove a massa dos benchmarks (e sessões/tarefas/notificações ligadas a ela)"""
+    bench_users = select(UserDB.id).where(UserDB.email.like(f"%@{BENCH_EMAIL_DOMAIN}"))
+    bench_user_ids = select(cast(UserDB.id, String)).where(UserDB.email.like(f"%@{BENCH_EMAIL_DOMAIN}"))
+    bench_groups = select(Group.id).where(Group.nome.like(f"{BENCH_GROUP_PREFIX} %"))
+
+    conn.execute(delete(NotificationDB).where(or_(
+        NotificationDB.id.like(f"{BENCH_ID_PREFIX}%"),
+        NotificationDB.destinatario_id.in_(bench_user_ids),
+        NotificationDB.remetente_id.in_(bench_user_ids)
+    )))
+    conn.execute(delete(TaskDB).where(or_(
+        TaskDB.id.like(f"{BENCH_ID_PREFIX}%"),
+        TaskDB.criador_id.in_(bench_user_ids),
+        TaskDB.responsavel_id.in_(bench_user_ids)
+    )))
+    conn.execute(delete(UserSession).where(or_(
+        UserSession.user_id.in_(bench_users),
+        UserSession.active_context_group_id.in_(bench_groups)
+    )))
+    conn.execute(delete(UserGroupRole).where(or_(
+        UserGroupRole.user_id.in_(bench_users),
+        UserGroupRole.group_id.in_(bench_groups)
+    )))
+    conn.execute(delete(Group).where(Group.id.in_(bench_groups)))
+    conn.execute(delete(UserDB).where(UserDB.email.like(f"%@{BENCH_EMAIL_DOMAIN}")))
+
+
+def build_dataset(households: int, members: int, tasks_per_household: int,
+                  notifications_per_user: int, seed: int, password_hash: str) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    Gera as linhas de todas as tabelas
+
+    Cada domicílio tem um empregador (papel admin) e `members - 1` membros alternando
+    empregado e familiar; as tarefas são criadas pelo empregador e atribuídas a membros.
+    """
+    rng = random.Random(seed)
+    now = datetime.utcnow().replace(microsecond=0)
+    statuses = list(TASK_STATUS_WEIGHTS)
+    weights = list(TASK_STATUS_WEIGHTS.values())
+    notification_types = list(NotificationType)
+
+    data: Dict[str, List[Dict[str, Any]]] = {
+        "groups": [], "users": [], "user_group_roles": [], "tasks": [], "notifications": []
+    }
+    user_index = 0
+    for household in range(households):
+        group_id = _uuid(rng)
+        data["groups"].append({
+            "id": group_id,
+            "nome": f"{BENCH_GROUP_PREFIX} {household:05d}",
+            "descricao": "Domicílio sintético dos benchmarks",
+            "tipo": "familia",
+            "ativo": True
+        })
+
+        member_ids: List[str] = []
+        for position in range(members):
+            user_id = _uuid(rng)
+            if position == 0:
+                perfil, role = UserProfile.EMPREGADOR.value, "admin"
+            elif position % 2:
+                perfil, role = UserProfile.EMPREGADO.value, "member"
+            else:
+                perfil, role = UserProfile.FAMILIAR.value, "member"
+            data["users"].append({
+                "id": user_id,
+                "cpf": bench_cpf(user_index),
+                "nome": f"Bench Usuário {user_index:06d}",
+                "nickname": f"bench{user_index}"[:20],
+                "email": f"user{user_index:06d}@{BENCH_EMAIL_DOMAIN}",
+                "perfil": perfil,
+                "senha_hash": password_hash,
+                "ativo": True
+            })
+            data["user_group_roles"].append({
+                "id": _uuid(rng), "user_id": user_id, "group_id": group_id, "role": role, "ativo": True
+            })
+            member_ids.append(str(user_id))
+            user_index += 1
+
+        employer_id = member_ids[0]
+        for _ in range(tasks_per_household):
+            action, obj = rng.choice(ACTIONS), rng.choice(OBJECTS)
+            status = rng.choices(statuses, weights)[0]
+            created = now - timedelta(days=rng.uniform(0, HISTORY_DAYS))
+            data["tasks"].append({
+                "id": f"{BENCH_ID_PREFIX}task_{rng.getrandbits(48):012x}",
+                "titulo": f"{action} {obj}",
+                "descricao": f"{action} {obj} {rng.choice(['com atenção', 'antes das visitas', 'conforme combinado', 'no período da manhã'])}",
+                "status": status.value,
+                "prioridade": rng.randint(1, 3),
+                "data_criacao": created,
+                "data_atualizacao": created,
+                "data_limite": created + timedelta(days=rng.randint(1, 14)),
+                "data_conclusao": created + timedelta(days=rng.uniform(0, 7)) if status == TaskStatus.COMPLETED else None,
+                "criador_id": employer_id,
+                "responsavel_id": rng.choice(member_ids[1:] or member_ids),
+                "categoria": rng.choice(CATEGORIES),
+                "tags": rng.sample(TAGS, k=rng.randint(0, 3)),
+                "ativo": True
+            })
+
+        for recipient in member_ids:
+            for _ in range(notifications_per_user):
+                created = now - timedelta(days=rng.uniform(0, HISTORY_DAYS))
+                read = rng.random() < 0.6
+                data["notifications"].append({
+                    "id": f"{BENCH_ID_PREFIX}notif_{rng.getrandbits(48):012x}",
+                    "tipo": rng.choice(notification_types).value,
+                    "titulo": f"Aviso do {BENCH_GROUP_PREFIX.lower()} {household:05d}",
+                    "mensagem": f"{rng.choice(ACTIONS)} {rng.choice(OBJECTS)}",
+                    "destinatario_id": recipient,
+                    "remetente_id": employer_id if recipient != employer_id else None,
+                    "lida": read,
+                    "data_criacao": created,
+                    "data_leitura": created + timedelta(hours=rng.randint(1, 72)) if read else None,
+                    "data_atualizacao": created,
+                    "prioridade": rng.choice(NOTIFICATION_PRIORITIES),
+                    "categoria": rng.choice(CATEGORIES),
+                    "dados_extras": {},
+                    "ativo": True
+                })
+    return data
+
+
+def seed(households: int, members: int, tasks_per_household: int, notifications_per_user: int,
+         seed_value: int, batch_size: int, reset_first: bool) -> Dict[str, Any]:
+    """Semeia o banco e retorna contagens e tempos de cada etapa"""
+    timings: Dict[str, float] = {}
+    start = time.perf_counter()
+    # Um único hash para todos os usuários: o login dos cenários HTTP usa BENCH_PASSWORD
+    password_hash = password_hasher.hash(BENCH_PASSWORD)
+    data = build_dataset(households, members, tasks_per_household, notifications_per_user,
+                         seed_value, password_hash)
+    timings["generate_s"] = round(time.perf_counter() - start, 2)
+
+    with engine.begin() as conn:
+        if reset_first:
+            start = time.perf_counter()
+            reset(conn)
+            timings["reset_s"] = round(time.perf_counter() - start, 2)
+        for key, table in (
+            ("groups", Group.__table__),
+            ("users", UserDB.__table__),
+            ("user_group_roles", UserGroupRole.__table__),
+            ("tasks", TaskDB.__table__),
+            ("notifications", NotificationDB.__table__)
+        ):
+            start = time.perf_counter()
+            _insert_batches(conn, table, data[key], batch_size)
+            timings[f"insert_{key}_s"] = round(time.perf_counter() - start, 2)
+
+    # Estatísticas do planejador atualizadas para a nova escala
+    start = time.perf_counter()
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        for table in ("users", "groups", "user_group_roles", "tasks", "notifications"):
+            conn.exec_driver_sql(f"ANALYZE {table}")
+    timings["analyze_s"] = round(time.perf_counter() - start, 2)
+
+    return {
+        "scale": {
+            "households": households,
+            "members": members,
+            "tasks_per_household": tasks_per_household,
+            "notifications_per_user": notifications_per_user,
+            "seed": seed_value
+        },
+        "rows": {key: len(rows) for key, rows in data.items()},
+        "timings": timings
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks seed", description="Popula o banco com a massa dos benchmarks")
+    parser.add_argument("--households", type=int, default=100, help="Domicílios (grupos)")
+    parser.add_argument("--members", type=int, default=4, help="Usuários por domicílio (o primeiro é o empregador)")
+    parser.add_argument("--tasks-per-household", type=int, default=200, help="Tarefas por domicílio")
+    parser.add_argument("--notifications-per-user", type=int, default=50, help="Notificações por usuário")
+    parser.add_argument("--seed", type=int, default=42, help="Semente do gerador (mesma semente = mesmos dados)")
+    parser.add_argument("--batch-size", type=int, default=2000, help="Linhas por INSERT")
+    parser.add_argument("--reset", action="store_true", help="Remove a massa anterior antes de semear")
+    parser.add_argument("--reset-only", action="store_true", help="Apenas remove a massa dos benchmarks")
+    parser.add_argument("--output", help="Arquivo JSON com o resumo da semeadura")
+    args = parser.parse_args(argv)
+
+    if args.reset_only:
+        with engine.begin() as conn:
+            reset(conn)
+        print("🧹 Massa dos benchmarks removida")
+        return
+
+    if args.members < 1:
+        parser.error("--members deve ser pelo menos 1")
+
+    print(f"🌱 Semeando {args.households} domicílios...")
+    summary = seed(args.households, args.members, args.tasks_per_household,
+                   args.notifications_per_user, args.seed, args.batch_size, args.reset)
+    path = write_results("seed", summary, args.output)
+    print(f"✅ {summary['rows']} (resumo em {path})")
@@ -0,0 +1,97 @@
+"""
+Cache em memória do DOM v1
+
+@fileoverview Cache TTL/LRU em memória
+@directory domcore/core
+@description Cache thread-safe com expiração por tempo e limite de entradas, usado pelos serviços
+@created 2024-12-19
+@lastModified 2024-12-19
+@author Equipe DOM v1
+"""
+
+import time
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, List, Optional
+
+_MISSING = object()
+
+
+class TTLCache:
+    """Cache thread-safe com expiração (TTL) e descarte do menos usado (LRU)"""
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 60.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.RLock()
+
+    def _get_entry(self, key: Hashable) -> Any:
+        """Retorna o valor vivo da chave ou _MISSING (deve ser chamado com o lock)"""
+        entry = self._data.get(key)
+        if entry is None:
+            return _MISSING
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._data[key]
+            return _MISSING
+        self._data.move_to_end(key)
+        return value
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Busca um valor; entradas expiradas contam como ausentes"""
+        with self._lock:
+            value = self._get_entry(key)
+            return default if value is _MISSING else value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        """Grava um valor, descartando as entradas menos usadas se exceder maxsize"""
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def update(self, key: Hashable, func: Callable[[Any], None]) -> bool:
+        """
+        Aplica func ao valor em cache sob o lock, sem alterar a expiração
+
+        Returns:
+            bool: True se a chave existia e foi atualizada
+        """
+        with self._lock:
+            value = self._get_entry(key)
+            if value is _MISSING:
+                return False
+            func(value)
+            return True
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        """Remove uma chave (invalidação explícita)"""
+        with self._lock:
+            entry = self._data.pop(key, None)
+            return default if entry is None else entry[1]
+
+    def pop_matching(self, predicate: Callable[[Hashable, Any], bool]) -> int:
+        """Remove todas as entradas cujo (chave, valor) satisfaz o predicado"""
+        with self._lock:
+            keys: List[Hashable] = [
+                key for key, (_, value) in self._data.items() if predicate(key, value)
+            ]
+            for key in keys:
+                del self._data[key]
+            return len(keys)
+
+    def clear(self) -> None:
+        """Esvazia o cache"""
+        with self._lock:
+            self._data.clear()
+
+    def __contains__(self, key: Hashable) -> bool:
+        with self._lock:
+            return self._get_entry(key) is not _MISSING
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._data)
@@ -50,6 +50,12 @@ class SecurityConfig:
     access_token_expire_minutes: int = 30
     refresh_token_expire_days: int = 7
     bcrypt_rounds: int = 12
+    password_hash_workers: int = 4
+    password_hash_max_queue: int = 64
+    session_reaper_interval_seconds: int = 600
+    session_reaper_batch_size: int = 1000
+    # Validade das URLs assinadas de foto (janela; cada URL vale entre 1 e 2 janelas)
+    photo_url_ttl_seconds: int = 3600
     
     @classmethod
     def from_env(cls) -> 'SecurityConfig':
@@ -59,7 +65,12 @@ class SecurityConfig:
             algorithm=os.getenv("ALGORITHM", "HS256"),
             access_token_expire_minutes=int(os.getenv("ACCESS_TOKEN_EXPIRE_MINUTES", "30")),
             refresh_token_expire_days=int(os.getenv("REFRESH_TOKEN_EXPIRE_DAYS", "7")),
-            bcrypt_rounds=int(os.getenv("BCRYPT_ROUNDS", "12"))
+            bcrypt_rounds=int(os.getenv("BCRYPT_ROUNDS", "12")),
+            password_hash_workers=int(os.getenv("PASSWORD_HASH_WORKERS", "4")),
+            password_hash_max_queue=int(os.getenv("PASSWORD_HASH_MAX_QUEUE", "64")),
+            session_reaper_interval_seconds=int(os.getenv("SESSION_REAPER_INTERVAL_SECONDS", "600")),
+            session_reaper_batch_size=int(os.getenv("SESSION_REAPER_BATCH_SIZE", "1000")),
+            photo_url_ttl_seconds=int(os.getenv("PHOTO_URL_TTL_SECONDS", "3600"))
         )
 
 
@@ -103,6 +114,87 @@ class NotificationConfig:
         )
 
 
+@dataclass
+class CacheConfig:
+    """Configurações dos caches em memória"""
+    
+    # Curto: escritas de outros processos (worker de consultas, outros workers) não invalidam
+    # o cache deste processo e só aparecem quando a entrada expira
+    dashboard_stats_ttl_seconds: int = 30
+    dashboard_stats_max_entries: int = 10000
+    user_principal_ttl_seconds: int = 60
+    user_principal_max_entries: int = 10000
+    # Teto da entrada de contexto: com vários workers, trocas feitas em outro processo
+    # aparecem depois deste tempo
+    session_context_ttl_seconds: int = 30
+    session_context_max_entries: int = 50000
+    group_permission_ttl_seconds: int = 30
+    group_permission_max_entries: int = 10000
+    
+    @classmethod
+    def from_env(cls) -> 'CacheConfig':
+        """Cria configuração a partir de variáveis de ambiente"""
+        return cls(
+            dashboard_stats_ttl_seconds=int(os.getenv("DASHBOARD_STATS_TTL_SECONDS", "30")),
+            dashboard_stats_max_entries=int(os.getenv("DASHBOARD_STATS_MAX_ENTRIES", "10000")),
+            user_principal_ttl_seconds=int(os.getenv("USER_PRINCIPAL_TTL_SECONDS", "60")),
+            user_principal_max_entries=int(os.getenv("USER_PRINCIPAL_MAX_ENTRIES", "10000")),
+            session_context_ttl_seconds=int(os.getenv("SESSION_CONTEXT_TTL_SECONDS", "30")),
+            session_context_max_entries=int(os.getenv("SESSION_CONTEXT_MAX_ENTRIES", "50000")),
+            group_permission_ttl_seconds=int(os.getenv("GROUP_PERMISSION_TTL_SECONDS", "30")),
+            group_permission_max_entries=int(os.getenv("GROUP_PERMISSION_MAX_ENTRIES", "10000"))
+        )
+
+
+@dataclass
+class ObservabilityConfig:
+    """Configurações de métricas e diagnóstico"""
+    
+    metrics_enabled: bool = True
+    metrics_latency_window: int = 2048
+    # Bearer token do coletor (Prometheus) em /api/metrics; vazio = só admin/owner autenticado
+    metrics_token: str = ""
+    slow_query_log_enabled: bool = False
+    slow_query_threshold_ms: float = 250.0
+    slow_query_log_file: str = "logs/slow_queries.log"
+    slow_query_log_max_bytes: int = 10 * 1024 * 1024
+    slow_query_log_backup_count: int = 5
+    slow_query_explain: bool = True
+    slow_query_explain_timeout_ms: int = 5000
+    slow_query_explain_interval_seconds: float = 300.0
+    log_level: str = "INFO"
+    log_format: str = "json"
+    log_queue_size: int = 10000
+    log_info_sample_rate: float = 1.0
+    profiling_enabled: bool = True
+    profiling_output_dir: str = "logs/profiles"
+    profiling_max_profiles: int = 50
+    
+    @classmethod
+    def from_env(cls) -> 'ObservabilityConfig':
+        """Cria configuração a partir de variáveis de ambiente"""
+        return cls(
+            metrics_enabled=os.getenv("METRICS_ENABLED", "true").lower() == "true",
+            metrics_latency_window=int(os.getenv("METRICS_LATENCY_WINDOW", "2048")),
+            metrics_token=os.getenv("METRICS_TOKEN", ""),
+            slow_query_log_enabled=os.getenv("SLOW_QUERY_LOG_ENABLED", "false").lower() == "true",
+            slow_query_threshold_ms=float(os.getenv("SLOW_QUERY_THRESHOLD_MS", "250")),
+            slow_query_log_file=os.getenv("SLOW_QUERY_LOG_FILE", "logs/slow_queries.log"),
+            slow_query_log_max_bytes=int(os.getenv("SLOW_QUERY_LOG_MAX_BYTES", str(10 * 1024 * 1024))),
+            slow_query_log_backup_count=int(os.getenv("SLOW_QUERY_LOG_BACKUP_COUNT", "5")),
+            slow_query_explain=os.getenv("SLOW_QUERY_EXPLAIN", "true").lower() == "true",
+            slow_query_explain_timeout_ms=int(os.getenv("SLOW_QUERY_EXPLAIN_TIMEOUT_MS", "5000")),
+            slow_query_explain_interval_seconds=float(os.getenv("SLOW_QUERY_EXPLAIN_INTERVAL_SECONDS", "300")),
+            log_level=os.getenv("LOG_LEVEL", "INFO"),
+            log_format=os.getenv("LOG_FORMAT", "json").lower(),
+            log_queue_size=int(os.getenv("LOG_QUEUE_SIZE", "10000")),
+            log_info_sample_rate=float(os.getenv("LOG_INFO_SAMPLE_RATE", "1.0")),
+            profiling_enabled=os.getenv("REQUEST_PROFILING_ENABLED", "true").lower() == "true",
+            profiling_output_dir=os.getenv("REQUEST_PROFILING_DIR", "logs/profiles"),
+            profiling_max_profiles=int(os.getenv("REQUEST_PROFILING_MAX_PROFILES", "50"))
+        )
+
+
 @dataclass
 class DOMConfig:
     """Configuração principal do sistema DOM v1"""
@@ -113,6 +205,8 @@ class DOMConfig:
     security: SecurityConfig = None
     receita_federal: ReceitaFederalConfig = None
     notifications: NotificationConfig = None
+    cache: CacheConfig = None
+    observability: ObservabilityConfig = None
     
     def __post_init__(self):
         """Inicializa configurações padrão se não fornecidas"""
@@ -124,6 +218,10 @@ class DOMConfig:
             self.receita_federal = ReceitaFederalConfig.from_env()
         if self.notifications is None:
             self.notifications = NotificationConfig.from_env()
+        if self.cache is None:
+            self.cache = CacheConfig.from_env()
+        if self.observability is None:
+            self.observability = ObservabilityConfig.from_env()
     
     @classmethod
     def from_env(cls) -> 'DOMConfig':
@@ -134,7 +232,9 @@ class DOMConfig:
             database=DatabaseConfig.from_env(),
             security=SecurityConfig.from_env(),
             receita_federal=ReceitaFederalConfig.from_env(),
-            notifications=NotificationConfig.from_env()
+            notifications=NotificationConfig.from_env(),
+            cache=CacheConfig.from_env(),
+            observability=ObservabilityConfig.from_env()
         )
     
     def validate(self) -> None:
@@ -8,8 +8,12 @@
 """
 
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker, AsyncSession
 from sqlalchemy.orm import sessionmaker, declarative_base
 from .config import config
+from .metrics import TimedQueuePool, TimedAsyncAdaptedQueuePool, instrument_engine
+from .slow_query import slow_query_recorder
 import os
 import psycopg2
 
@@ -33,11 +37,42 @@ engine = create_engine(
     echo=False, 
     future=True, 
     connect_args=connect_args,
+    poolclass=TimedQueuePool,
     pool_size=db_config.pool_size,
     max_overflow=db_config.max_overflow
 )
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+# Engine assíncrono (asyncpg) para as rotas FastAPI: as consultas aguardam o banco sem
+# bloquear o event loop. Mesmo banco e mesmas dimensões de pool do engine síncrono.
+ASYNC_DATABASE_URL = os.getenv(
+    "ASYNC_DATABASE_URL",
+    make_url(DATABASE_URL).set(drivername="postgresql+asyncpg").render_as_string(hide_password=False)
+)
+
+async_engine = create_async_engine(
+    ASYNC_DATABASE_URL,
+    echo=False,
+    connect_args={"timeout": 10},
+    poolclass=TimedAsyncAdaptedQueuePool,
+    pool_size=db_config.pool_size,
+    max_overflow=db_config.max_overflow
+)
+
+# Contagem de comandos, linhas e tempo de banco por requisição (exposto em /api/metrics)
+instrument_engine(engine)
+instrument_engine(async_engine.sync_engine)
+
+# Registro opcional de consultas lentas com plano de execução (SLOW_QUERY_LOG_ENABLED=true);
+# os planos são capturados pelo engine síncrono, inclusive para comandos do asyncpg
+if config.observability.slow_query_log_enabled:
+    slow_query_recorder.attach(engine)
+    slow_query_recorder.attach(async_engine.sync_engine, explain_engine=engine)
+
+# expire_on_commit=False: objetos retornados pelos serviços continuam legíveis após o
+# commit sem disparar I/O implícito (proibido fora de run_sync no modo assíncrono)
+AsyncSessionLocal = async_sessionmaker(async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
 Base = declarative_base()
 
 def get_db_connection():
@@ -48,4 +83,14 @@ def get_db_connection():
         database=db_config.database,
         user=db_config.username,
         password=db_config.password
-    ) 
\ No newline at end of file
+    )
+
+def get_pooled_connection():
+    """
+    Retorna uma conexão psycopg2 emprestada do pool do engine.
+
+    Ao contrário de get_db_connection, chamar close() devolve a conexão ao pool
+    em vez de encerrá-la, o que evita um novo handshake a cada consulta em
+    processos de longa duração (ex.: domcore/query_worker.py).
+    """
+    return engine.raw_connection()
@@ -119,3 +119,10 @@ class DuplicateError(DOMException):
     
     def __init__(self, message: str, field: str = None, value: str = None):
         super().__init__(message, "DUPLICATE_ERROR", {"field": field, "value": value}) 
+
+
+class ServiceUnavailableError(DOMException):
+    """Recurso temporariamente sem capacidade (fila cheia)"""
+    
+    def __init__(self, message: str = "Serviço temporariamente indisponível", resource: str = None):
+        super().__init__(message, "SERVICE_UNAVAILABLE", {"resource": resource})
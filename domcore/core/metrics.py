@@ -0,0 +1,327 @@
+"""
+Métricas do DOM v1
+
+@fileoverview Instrumentação de rotas e do banco de dados
+@directory domcore/core
+@description Middleware ASGI que mede a latência por rota, hooks de cursor do SQLAlchemy que
+             contam comandos e linhas por requisição, pool que mede a espera por conexão e
+             exposição de tudo no formato texto do Prometheus
+@created 2024-12-19
+@lastModified 2024-12-19
+@author Equipe DOM v1
+"""
+
+import math
+import time
+import threading
+from bisect import bisect_left
+from collections import deque
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Tuple
+from sqlalchemy import event
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+from .config import config
+
+# Limites dos histogramas
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+STATEMENT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 100)
+POOL_WAIT_BUCKETS = (0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0)
+QUANTILES = (0.5, 0.95, 0.99)
+
+# Rota usada quando a requisição não casa com nenhuma rota declarada
+UNMATCHED_ROUTE = "<unmatched>"
+
+
+@dataclass
+class RequestStats:
+    """Contadores de banco da requisição em andamento"""
+
+    request: str = ""
+    statements: int = 0
+    rows: int = 0
+    db_seconds: float = 0.0
+    pool_wait_seconds: float = 0.0
+
+
+# Requisição atual (propagado para os greenlets do AsyncSession via contexto)
+current_request_stats: ContextVar[Optional[RequestStats]] = ContextVar(
+    "current_request_stats", default=None
+)
+
+
+class Histogram:
+    """Histograma cumulativo no formato do Prometheus (não thread-safe; use o lock do registro)"""
+
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self) -> Iterable[Tuple[str, int]]:
+        total = 0
+        for bound, count in zip(self.buckets, self.counts):
+            total += count
+            yield _format_value(bound), total
+        yield "+Inf", self.count
+
+
+class RouteMetrics:
+    """Métricas de uma rota (método + caminho declarado)"""
+
+    def __init__(self, window: int):
+        self.latency = Histogram(LATENCY_BUCKETS)
+        self.statements = Histogram(STATEMENT_BUCKETS)
+        # Janela das últimas latências para p50/p95/p99
+        self.recent = deque(maxlen=window)
+        self.rows = 0
+        self.db_seconds = 0.0
+        self.responses: Dict[str, int] = {}
+
+    def quantiles(self) -> List[Tuple[float, float]]:
+        ordered = sorted(self.recent)
+        if not ordered:
+            return []
+        return [
+            (q, ordered[min(len(ordered) - 1, max(0, math.ceil(q * len(ordered)) - 1))])
+            for q in QUANTILES
+        ]
+
+
+def _format_value(value: float) -> str:
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(**labels) -> str:
+    return "{" + ",".join(f'{key}="{_escape(str(value))}"' for key, value in labels.items()) + "}"
+
+
+class MetricsRegistry:
+    """Agrega as métricas de rotas e do banco em memória (por processo)"""
+
+    def __init__(self, latency_window: int):
+        self.latency_window = latency_window
+        self._lock = threading.Lock()
+        self._routes: Dict[Tuple[str, str], RouteMetrics] = {}
+        self._pool_wait = Histogram(POOL_WAIT_BUCKETS)
+        self._statements_total = 0
+        self._rows_total = 0
+        self._db_seconds_total = 0.0
+
+    def observe_request(self, method: str, route: str, status_code: int,
+                        duration: float, stats: RequestStats) -> None:
+        with self._lock:
+            metrics = self._routes.get((method, route))
+            if metrics is None:
+                metrics = self._routes[(method, route)] = RouteMetrics(self.latency_window)
+            metrics.latency.observe(duration)
+            metrics.recent.append(duration)
+            metrics.statements.observe(stats.statements)
+            metrics.rows += stats.rows
+            metrics.db_seconds += stats.db_seconds
+            code = str(status_code)
+            metrics.responses[code] = metrics.responses.get(code, 0) + 1
+
+    def observe_statement(self, duration: float, rows: int) -> None:
+        with self._lock:
+            self._statements_total += 1
+            self._rows_total += rows
+            self._db_seconds_total += duration
+        stats = current_request_stats.get()
+        if stats is not None:
+            stats.statements += 1
+            stats.rows += rows
+            stats.db_seconds += duration
+
+    def observe_pool_wait(self, duration: float) -> None:
+        with self._lock:
+            self._pool_wait.observe(duration)
+        stats = current_request_stats.get()
+        if stats is not None:
+            stats.pool_wait_seconds += duration
+
+    def render(self) -> str:
+        """Exporta as métricas no formato texto do Prometheus (0.0.4)"""
+        lines: List[str] = []
+        with self._lock:
+            routes = sorted(self._routes.items())
+
+            lines += ["# HELP dom_http_request_duration_seconds Latência das requisições por rota",
+                      "# TYPE dom_http_request_duration_seconds histogram"]
+            for (method, route), metrics in routes:
+                for le, count in metrics.latency.cumulative():
+                    lines.append(f"dom_http_request_duration_seconds_bucket"
+                                 f"{_labels(method=method, route=route, le=le)} {count}")
+                labels = _labels(method=method, route=route)
+                lines.append(f"dom_http_request_duration_seconds_sum{labels} {metrics.latency.sum}")
+                lines.append(f"dom_http_request_duration_seconds_count{labels} {metrics.latency.count}")
+
+            lines += ["# HELP dom_http_request_latency_seconds Quantis da latência (janela recente)",
+                      "# TYPE dom_http_request_latency_seconds summary"]
+            for (method, route), metrics in routes:
+                for quantile, value in metrics.quantiles():
+                    lines.append(f"dom_http_request_latency_seconds"
+                                 f"{_labels(method=method, route=route, quantile=quantile)} {value}")
+                labels = _labels(method=method, route=route)
+                lines.append(f"dom_http_request_latency_seconds_sum{labels} {sum(metrics.recent)}")
+                lines.append(f"dom_http_request_latency_seconds_count{labels} {len(metrics.recent)}")
+
+            lines += ["# HELP dom_http_responses_total Respostas por rota e status",
+                      "# TYPE dom_http_responses_total counter"]
+            for (method, route), metrics in routes:
+                for code, count in sorted(metrics.responses.items()):
+                    lines.append(f"dom_http_responses_total"
+                                 f"{_labels(method=method, route=route, status=code)} {count}")
+
+            lines += ["# HELP dom_db_statements_per_request Comandos SQL por requisição",
+                      "# TYPE dom_db_statements_per_request histogram"]
+            for (method, route), metrics in routes:
+                for le, count in metrics.statements.cumulative():
+                    lines.append(f"dom_db_statements_per_request_bucket"
+                                 f"{_labels(method=method, route=route, le=le)} {count}")
+                labels = _labels(method=method, route=route)
+                lines.append(f"dom_db_statements_per_request_sum{labels} {int(metrics.statements.sum)}")
+                lines.append(f"dom_db_statements_per_request_count{labels} {metrics.statements.count}")
+
+            lines += ["# HELP dom_db_rows_returned_total Linhas retornadas pelo banco por rota",
+                      "# TYPE dom_db_rows_returned_total counter"]
+            for (method, route), metrics in routes:
+                lines.append(f"dom_db_rows_returned_total{_labels(method=method, route=route)} {metrics.rows}")
+
+            lines += ["# HELP dom_db_time_seconds_total Tempo gasto em comandos SQL por rota",
+                      "# TYPE dom_db_time_seconds_total counter"]
+            for (method, route), metrics in routes:
+                lines.append(f"dom_db_time_seconds_total{_labels(method=method, route=route)} {metrics.db_seconds}")
+
+            lines += ["# HELP dom_db_statements_total Comandos SQL executados (inclui fora de requisições)",
+                      "# TYPE dom_db_statements_total counter",
+                      f"dom_db_statements_total {self._statements_total}",
+                      "# HELP dom_db_rows_total Linhas retornadas (inclui fora de requisições)",
+                      "# TYPE dom_db_rows_total counter",
+                      f"dom_db_rows_total {self._rows_total}",
+                      "# HELP dom_db_statement_seconds_total Tempo total em comandos SQL",
+                      "# TYPE dom_db_statement_seconds_total counter",
+                      f"dom_db_statement_seconds_total {self._db_seconds_total}",
+                      "# HELP dom_db_pool_wait_seconds Espera por conexão do pool",
+                      "# TYPE dom_db_pool_wait_seconds histogram"]
+            for le, count in self._pool_wait.cumulative():
+                lines.append(f"dom_db_pool_wait_seconds_bucket{_labels(le=le)} {count}")
+            lines.append(f"dom_db_pool_wait_seconds_sum {self._pool_wait.sum}")
+            lines.append(f"dom_db_pool_wait_seconds_count {self._pool_wait.count}")
+
+        return "\n".join(lines) + "\n"
+
+    def reset(self) -> None:
+        with self._lock:
+            self._routes.clear()
+            self._pool_wait = Histogram(POOL_WAIT_BUCKETS)
+            self._statements_total = 0
+            self._rows_total = 0
+            self._db_seconds_total = 0.0
+
+
+# Instância global do registro
+metrics_registry = MetricsRegistry(latency_window=config.observability.metrics_latency_window)
+
+
+class TimedQueuePool(QueuePool):
+    """QueuePool que mede a espera por uma conexão livre"""
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            metrics_registry.observe_pool_wait(time.perf_counter() - start)
+
+
+class TimedAsyncAdaptedQueuePool(AsyncAdaptedQueuePool):
+    """AsyncAdaptedQueuePool que mede a espera por uma conexão livre"""
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            metrics_registry.observe_pool_wait(time.perf_counter() - start)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("metrics_query_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info["metrics_query_start"].pop()
+    # rowcount de SELECT/RETURNING é o número de linhas retornadas (psycopg2 e asyncpg)
+    rows = cursor.rowcount if cursor.description is not None and cursor.rowcount > 0 else 0
+    metrics_registry.observe_statement(time.perf_counter() - started, rows)
+
+
+def _handle_error(exception_context):
+    # Comando com erro não passa por after_cursor_execute: descarta o início empilhado
+    conn = exception_context.connection
+    starts = conn.info.get("metrics_query_start") if conn is not None else None
+    if starts:
+        starts.pop()
+
+
+def instrument_engine(engine) -> None:
+    """Registra os hooks de cursor em um Engine (para AsyncEngine, use .sync_engine)"""
+    if event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        return
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine, "handle_error", _handle_error)
+
+
+class MetricsMiddleware:
+    """
+    Middleware ASGI que mede cada requisição HTTP
+
+    O rótulo da rota é o caminho declarado (ex.: /api/tasks/{task_id}), disponível em
+    scope["route"] depois que o roteador do Starlette processa a requisição.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not config.observability.metrics_enabled:
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats(request=f"{scope['method']} {scope['path']}")
+        token = current_request_stats.set(stats)
+        status_code = 500
+        start = time.perf_counter()
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            duration = time.perf_counter() - start
+            current_request_stats.reset(token)
+            route = scope.get("route")
+            metrics_registry.observe_request(
+                scope["method"],
+                getattr(route, "path", UNMATCHED_ROUTE),
+                status_code,
+                duration,
+                stats
+            )
@@ -0,0 +1,164 @@
+"""
+Hash de senhas do DOM v1
+
+@fileoverview Hash e verificação de senhas em executor dedicado
+@directory domcore/core
+@description Política única de hash (bcrypt com o custo de SecurityConfig.bcrypt_rounds) executada
+             em um pool de threads limitado, com fila de espera máxima e métricas, para que
+             picos de login não congelem o event loop
+@created 2024-12-19
+@lastModified 2024-12-19
+@author Equipe DOM v1
+"""
+
+import time
+import asyncio
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, Tuple
+from passlib.context import CryptContext
+
+from .config import config
+from .exceptions import ServiceUnavailableError
+
+
+def build_crypt_context(rounds: int) -> CryptContext:
+    """
+    Contexto bcrypt com custo fixo
+
+    min_rounds = max_rounds = rounds faz needs_update/verify_and_update apontarem qualquer
+    hash gerado com outro custo (maior ou menor), permitindo ajustar BCRYPT_ROUNDS nos dois
+    sentidos sem alterar código.
+    """
+    return CryptContext(
+        schemes=["bcrypt"],
+        deprecated="auto",
+        bcrypt__default_rounds=rounds,
+        bcrypt__min_rounds=rounds,
+        bcrypt__max_rounds=rounds
+    )
+
+
+class PasswordHasher:
+    """
+    Política de hash de senhas em pool limitado de threads
+
+    No máximo `workers` operações rodam ao mesmo tempo; até `max_queue` aguardam na fila.
+    Acima disso a operação é recusada com ServiceUnavailableError em vez de acumular
+    requisições indefinidamente.
+    """
+
+    def __init__(self, rounds: int, workers: int, max_queue: int):
+        self.rounds = rounds
+        self.workers = workers
+        self.max_queue = max_queue
+        self._context = build_crypt_context(rounds)
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="password-hash")
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._running = 0
+        self._completed = 0
+        self._rejected = 0
+        self._max_pending = 0
+        self._wait_seconds = 0.0
+        self._run_seconds = 0.0
+
+    def _submit(self, func: Callable[..., Any], *args) -> Future:
+        """Enfileira a operação respeitando o limite da fila"""
+        with self._lock:
+            if self._pending - self._running >= self.max_queue:
+                self._rejected += 1
+                raise ServiceUnavailableError(
+                    "Muitas operações de senha em andamento, tente novamente",
+                    resource="password_hash"
+                )
+            self._pending += 1
+            self._max_pending = max(self._max_pending, self._pending)
+        future = self._executor.submit(self._run, func, time.perf_counter(), *args)
+        # Também chamado se a requisição for cancelada antes da operação começar
+        future.add_done_callback(self._release)
+        return future
+
+    def _release(self, future: Future) -> None:
+        with self._lock:
+            self._pending -= 1
+
+    def _run(self, func: Callable[..., Any], enqueued_at: float, *args) -> Any:
+        started_at = time.perf_counter()
+        with self._lock:
+            self._running += 1
+            self._wait_seconds += started_at - enqueued_at
+        try:
+            return func(*args)
+        finally:
+            with self._lock:
+                self._running -= 1
+                self._completed += 1
+                self._run_seconds += time.perf_counter() - started_at
+
+    def verify(self, plain_password: str, hashed_password: str) -> bool:
+        """Verifica a senha (bloqueia a thread chamadora; uso em scripts e serviços síncronos)"""
+        return self._submit(self._context.verify, plain_password, hashed_password).result()
+
+    def hash(self, password: str) -> str:
+        """Gera o hash da senha (bloqueia a thread chamadora)"""
+        return self._submit(self._context.hash, password).result()
+
+    def needs_update(self, hashed_password: str) -> bool:
+        """Indica se o hash foi gerado com esquema ou custo diferente da política atual"""
+        return self._context.needs_update(hashed_password)
+
+    def verify_and_update(self, plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+        """
+        Verifica a senha e, se o hash estiver desatualizado, gera o novo na mesma operação
+
+        Returns:
+            Tuple[bool, Optional[str]]: (senha correta, novo hash a gravar ou None)
+        """
+        return self._submit(self._context.verify_and_update, plain_password, hashed_password).result()
+
+    async def verify_async(self, plain_password: str, hashed_password: str) -> bool:
+        """Verifica a senha sem bloquear o event loop"""
+        return await asyncio.wrap_future(
+            self._submit(self._context.verify, plain_password, hashed_password)
+        )
+
+    async def verify_and_update_async(
+        self, plain_password: str, hashed_password: str
+    ) -> Tuple[bool, Optional[str]]:
+        """verify_and_update sem bloquear o event loop"""
+        return await asyncio.wrap_future(
+            self._submit(self._context.verify_and_update, plain_password, hashed_password)
+        )
+
+    async def hash_async(self, password: str) -> str:
+        """Gera o hash da senha sem bloquear o event loop"""
+        return await asyncio.wrap_future(self._submit(self._context.hash, password))
+
+    def stats(self) -> Dict[str, Any]:
+        """Métricas da fila: ocupação atual, pico, recusas e tempos médios"""
+        with self._lock:
+            completed = self._completed
+            return {
+                "rounds": self.rounds,
+                "workers": self.workers,
+                "max_queue": self.max_queue,
+                "running": self._running,
+                "queued": self._pending - self._running,
+                "max_pending": self._max_pending,
+                "completed": completed,
+                "rejected": self._rejected,
+                "avg_wait_ms": round(self._wait_seconds / completed * 1000, 2) if completed else 0.0,
+                "avg_run_ms": round(self._run_seconds / completed * 1000, 2) if completed else 0.0
+            }
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False)
+
+
+# Instância global (política única usada pela API, serviços e scripts)
+password_hasher = PasswordHasher(
+    rounds=config.security.bcrypt_rounds,
+    workers=config.security.password_hash_workers,
+    max_queue=config.security.password_hash_max_queue
+)
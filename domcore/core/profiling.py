@@ -0,0 +1,175 @@
+"""
+Profiler por requisição do DOM v1
+
+@fileoverview Perfilamento sob demanda de uma requisição em produção
+@directory domcore/core
+@description Middleware ASGI que, quando um administrador envia X-Profile: 1 (ou ?_profile=1),
+             executa a requisição sob cProfile e grava o resultado (pstats + resumo em texto)
+             em um diretório local, devolvendo o ID do perfil nos cabeçalhos da resposta
+@created 2024-12-19
+@lastModified 2024-12-19
+@author Equipe DOM v1
+"""
+
+import io
+import os
+import re
+import uuid
+import asyncio
+import cProfile
+import pstats
+import threading
+from datetime import datetime
+from typing import Awaitable, Callable, List, Optional
+from urllib.parse import parse_qs
+
+from .config import config
+
+PROFILE_HEADER = "x-profile"
+PROFILE_QUERY_PARAM = "_profile"
+PROFILE_ID_HEADER = "x-profile-id"
+PROFILE_URL_HEADER = "x-profile-url"
+
+# Linhas do resumo em texto (ordenado por tempo cumulativo)
+SUMMARY_LINES = 60
+
+_PROFILE_ID = re.compile(r"^\d{8}T\d{6}-[0-9a-f]{8}$")
+_TRUE_VALUES = {"1", "true", "yes"}
+
+
+class RequestProfiler:
+    """
+    Grava perfis de requisições em `output_dir`, mantendo os `max_profiles` mais recentes
+
+    O cProfile mede a thread do event loop inteira enquanto a requisição roda, então um
+    perfil por vez: pedidos simultâneos seguem sem perfil (X-Profile: busy).
+    """
+
+    def __init__(self, enabled: bool, output_dir: str, max_profiles: int):
+        self.enabled = enabled
+        self.output_dir = output_dir
+        self.max_profiles = max_profiles
+        self._lock = threading.Lock()
+
+    def try_acquire(self) -> bool:
+        return self._lock.acquire(blocking=False)
+
+    def release(self) -> None:
+        self._lock.release()
+
+    @staticmethod
+    def new_id() -> str:
+        return f"{datetime.utcnow():%Y%m%dT%H%M%S}-{uuid.uuid4().hex[:8]}"
+
+    def path_for(self, profile_id: str, extension: str) -> Optional[str]:
+        """Caminho do arquivo do perfil (None para IDs inválidos ou perfis inexistentes)"""
+        if not _PROFILE_ID.match(profile_id):
+            return None
+        path = os.path.join(self.output_dir, f"{profile_id}.{extension}")
+        return path if os.path.exists(path) else None
+
+    def list_ids(self) -> List[str]:
+        """IDs dos perfis gravados, do mais recente para o mais antigo"""
+        if not os.path.isdir(self.output_dir):
+            return []
+        ids = {name.rsplit(".", 1)[0] for name in os.listdir(self.output_dir)}
+        return sorted((profile_id for profile_id in ids if _PROFILE_ID.match(profile_id)), reverse=True)
+
+    def save(self, profile_id: str, profile: cProfile.Profile, method: str, path: str,
+             status_code: int, duration: float) -> None:
+        """Grava {id}.prof (pstats, para snakeviz/pstats) e {id}.txt (resumo) e poda os antigos"""
+        os.makedirs(self.output_dir, exist_ok=True)
+        base = os.path.join(self.output_dir, profile_id)
+        profile.dump_stats(f"{base}.prof")
+
+        summary = io.StringIO()
+        summary.write(f"{method} {path} -> {status_code} em {duration * 1000:.1f} ms\n\n")
+        pstats.Stats(profile, stream=summary).sort_stats("cumulative").print_stats(SUMMARY_LINES)
+        with open(f"{base}.txt", "w", encoding="utf-8") as handle:
+            handle.write(summary.getvalue())
+
+        for old_id in self.list_ids()[self.max_profiles:]:
+            for extension in ("prof", "txt"):
+                old_path = os.path.join(self.output_dir, f"{old_id}.{extension}")
+                if os.path.exists(old_path):
+                    os.remove(old_path)
+
+
+def profiling_requested(scope) -> bool:
+    """Verifica se a requisição pediu perfil por cabeçalho ou parâmetro de query"""
+    for name, value in scope["headers"]:
+        if name == PROFILE_HEADER.encode():
+            return value.decode("latin-1").lower() in _TRUE_VALUES
+    query = parse_qs(scope.get("query_string", b"").decode("latin-1"))
+    return any(value.lower() in _TRUE_VALUES for value in query.get(PROFILE_QUERY_PARAM, []))
+
+
+class ProfilingMiddleware:
+    """
+    Middleware ASGI que perfila a requisição quando pedido por um usuário autorizado
+
+    `authorize` recebe o scope e decide (ex.: token de administrador); pedidos não
+    autorizados seguem normalmente, sem perfil e sem erro.
+    """
+
+    def __init__(self, app, profiler: RequestProfiler, authorize: Callable[[dict], Awaitable[bool]],
+                 url_template: str = "/api/admin/profiles/{profile_id}"):
+        self.app = app
+        self.profiler = profiler
+        self.authorize = authorize
+        self.url_template = url_template
+
+    async def __call__(self, scope, receive, send):
+        if (
+            scope["type"] != "http"
+            or not self.profiler.enabled
+            or not profiling_requested(scope)
+            or not await self.authorize(scope)
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        if not self.profiler.try_acquire():
+            async def send_busy(message):
+                if message["type"] == "http.response.start":
+                    message["headers"] = list(message.get("headers", [])) + [(PROFILE_HEADER.encode(), b"busy")]
+                await send(message)
+            await self.app(scope, receive, send_busy)
+            return
+
+        profile_id = self.profiler.new_id()
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                message["headers"] = list(message.get("headers", [])) + [
+                    (PROFILE_ID_HEADER.encode(), profile_id.encode()),
+                    (PROFILE_URL_HEADER.encode(), self.url_template.format(profile_id=profile_id).encode())
+                ]
+            await send(message)
+
+        profile = cProfile.Profile()
+        start = asyncio.get_running_loop().time()
+        try:
+            profile.enable()
+            try:
+                await self.app(scope, receive, send_wrapper)
+            finally:
+                profile.disable()
+            duration = asyncio.get_running_loop().time() - start
+            # Gravação fora do event loop
+            await asyncio.to_thread(
+                self.profiler.save, profile_id, profile, scope["method"], scope["path"], status_code, duration
+            )
+        finally:
+            self.profiler.release()
+
+
+# Instância global do profiler
+request_profiler = RequestProfiler(
+    enabled=config.observability.profiling_enabled,
+    output_dir=config.observability.profiling_output_dir,
+    max_profiles=config.observability.profiling_max_profiles
+)
@@ -0,0 +1,47 @@
+"""
+URLs assinadas do DOM v1
+
+@fileoverview Assinatura HMAC com expiração para URLs de recursos privados
+@directory domcore/core
+@description Gera e valida URLs de foto de usuário assinadas com a SECRET_KEY, para que
+             <img src> funcione sem o cabeçalho Authorization (o token fica no localStorage)
+@created 2024-12-19
+@lastModified 2024-12-19
+@author Equipe DOM v1
+"""
+
+import hmac
+import time
+import hashlib
+from typing import Optional
+
+from .config import config
+
+
+def _photo_signature(user_id: str, expires_at: int) -> str:
+    message = f"photo:{user_id}:{expires_at}".encode()
+    return hmac.new(config.security.secret_key.encode(), message, hashlib.sha256).hexdigest()
+
+
+def signed_photo_url(user_id, now: Optional[float] = None) -> str:
+    """
+    URL da foto com `exp` e `sig`
+
+    A expiração é arredondada para a janela de `photo_url_ttl_seconds`: a URL fica estável
+    durante a janela (o navegador reaproveita o cache/ETag) e vale entre 1 e 2 janelas.
+    """
+    ttl = config.security.photo_url_ttl_seconds
+    now = time.time() if now is None else now
+    expires_at = (int(now) // ttl + 2) * ttl
+    return f"/api/users/{user_id}/photo?exp={expires_at}&sig={_photo_signature(str(user_id), expires_at)}"
+
+
+def verify_photo_signature(user_id, expires_at: Optional[int], signature: Optional[str],
+                           now: Optional[float] = None) -> bool:
+    """Verifica a assinatura e a validade de uma URL gerada por signed_photo_url"""
+    if expires_at is None or not signature:
+        return False
+    now = time.time() if now is None else now
+    if expires_at < now:
+        return False
+    return hmac.compare_digest(_photo_signature(str(user_id), expires_at), signature)
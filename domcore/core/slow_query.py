@@ -0,0 +1,283 @@
+"""
+Registro de consultas lentas do DOM v1
+
+@fileoverview Slow-query log com captura de plano de execução
+@directory domcore/core
+@description Hooks de cursor do SQLAlchemy que registram comandos acima de um limite de tempo,
+             com parâmetros, método de serviço de origem e o plano EXPLAIN (ANALYZE, BUFFERS)
+             capturado fora da requisição, em um arquivo local com rotação
+@created 2024-12-19
+@lastModified 2024-12-19
+@author Equipe DOM v1
+"""
+
+import os
+import re
+import sys
+import time
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from logging.handlers import RotatingFileHandler
+from typing import Any, Dict, Optional
+from sqlalchemy import event
+
+from .cache import TTLCache
+from .config import config
+from .metrics import current_request_stats
+
+logger = logging.getLogger(__name__)
+
+# Módulos cujos frames identificam a origem do comando (o wrapper assíncrono é só repasse)
+_SERVICE_MODULE_PREFIX = "domcore.services."
+_SKIPPED_MODULES = {"domcore.services.async_services"}
+
+# Parâmetros que nunca vão para o arquivo
+_SENSITIVE_PARAMETER = re.compile(r"senha|password|token|hash", re.IGNORECASE)
+_MAX_PARAMETER_LENGTH = 200
+
+# Só comandos de leitura são executados pelo EXPLAIN ANALYZE; os demais recebem apenas EXPLAIN
+_READ_ONLY_STATEMENT = re.compile(r"^\s*(SELECT|WITH)\b", re.IGNORECASE)
+_WRITE_KEYWORD = re.compile(r"\b(INSERT|UPDATE|DELETE|MERGE)\b", re.IGNORECASE)
+
+# Planos aguardando captura; acima disso a entrada é gravada sem plano
+_MAX_PENDING_EXPLAINS = 32
+
+_PREPARED_NAME = "dom_slow_query_explain"
+
+
+def find_origin() -> str:
+    """
+    Método de serviço que disparou o comando (ex.: TaskService.get_tasks_page)
+
+    Percorre a pilha até o primeiro frame de domcore.services; consultas feitas direto nas
+    rotas assíncronas não têm esse frame e são identificadas pela requisição em andamento.
+    """
+    frame = sys._getframe(1)
+    while frame is not None:
+        module = frame.f_globals.get("__name__", "")
+        if module.startswith(_SERVICE_MODULE_PREFIX) and module not in _SKIPPED_MODULES:
+            return frame.f_code.co_qualname
+        frame = frame.f_back
+    stats = current_request_stats.get()
+    if stats is not None and stats.request:
+        return stats.request
+    return "<desconhecido>"
+
+
+def _redact(parameters: Any) -> Any:
+    """Mascara parâmetros sensíveis e encurta valores grandes (ex.: fotos)"""
+    def shorten(value: Any) -> str:
+        text = repr(value)
+        if len(text) > _MAX_PARAMETER_LENGTH:
+            text = text[:_MAX_PARAMETER_LENGTH] + f"... ({len(text)} caracteres)"
+        return text
+
+    if isinstance(parameters, dict):
+        return {
+            key: "***" if _SENSITIVE_PARAMETER.search(str(key)) else shorten(value)
+            for key, value in parameters.items()
+        }
+    if isinstance(parameters, (list, tuple)):
+        return [shorten(value) for value in parameters]
+    return shorten(parameters)
+
+
+def _is_read_only(statement: str) -> bool:
+    if not _READ_ONLY_STATEMENT.match(statement):
+        return False
+    return statement.lstrip()[:6].upper() == "SELECT" or not _WRITE_KEYWORD.search(statement)
+
+
+class SlowQueryRecorder:
+    """
+    Registra comandos SQL lentos em arquivo com rotação
+
+    O hook só mede o tempo e, acima do limite, identifica a origem; o EXPLAIN roda em uma
+    thread própria, em outra conexão e dentro de uma transação desfeita ao final. Cada
+    comando distinto tem o plano capturado no máximo uma vez por `explain_interval_seconds`.
+    """
+
+    def __init__(self, threshold_ms: float, log_file: str, max_bytes: int, backup_count: int,
+                 explain: bool, explain_timeout_ms: int, explain_interval_seconds: float):
+        self.threshold_seconds = threshold_ms / 1000
+        self.log_file = log_file
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.explain = explain
+        self.explain_timeout_ms = explain_timeout_ms
+        self._recent_plans = TTLCache(maxsize=1024, ttl=explain_interval_seconds)
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._explain_engines: Dict[int, Any] = {}
+        self._file_logger: Optional[logging.Logger] = None
+
+    def _get_file_logger(self) -> logging.Logger:
+        with self._lock:
+            if self._file_logger is None:
+                directory = os.path.dirname(self.log_file)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                handler = RotatingFileHandler(
+                    self.log_file,
+                    maxBytes=self.max_bytes,
+                    backupCount=self.backup_count,
+                    encoding="utf-8",
+                    delay=True
+                )
+                handler.setFormatter(logging.Formatter("%(asctime)s %(message)s"))
+                file_logger = logging.getLogger("domcore.slow_queries")
+                file_logger.setLevel(logging.INFO)
+                file_logger.propagate = False
+                file_logger.addHandler(handler)
+                self._file_logger = file_logger
+            return self._file_logger
+
+    def attach(self, engine, explain_engine=None) -> None:
+        """
+        Registra os hooks em um Engine (para AsyncEngine, use .sync_engine)
+
+        Args:
+            engine: Engine instrumentado
+            explain_engine: Engine síncrono usado para capturar os planos (padrão: o próprio)
+        """
+        if event.contains(engine, "before_cursor_execute", self._before_cursor_execute):
+            return
+        self._explain_engines[id(engine)] = explain_engine or engine
+        event.listen(engine, "before_cursor_execute", self._before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", self._after_cursor_execute)
+        event.listen(engine, "handle_error", self._handle_error)
+        logger.info("🐢 Registro de consultas lentas ativo (> %.0f ms) em %s", self.threshold_seconds * 1000, self.log_file)
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("slow_query_start", []).append(time.perf_counter())
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        duration = time.perf_counter() - conn.info["slow_query_start"].pop()
+        if duration < self.threshold_seconds:
+            return
+        rows = cursor.rowcount if cursor.description is not None else None
+        named_parameters = (
+            context.compiled_parameters[0]
+            if context is not None and context.compiled is not None and context.compiled_parameters
+            else parameters
+        )
+        entry = {
+            "duration_ms": duration * 1000,
+            "origin": find_origin(),
+            "rows": rows,
+            "statement": statement,
+            "parameters": _redact(named_parameters)
+        }
+        if not self.explain or executemany:
+            self._write(entry, None)
+            return
+        self._submit_explain(
+            entry,
+            self._explain_engines.get(id(conn.engine), conn.engine),
+            statement,
+            parameters,
+            conn.dialect.paramstyle
+        )
+
+    def _handle_error(self, exception_context):
+        conn = exception_context.connection
+        starts = conn.info.get("slow_query_start") if conn is not None else None
+        if starts:
+            starts.pop()
+
+    def _submit_explain(self, entry: Dict[str, Any], explain_engine, statement: str,
+                        parameters: Any, paramstyle: str) -> None:
+        with self._lock:
+            if self._pending >= _MAX_PENDING_EXPLAINS:
+                full = True
+            else:
+                full = False
+                self._pending += 1
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="slow-query-explain")
+        if full:
+            self._write(entry, "Plano não capturado: fila de EXPLAIN cheia")
+            return
+        self._executor.submit(self._explain_and_write, entry, explain_engine, statement, parameters, paramstyle)
+
+    def _explain_and_write(self, entry: Dict[str, Any], explain_engine, statement: str,
+                           parameters: Any, paramstyle: str) -> None:
+        try:
+            captured_at = self._recent_plans.get(statement)
+            if captured_at is not None:
+                plan = f"Plano já capturado em {captured_at} (entrada anterior)"
+            else:
+                plan = self.capture_plan(explain_engine, statement, parameters, paramstyle)
+                self._recent_plans.set(statement, datetime.now().isoformat(timespec="seconds"))
+        except Exception as e:
+            plan = f"Plano não capturado: {e}"
+        finally:
+            with self._lock:
+                self._pending -= 1
+        self._write(entry, plan)
+
+    def capture_plan(self, explain_engine, statement: str, parameters: Any, paramstyle: str) -> str:
+        """
+        Executa EXPLAIN do comando em uma conexão própria e desfaz a transação
+
+        Comandos do asyncpg ($1, $2, ...) são preparados com PREPARE e explicados via EXECUTE,
+        já que a captura usa o driver síncrono (psycopg2).
+        """
+        if explain_engine.dialect.name != "postgresql":
+            return f"Plano não disponível para {explain_engine.dialect.name}"
+        options = "(ANALYZE, BUFFERS) " if _is_read_only(statement) else ""
+        connection = explain_engine.raw_connection()
+        try:
+            cursor = connection.cursor()
+            try:
+                cursor.execute(f"SET LOCAL statement_timeout = {int(self.explain_timeout_ms)}")
+                if paramstyle == "numeric_dollar":
+                    values = tuple(parameters or ())
+                    cursor.execute(f"PREPARE {_PREPARED_NAME} AS {statement}")
+                    arguments = f"({', '.join(['%s'] * len(values))})" if values else ""
+                    cursor.execute(f"EXPLAIN {options}EXECUTE {_PREPARED_NAME}{arguments}", values)
+                else:
+                    cursor.execute(f"EXPLAIN {options}{statement}", parameters)
+                return "\n".join(row[0] for row in cursor.fetchall())
+            finally:
+                connection.rollback()
+                if paramstyle == "numeric_dollar":
+                    # PREPARE não é transacional
+                    cursor.execute("DEALLOCATE ALL")
+                    connection.rollback()
+                cursor.close()
+        finally:
+            connection.close()
+
+    def _write(self, entry: Dict[str, Any], plan: Optional[str]) -> None:
+        rows = "" if entry["rows"] is None or entry["rows"] < 0 else f" | linhas: {entry['rows']}"
+        lines = [
+            f"⏱️ {entry['duration_ms']:.1f} ms | {entry['origin']}{rows}",
+            f"SQL: {entry['statement']}",
+            f"Parâmetros: {entry['parameters']}"
+        ]
+        if plan is not None:
+            lines += ["Plano:", plan]
+        try:
+            self._get_file_logger().warning("\n".join(lines) + "\n")
+        except Exception as e:
+            logger.error("❌ Erro ao gravar consulta lenta: %s", e)
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+
+
+# Instância global (hooks registrados em db.py quando SLOW_QUERY_LOG_ENABLED=true)
+slow_query_recorder = SlowQueryRecorder(
+    threshold_ms=config.observability.slow_query_threshold_ms,
+    log_file=config.observability.slow_query_log_file,
+    max_bytes=config.observability.slow_query_log_max_bytes,
+    backup_count=config.observability.slow_query_log_backup_count,
+    explain=config.observability.slow_query_explain,
+    explain_timeout_ms=config.observability.slow_query_explain_timeout_ms,
+    explain_interval_seconds=config.observability.slow_query_explain_interval_seconds
+)
@@ -0,0 +1,215 @@
+"""
+Logging estruturado do DOM v1
+
+@fileoverview Logging assíncrono, estruturado e correlacionado por requisição
+@directory domcore/core
+@description Configura o logger raiz com QueueHandler e uma thread de escrita (QueueListener),
+             saída em JSON ou texto, ID de requisição propagado via contextvars e amostragem
+             dos logs INFO de alto volume
+@created 2024-12-19
+@lastModified 2024-12-19
+@author Equipe DOM v1
+"""
+
+import re
+import sys
+import copy
+import json
+import uuid
+import queue
+import random
+import zlib
+import logging
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, Dict, Optional
+
+from .config import config
+
+# ID da requisição em andamento (propagado para os greenlets do AsyncSession via contexto)
+request_id_var: ContextVar[Optional[str]] = ContextVar("request_id", default=None)
+
+REQUEST_ID_HEADER = "x-request-id"
+# IDs recebidos do cliente/proxy só são aceitos neste formato
+_VALID_REQUEST_ID = re.compile(r"^[A-Za-z0-9._-]{1,128}$")
+
+# Atributos padrão de LogRecord (o restante veio de extra= e vai para o JSON)
+_RECORD_ATTRIBUTES = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "request_id"}
+
+_listener: Optional[QueueListener] = None
+_queue_handler: Optional["NonBlockingQueueHandler"] = None
+
+
+class RequestIdFilter(logging.Filter):
+    """Anexa o ID da requisição atual ao registro (roda na thread/greenlet que emitiu o log)"""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = request_id_var.get()
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Amostra registros INFO e abaixo; WARNING e acima sempre passam
+
+    A decisão usa o hash do ID da requisição, então os logs de uma mesma requisição são
+    mantidos ou descartados juntos.
+    """
+
+    def __init__(self, rate: float):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if self.rate >= 1 or record.levelno > logging.INFO:
+            return True
+        request_id = getattr(record, "request_id", None)
+        if request_id:
+            return zlib.crc32(request_id.encode()) % 10000 < self.rate * 10000
+        return random.random() < self.rate
+
+
+class NonBlockingQueueHandler(QueueHandler):
+    """QueueHandler que descarta (e conta) registros quando a fila está cheia"""
+
+    def __init__(self, log_queue: "queue.Queue"):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Só congela a mensagem (%-args); JSON, data e traceback ficam para a thread de escrita
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class JsonFormatter(logging.Formatter):
+    """Uma linha JSON por registro"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry: Dict[str, Any] = {
+            "timestamp": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage()
+        }
+        if getattr(record, "request_id", None):
+            entry["request_id"] = record.request_id
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES:
+                entry[key] = value
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    """Formato legível para desenvolvimento, com o ID da requisição quando houver"""
+
+    def __init__(self):
+        super().__init__("%(asctime)s %(levelname)s %(name)s%(request)s: %(message)s")
+
+    def format(self, record: logging.LogRecord) -> str:
+        request_id = getattr(record, "request_id", None)
+        record.request = f" [{request_id}]" if request_id else ""
+        return super().format(record)
+
+
+def configure_logging(level: Optional[str] = None, log_format: Optional[str] = None,
+                      queue_size: Optional[int] = None, info_sample_rate: Optional[float] = None) -> None:
+    """
+    Substitui os handlers do logger raiz por QueueHandler + thread de escrita em stderr
+
+    Pode ser chamada de novo (ex.: testes): a thread anterior é encerrada antes.
+    """
+    global _listener, _queue_handler
+    settings = config.observability
+    level = (level or settings.log_level).upper()
+    log_format = log_format or settings.log_format
+    queue_size = queue_size or settings.log_queue_size
+    info_sample_rate = settings.log_info_sample_rate if info_sample_rate is None else info_sample_rate
+
+    shutdown_logging()
+
+    output = logging.StreamHandler(sys.stderr)
+    output.setFormatter(JsonFormatter() if log_format == "json" else TextFormatter())
+
+    _queue_handler = NonBlockingQueueHandler(queue.Queue(maxsize=queue_size))
+    _queue_handler.addFilter(RequestIdFilter())
+    _queue_handler.addFilter(SamplingFilter(info_sample_rate))
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(_queue_handler)
+    root.setLevel(level)
+
+    _listener = QueueListener(_queue_handler.queue, output, respect_handler_level=True)
+    _listener.start()
+
+
+def shutdown_logging() -> None:
+    """Esvazia a fila e encerra a thread de escrita"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def logging_stats() -> Dict[str, Any]:
+    """Ocupação da fila de logs e registros descartados por fila cheia"""
+    if _queue_handler is None:
+        return {"enabled": False}
+    return {
+        "enabled": True,
+        "queued": _queue_handler.queue.qsize(),
+        "max_queue": _queue_handler.queue.maxsize,
+        "dropped": _queue_handler.dropped
+    }
+
+
+class RequestIdMiddleware:
+    """
+    Middleware ASGI que define o ID da requisição
+
+    Reaproveita o X-Request-ID recebido (se válido) ou gera um novo, e o devolve no cabeçalho
+    da resposta para correlacionar logs do cliente, do proxy e da API.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_id = None
+        for name, value in scope["headers"]:
+            if name == REQUEST_ID_HEADER.encode():
+                candidate = value.decode("latin-1")
+                if _VALID_REQUEST_ID.match(candidate):
+                    request_id = candidate
+                break
+        request_id = request_id or uuid.uuid4().hex
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                message["headers"] = list(message.get("headers", [])) + [
+                    (REQUEST_ID_HEADER.encode(), request_id.encode())
+                ]
+            await send(message)
+
+        token = request_id_var.set(request_id)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            request_id_var.reset(token)
@@ -13,7 +13,7 @@ import sys
 import os
 import json
 import argparse
-from typing import List, Optional
+from typing import List, Optional, Dict, Any
 
 # Adiciona o diretório raiz ao path para importar módulos
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -21,6 +21,15 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 from domcore.services.notification_service import NotificationService
 from domcore.core.enums import UserProfile, NotificationType
 
+def _notification_to_dict(notification) -> dict:
+    """Converte a notificação para dicionário com datas em ISO"""
+    notification_dict = notification.dict()
+    notification_dict['data_criacao'] = notification.data_criacao.isoformat()
+    notification_dict['data_atualizacao'] = notification.data_atualizacao.isoformat()
+    if notification.data_leitura:
+        notification_dict['data_leitura'] = notification.data_leitura.isoformat()
+    return notification_dict
+
 def get_notifications(
     user_id: str,
     profile: str,
@@ -62,22 +71,51 @@ def get_notifications(
             )
             
             # Converte para dicionários
-            result = []
-            for notification in notifications:
-                notification_dict = notification.dict()
-                # Converte datetime para string ISO
-                notification_dict['data_criacao'] = notification.data_criacao.isoformat()
-                notification_dict['data_atualizacao'] = notification.data_atualizacao.isoformat()
-                if notification.data_leitura:
-                    notification_dict['data_leitura'] = notification.data_leitura.isoformat()
-                result.append(notification_dict)
-            
-            return result
+            return [_notification_to_dict(notification) for notification in notifications]
             
     except Exception as e:
         print(f"❌ Erro ao buscar notificações: {e}", file=sys.stderr)
         return []
 
+def get_notifications_page(
+    user_id: str,
+    profile: str,
+    limit: int = 50,
+    offset: int = 0,
+    unread_only: bool = False,
+    notification_type: Optional[str] = None,
+    cursor: Optional[str] = None,
+    include_total: bool = False
+) -> Dict[str, Any]:
+    """
+    Busca uma página de notificações com cursor para a próxima página
+    
+    Args:
+        cursor: next_cursor da página anterior (offset é ignorado quando informado)
+        include_total: Se deve contar o total de notificações do filtro
+        
+    Returns:
+        Dict[str, Any]: items, next_cursor e total
+        
+    Raises:
+        ValidationError: Se o cursor for inválido
+    """
+    notification_type_enum = NotificationType(notification_type) if notification_type else None
+    
+    with NotificationService() as service:
+        page = service.get_user_notifications_page(
+            user_id=user_id,
+            profile=UserProfile(profile),
+            limit=limit,
+            offset=offset,
+            unread_only=unread_only,
+            notification_type=notification_type_enum,
+            cursor=cursor,
+            include_total=include_total
+        )
+        page["items"] = [_notification_to_dict(notification) for notification in page["items"]]
+        return page
+
 def main():
     """Função principal do script"""
     parser = argparse.ArgumentParser(description='Buscar notificações do usuário')
@@ -87,19 +125,30 @@ def main():
     parser.add_argument('--offset', type=int, default=0, help='Offset para paginação')
     parser.add_argument('--unread-only', action='store_true', help='Apenas não lidas')
     parser.add_argument('--notification-type', help='Tipo específico de notificação')
+    parser.add_argument('--cursor', help='Cursor da página anterior (retorna {items, next_cursor, total})')
     
     args = parser.parse_args()
     
     try:
         # Busca notificações
-        notifications = get_notifications(
-            user_id=args.user_id,
-            profile=args.profile,
-            limit=args.limit,
-            offset=args.offset,
-            unread_only=args.unread_only,
-            notification_type=args.notification_type
-        )
+        if args.cursor:
+            notifications = get_notifications_page(
+                user_id=args.user_id,
+                profile=args.profile,
+                limit=args.limit,
+                unread_only=args.unread_only,
+                notification_type=args.notification_type,
+                cursor=args.cursor
+            )
+        else:
+            notifications = get_notifications(
+                user_id=args.user_id,
+                profile=args.profile,
+                limit=args.limit,
+                offset=args.offset,
+                unread_only=args.unread_only,
+                notification_type=args.notification_type
+            )
         
         # Retorna como JSON
         print(json.dumps(notifications, ensure_ascii=False, indent=2))
@@ -8,16 +8,23 @@ import json
 import sys
 import os
 
-# Adicionar o diretório domcore ao path
-sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+# Adicionar o diretório raiz ao path para importar o pacote domcore
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from core.db import get_db_connection
-# Removido: from core.config import DATABASE_URL
+from domcore.core.db import get_db_connection
+from domcore.models.task import TASK_SEARCH_CONFIG
 
-def get_tasks(profile, limit=50, offset=0, status=None, priority=None, search=None):
-    """Busca tarefas do banco de dados"""
+def get_tasks(profile, limit=50, offset=0, status=None, priority=None, search=None,
+              connection_factory=get_db_connection):
+    """
+    Busca tarefas do banco de dados
+
+    connection_factory permite que o worker persistente (query_worker.py)
+    reutilize conexões do pool em vez de abrir uma nova a cada chamada.
+    """
+    conn = None
     try:
-        conn = get_db_connection()
+        conn = connection_factory()
         cursor = conn.cursor()
         
         # Query base com JOIN para pegar o perfil do usuário
@@ -57,13 +64,20 @@ def get_tasks(profile, limit=50, offset=0, status=None, priority=None, search=No
             query += " AND t.prioridade = %s"
             params.append(int(priority))
         
+        order_by = "t.data_criacao DESC"
         if search:
-            query += " AND (t.titulo ILIKE %s OR t.descricao ILIKE %s)"
-            search_term = f"%{search}%"
-            params.extend([search_term, search_term])
+            # Busca textual no índice GIN de search_vector (ILIKE '%x%' forçava seq scan);
+            # resultados mais relevantes primeiro
+            query += f" AND t.search_vector @@ websearch_to_tsquery('{TASK_SEARCH_CONFIG}', %s)"
+            params.append(search)
+            order_by = (
+                f"ts_rank_cd(t.search_vector, websearch_to_tsquery('{TASK_SEARCH_CONFIG}', %s)) DESC, "
+                + order_by
+            )
+            params.append(search)
         
         # Ordenação e paginação
-        query += " ORDER BY t.data_criacao DESC LIMIT %s OFFSET %s"
+        query += f" ORDER BY {order_by} LIMIT %s OFFSET %s"
         params.extend([limit, offset])
         
         cursor.execute(query, params)
@@ -91,13 +105,15 @@ def get_tasks(profile, limit=50, offset=0, status=None, priority=None, search=No
             tasks.append(task)
         
         cursor.close()
-        conn.close()
         
         return tasks
         
     except Exception as e:
         print(f"Erro ao buscar tarefas: {e}", file=sys.stderr)
         return []
+    finally:
+        if conn is not None:
+            conn.close()
 
 def main():
     parser = argparse.ArgumentParser(description='Buscar tarefas do banco de dados')
@@ -7,16 +7,16 @@ import json
 import sys
 import os
 
-# Adicionar o diretório domcore ao path
-sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+# Adicionar o diretório raiz ao path para importar o pacote domcore
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from core.db import get_db_connection
-from core.config import DATABASE_URL
+from domcore.core.db import get_db_connection
 
-def get_user_stats():
+def get_user_stats(connection_factory=get_db_connection):
     """Busca estatísticas de usuários do banco de dados"""
+    conn = None
     try:
-        conn = get_db_connection()
+        conn = connection_factory()
         cursor = conn.cursor()
         
         # Estatísticas gerais
@@ -65,7 +65,6 @@ def get_user_stats():
         }
         
         cursor.close()
-        conn.close()
         
         return stats
         
@@ -79,6 +78,9 @@ def get_user_stats():
             'novos_usuarios_mes': 0,
             'usuarios_online': 0
         }
+    finally:
+        if conn is not None:
+            conn.close()
 
 def main():
     stats = get_user_stats()
@@ -21,7 +21,8 @@ from domcore.core.config import config
 from domcore.services.user_service import UserService
 from domcore.core.db import DATABASE_URL
 
-def get_users(profile=None, limit=50, offset=0, search=None, status=None, ativo=None, grupo=None):
+def get_users(profile=None, limit=50, offset=0, search=None, status=None, ativo=None, grupo=None,
+              cursor=None, include_total=True):
     """Busca usuários com filtros"""
     try:
         # Criar sessão do banco
@@ -41,7 +42,9 @@ def get_users(profile=None, limit=50, offset=0, search=None, status=None, ativo=
                 perfil=profile,
                 status=status,
                 ativo=ativo,
-                grupo=grupo
+                grupo=grupo,
+                cursor=cursor,
+                include_total=include_total
             )
             
             return result
@@ -59,6 +62,8 @@ def main():
     parser.add_argument('--status', type=str, help='Status dos usuários (active, inactive, pending, blocked)')
     parser.add_argument('--ativo', type=str, help='Filtrar por ativo (true/false)')
     parser.add_argument('--grupo', type=str, help='ID do grupo para filtrar')
+    parser.add_argument('--cursor', type=str, help='next_cursor da página anterior (substitui --offset)')
+    parser.add_argument('--no-total', action='store_true', help='Não contar o total de usuários')
     
     args = parser.parse_args()
     
@@ -75,7 +80,9 @@ def main():
         search=args.search,
         status=args.status,
         ativo=ativo,
-        grupo=args.grupo
+        grupo=args.grupo,
+        cursor=args.cursor,
+        include_total=not args.no_total
     )
     
     if result is not None:
@@ -11,7 +11,7 @@ Modelo de Notificação - Entidade de notificações do sistema
 
 from datetime import datetime
 from typing import Optional, List, Dict, Any
-from sqlalchemy import Column, String, Boolean, DateTime, Text, JSON, ForeignKey
+from sqlalchemy import Column, String, Boolean, DateTime, Text, JSON, ForeignKey, Index, text
 from pydantic import BaseModel, Field, validator
 from ..core.enums import NotificationType
 from ..core.db import Base
@@ -35,6 +35,15 @@ class NotificationDB(Base):
     categoria = Column(String(50), nullable=True)
     ativo = Column(Boolean, default=True)
     data_atualizacao = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    # Listagem/paginação por destinatário e o subconjunto de não lidas (contadores e
+    # mark_all_as_read). Bancos existentes: scripts/create_indexes.py
+    __table_args__ = (
+        Index("ix_notifications_destinatario_criacao", "destinatario_id", "data_criacao", "id",
+              postgresql_where=text("ativo = true")),
+        Index("ix_notifications_destinatario_nao_lidas", "destinatario_id", "data_criacao",
+              postgresql_where=text("ativo = true AND lida = false")),
+    )
 
 class NotificationBase(BaseModel):
     """Modelo base para notificação"""
@@ -83,6 +92,7 @@ class Notification(NotificationBase):
     
     class Config:
         """Configuração do modelo"""
+        from_attributes = True
         json_encoders = {
             datetime: lambda v: v.isoformat()
         }
@@ -11,12 +11,20 @@ Modelo de Tarefa - Entidade de tarefas do sistema
 
 from datetime import datetime
 from typing import Optional, List
-from sqlalchemy import Column, String, Boolean, DateTime, Text, JSON, ForeignKey, Integer
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, String, Boolean, DateTime, Text, JSON, ForeignKey, Integer, Index, Computed, text
+from sqlalchemy.dialects.postgresql import TSVECTOR
+from sqlalchemy.orm import relationship, deferred
 from pydantic import BaseModel, Field, validator
 from ..core.enums import TaskStatus
 from ..core.db import Base
 
+# Configuração de busca textual e expressão da coluna tasks.search_vector
+TASK_SEARCH_CONFIG = "portuguese"
+TASK_SEARCH_VECTOR_SQL = (
+    f"setweight(to_tsvector('{TASK_SEARCH_CONFIG}', coalesce(titulo, '')), 'A') || "
+    f"setweight(to_tsvector('{TASK_SEARCH_CONFIG}', coalesce(descricao, '')), 'B')"
+)
+
 # Modelos SQLAlchemy para tabelas
 class TaskDB(Base):
     """Tabela de tarefas no banco de dados"""
@@ -38,6 +46,32 @@ class TaskDB(Base):
     comentarios = Column(JSON, default=list)
     ativo = Column(Boolean, default=True)
     data_atualizacao = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    # Busca textual em português (título pesa mais que descrição); coluna gerada pelo banco
+    # e nunca carregada nas listagens
+    search_vector = deferred(Column(
+        TSVECTOR,
+        Computed(TASK_SEARCH_VECTOR_SQL, persisted=True)
+    ))
+    
+    # Índices parciais (só tarefas ativas) para os filtros de TaskService/DashboardService;
+    # (data_criacao, id) ao final atende a ordenação e a paginação por cursor.
+    # Bancos existentes: scripts/create_indexes.py
+    __table_args__ = (
+        Index("ix_tasks_responsavel_criacao", "responsavel_id", "data_criacao", "id",
+              postgresql_where=text("ativo = true")),
+        Index("ix_tasks_criador_criacao", "criador_id", "data_criacao", "id",
+              postgresql_where=text("ativo = true")),
+        Index("ix_tasks_criacao", "data_criacao", "id",
+              postgresql_where=text("ativo = true")),
+        Index("ix_tasks_status_criacao", "status", "data_criacao", "id",
+              postgresql_where=text("ativo = true")),
+        # Prazos em aberto (atrasadas, hoje, semana)
+        Index("ix_tasks_data_limite_abertas", "data_limite",
+              postgresql_where=text("ativo = true AND status <> 'completed'")),
+        # Busca textual (search_vector @@ websearch_to_tsquery); completo, pois
+        # domcore/get_tasks.py não filtra por ativo
+        Index("ix_tasks_search_vector", "search_vector", postgresql_using="gin"),
+    )
 
 class TaskBase(BaseModel):
     """Modelo base para tarefa"""
@@ -11,14 +11,15 @@ Modelo de Usuário - Entidade principal do sistema
 
 from datetime import datetime
 from typing import Optional, List
-from sqlalchemy import Column, String, Boolean, DateTime, Text, JSON, LargeBinary, ForeignKey
+from sqlalchemy import Column, String, Boolean, DateTime, Text, JSON, LargeBinary, ForeignKey, Index, text
 from sqlalchemy.ext.declarative import declarative_base
 from pydantic import BaseModel, Field, validator
 from ..core.enums import UserProfile, Platform
 from ..utils.cpf_validator import CPFValidator
 from ..core.db import Base
+from ..core.signed_urls import signed_photo_url
 from sqlalchemy.dialects.postgresql import UUID
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import relationship, deferred, column_property
 import uuid
 from sqlalchemy import func
 
@@ -41,7 +42,9 @@ class UserDB(Base):
     ultimo_login = Column(DateTime, nullable=True)
     plataformas = Column(JSON, default=list)
     permissoes = Column(JSON, default=list)
-    user_photo = Column(LargeBinary, nullable=True, comment="Foto do usuário (binário)")
+    # Foto carregada sob demanda: listagens e autenticação não trafegam os bytes.
+    # É servida por /api/users/{id}/photo (ver photo_url, URL assinada com expiração)
+    user_photo = deferred(Column(LargeBinary, nullable=True, comment="Foto do usuário (binário)"))
     
     # Relacionamentos
     grupos = relationship("UserGroupRole", back_populates="user")
@@ -50,6 +53,11 @@ class UserDB(Base):
     # tarefas_responsavel = relationship("Task", foreign_keys="Task.responsavel_id", back_populates="responsavel")
     # notificacoes = relationship("Notification", back_populates="usuario")
     
+    @property
+    def photo_url(self) -> Optional[str]:
+        """URL assinada da foto do usuário (sem carregar os bytes) ou None se não houver foto"""
+        return signed_photo_url(self.id) if self.has_photo else None
+    
     def to_dict(self):
         """Converte o usuário para dicionário"""
         return {
@@ -62,7 +70,7 @@ class UserDB(Base):
             "perfil": self.perfil,
             "status": "active" if self.ativo else "inactive",  # Mapear ativo para status
             "ativo": self.ativo,
-            "user_photo": self.user_photo,
+            "user_photo": self.photo_url,
             "data_criacao": self.data_criacao.isoformat() if self.data_criacao else None,
             "data_atualizacao": self.data_atualizacao.isoformat() if self.data_atualizacao else None,
             "ultimo_acesso": self.ultimo_login.isoformat() if self.ultimo_login else None,  # Usar ultimo_login como ultimo_acesso
@@ -81,13 +89,16 @@ class UserDB(Base):
             "perfil": self.perfil,
             "status": "active" if self.ativo else "inactive",  # Mapear ativo para status
             "ativo": self.ativo,
-            "user_photo": self.user_photo,
+            "user_photo": self.photo_url,
             "data_criacao": self.data_criacao.isoformat() if self.data_criacao else None,
             "data_atualizacao": self.data_atualizacao.isoformat() if self.data_atualizacao else None,
             "ultimo_acesso": self.ultimo_login.isoformat() if self.ultimo_login else None,  # Usar ultimo_login como ultimo_acesso
             "grupos": [grupo.grupo.to_dict() for grupo in self.grupos if grupo.grupo and grupo.grupo.ativo] if self.grupos else []
         }
 
+# Indica se há foto sem ler o conteúdo (IS NOT NULL não precisa descompactar o TOAST)
+UserDB.has_photo = column_property(UserDB.__table__.c.user_photo.isnot(None))
+
 class UserSession(Base):
     __tablename__ = 'user_sessions'
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
@@ -99,6 +110,13 @@ class UserSession(Base):
     active_context_role = Column(String)
     user_agent = Column(String)
     ip_address = Column(String)
+    
+    # Busca da sessão pelo token (/api/auth/session/context) e varredura das expiradas
+    # (services/session_reaper.py). Bancos existentes: scripts/create_indexes.py
+    __table_args__ = (
+        Index("ix_user_sessions_user_token", "user_id", "session_token"),
+        Index("ix_user_sessions_expires_at", "expires_at"),
+    )
 
 class UserGroupRole(Base):
     """Tabela de papéis dos usuários nos grupos (contextos)"""
@@ -112,6 +130,15 @@ class UserGroupRole(Base):
     created_at = Column(DateTime, default=func.now())
     updated_at = Column(DateTime, default=func.now(), onupdate=func.now())
     
+    # Um vínculo por (user, group), ativo ou não: serve à verificação de permissão e é o
+    # alvo do ON CONFLICT em GroupService.add_members_to_group. Listagem de membros por grupo.
+    # Bancos existentes: scripts/create_indexes.py
+    __table_args__ = (
+        Index("uq_user_group_roles_user_group", "user_id", "group_id", unique=True),
+        Index("ix_user_group_roles_group_role", "group_id", "role",
+              postgresql_where=text("ativo = true")),
+    )
+    
     # Relacionamentos
     user = relationship("UserDB", back_populates="grupos")
     grupo = relationship("Group", back_populates="usuarios")
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Worker persistente de consultas do domcore
+
+@fileoverview Worker de consultas JSON-lines do DOM v1
+@directory domcore
+@description Processo de longa duração que atende as consultas das rotas Next.js via stdin/stdout,
+             mantendo os imports do domcore e o pool de conexões do engine aquecidos
+@created 2024-12-19
+@lastModified 2024-12-19
+@author Equipe DOM v1
+
+Protocolo (uma mensagem JSON por linha):
+    requisição: {"id": 1, "method": "get_tasks", "params": {"profile": "empregador"}}
+    resposta:   {"id": 1, "ok": true, "result": [...]}
+    erro:       {"id": 1, "ok": false, "error": "mensagem"}
+
+Uso:
+    python domcore/query_worker.py
+"""
+
+import sys
+import os
+import json
+import logging
+
+# Adiciona o diretório raiz ao path para importar módulos
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from domcore.core.db import get_pooled_connection
+from domcore.get_tasks import get_tasks
+from domcore.get_notifications import get_notifications, get_notifications_page
+from domcore.get_user_stats import get_user_stats
+from domcore.mark_all_notifications_read import mark_all_notifications_read
+
+# stdout é reservado para o protocolo; logs vão para stderr
+logging.basicConfig(level=logging.WARNING, stream=sys.stderr)
+logger = logging.getLogger(__name__)
+
+
+def _ping(params: dict) -> dict:
+    """Verificação de saúde do worker"""
+    return {"pong": True, "pid": os.getpid()}
+
+
+def _get_tasks(params: dict) -> list:
+    """Busca tarefas reutilizando conexões do pool"""
+    return get_tasks(connection_factory=get_pooled_connection, **params)
+
+
+def _get_notifications(params: dict) -> list:
+    """Busca notificações (NotificationService já usa o pool do engine)"""
+    return get_notifications(**params)
+
+
+def _get_notifications_page(params: dict) -> dict:
+    """Busca uma página de notificações com next_cursor (paginação por cursor)"""
+    return get_notifications_page(**params)
+
+
+def _get_user_stats(params: dict) -> dict:
+    """Busca estatísticas de usuários reutilizando conexões do pool"""
+    return get_user_stats(connection_factory=get_pooled_connection)
+
+
+def _mark_all_notifications_read(params: dict) -> dict:
+    """Marca todas as notificações do usuário como lidas (UPDATE único)"""
+    return mark_all_notifications_read(**params)
+
+
+HANDLERS = {
+    "ping": _ping,
+    "get_tasks": _get_tasks,
+    "get_notifications": _get_notifications,
+    "get_notifications_page": _get_notifications_page,
+    "get_user_stats": _get_user_stats,
+    "mark_all_notifications_read": _mark_all_notifications_read,
+}
+
+
+def handle_request(line: str) -> dict:
+    """
+    Processa uma linha do protocolo e monta a resposta
+
+    Args:
+        line: Requisição serializada em JSON
+
+    Returns:
+        dict: Resposta com o mesmo id da requisição
+    """
+    request_id = None
+    try:
+        request = json.loads(line)
+        request_id = request.get("id")
+        method = request.get("method")
+        params = request.get("params") or {}
+
+        handler = HANDLERS.get(method)
+        if handler is None:
+            return {"id": request_id, "ok": False, "error": f"Método desconhecido: {method}"}
+
+        return {"id": request_id, "ok": True, "result": handler(params)}
+
+    except Exception as e:
+        logger.error("❌ Erro ao processar requisição %s: %s", request_id, e)
+        return {"id": request_id, "ok": False, "error": str(e)}
+
+
+def main():
+    """Laço principal: lê requisições de stdin e responde em stdout"""
+    for line in sys.stdin:
+        line = line.strip()
+        if not line:
+            continue
+
+        response = handle_request(line)
+        sys.stdout.write(json.dumps(response, ensure_ascii=False, default=str) + "\n")
+        sys.stdout.flush()
+
+
+if __name__ == "__main__":
+    main()
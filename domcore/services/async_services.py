@@ -0,0 +1,84 @@
+"""
+Serviços assíncronos do DOM v1
+
+@fileoverview Variantes assíncronas dos serviços de tarefas, grupos e usuários
+@directory domcore/services
+@description Expõe os métodos de TaskService, GroupService e UserService para AsyncSession,
+             executando a mesma lógica via AsyncSession.run_sync: o I/O do banco é aguardado
+             no event loop (asyncpg) em vez de bloqueá-lo
+@created 2024-12-19
+@lastModified 2024-12-19
+@author Equipe DOM v1
+"""
+
+import functools
+from typing import Any, Callable, Awaitable
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .task_service import TaskService
+from .group_service import GroupService
+from .user_service import UserService
+
+
+def _async_variant(method: Callable[..., Any]) -> Callable[..., Awaitable[Any]]:
+    """
+    Cria a versão assíncrona de um método estático que recebe a sessão como primeiro argumento
+
+    O método síncrono roda dentro de run_sync, que entrega uma Session cujas consultas
+    (inclusive lazy loads) suspendem a corrotina em vez de bloquear a thread.
+    """
+    @functools.wraps(method)
+    async def wrapper(db: AsyncSession, *args, **kwargs):
+        return await db.run_sync(lambda session: method(session, *args, **kwargs))
+    return staticmethod(wrapper)
+
+
+class AsyncTaskService:
+    """TaskService para AsyncSession"""
+
+    create_task = _async_variant(TaskService.create_task)
+    get_task = _async_variant(TaskService.get_task)
+    get_tasks = _async_variant(TaskService.get_tasks)
+    get_tasks_page = _async_variant(TaskService.get_tasks_page)
+    update_task = _async_variant(TaskService.update_task)
+    delete_task = _async_variant(TaskService.delete_task)
+    update_task_status = _async_variant(TaskService.update_task_status)
+    get_task_stats = _async_variant(TaskService.get_task_stats)
+
+
+class AsyncGroupService:
+    """GroupService para AsyncSession"""
+
+    create_group = _async_variant(GroupService.create_group)
+    get_group = _async_variant(GroupService.get_group)
+    get_groups = _async_variant(GroupService.get_groups)
+    update_group = _async_variant(GroupService.update_group)
+    delete_group = _async_variant(GroupService.delete_group)
+    get_group_members = _async_variant(GroupService.get_group_members)
+    add_member_to_group = _async_variant(GroupService.add_member_to_group)
+    add_members_to_group = _async_variant(GroupService.add_members_to_group)
+    remove_member_from_group = _async_variant(GroupService.remove_member_from_group)
+    update_member_role = _async_variant(GroupService.update_member_role)
+    get_group_stats = _async_variant(GroupService.get_group_stats)
+    get_groups_stats = _async_variant(GroupService.get_groups_stats)
+    get_user_groups = _async_variant(GroupService.get_user_groups)
+    get_permission_map = _async_variant(GroupService.get_permission_map)
+    check_user_permission = _async_variant(GroupService.check_user_permission)
+
+
+class AsyncUserService:
+    """UserService para AsyncSession"""
+
+    get_users = _async_variant(UserService.get_users)
+    get_user = _async_variant(UserService.get_user)
+    get_user_by_cpf = _async_variant(UserService.get_user_by_cpf)
+    get_user_by_email = _async_variant(UserService.get_user_by_email)
+    create_user = _async_variant(UserService.create_user)
+    update_user = _async_variant(UserService.update_user)
+    delete_user = _async_variant(UserService.delete_user)
+    activate_user = _async_variant(UserService.activate_user)
+    deactivate_user = _async_variant(UserService.deactivate_user)
+    add_user_to_group = _async_variant(UserService.add_user_to_group)
+    remove_user_from_group = _async_variant(UserService.remove_user_from_group)
+    get_user_stats = _async_variant(UserService.get_user_stats)
+    update_last_access = _async_variant(UserService.update_last_access)
@@ -22,14 +22,17 @@ from ..models.notification import NotificationDB, NotificationStats
 class DashboardService:
     """Serviço para estatísticas do dashboard"""
     
-    def __init__(self):
-        self.db: Session = SessionLocal()
+    def __init__(self, db: Optional[Session] = None):
+        # Só fecha no __exit__ a sessão que o próprio serviço abriu
+        self._owns_db = db is None
+        self.db: Session = db or SessionLocal()
     
     def __enter__(self):
         return self
     
     def __exit__(self, exc_type, exc_val, exc_tb):
-        self.db.close()
+        if self._owns_db:
+            self.db.close()
     
     def get_dashboard_stats(self, user_id: str, profile: UserProfile) -> Dict[str, Any]:
         """
@@ -67,138 +70,121 @@ class DashboardService:
     def _get_task_stats(self, user_id: str, profile: UserProfile) -> TaskStats:
         """Busca estatísticas de tarefas baseadas no perfil"""
         try:
-            # Filtros baseados no perfil
-            if profile == UserProfile.EMPREGADOR:
-                # Empregador vê tarefas que criou
-                base_filter = TaskDB.criador_id == user_id
-            elif profile == UserProfile.EMPREGADO:
-                # Empregado vê tarefas atribuídas a ele
-                base_filter = TaskDB.responsavel_id == user_id
-            elif profile == UserProfile.FAMILIAR:
-                # Familiar vê tarefas da família (simulado)
-                base_filter = or_(
-                    TaskDB.criador_id == user_id,
-                    TaskDB.responsavel_id == user_id
-                )
-            else:
-                # Outros perfis vêem todas as tarefas ativas
-                base_filter = TaskDB.ativo == True
-            
-            # Estatísticas por status
-            total_tarefas = self.db.query(func.count(TaskDB.id)).filter(
-                base_filter, TaskDB.ativo == True
-            ).scalar() or 0
-            
-            tarefas_pendentes = self.db.query(func.count(TaskDB.id)).filter(
-                base_filter, TaskDB.status == TaskStatus.PENDING, TaskDB.ativo == True
-            ).scalar() or 0
-            
-            tarefas_em_andamento = self.db.query(func.count(TaskDB.id)).filter(
-                base_filter, TaskDB.status == TaskStatus.IN_PROGRESS, TaskDB.ativo == True
-            ).scalar() or 0
-            
-            tarefas_concluidas = self.db.query(func.count(TaskDB.id)).filter(
-                base_filter, TaskDB.status == TaskStatus.COMPLETED, TaskDB.ativo == True
-            ).scalar() or 0
-            
+            return self.query_task_stats(user_id, profile)
+        except Exception:
+            # Fallback para dados simulados
+            return self._get_fallback_task_stats(profile)
+    
+    def query_task_stats(self, user_id: str, profile: UserProfile) -> TaskStats:
+        """Consulta estatísticas de tarefas no banco (propaga erros, sem fallback)"""
+        # Filtros baseados no perfil
+        if profile == UserProfile.EMPREGADOR:
+            # Empregador vê tarefas que criou
+            base_filter = TaskDB.criador_id == user_id
+        elif profile == UserProfile.EMPREGADO:
+            # Empregado vê tarefas atribuídas a ele
+            base_filter = TaskDB.responsavel_id == user_id
+        elif profile == UserProfile.FAMILIAR:
+            # Familiar vê tarefas da família (simulado)
+            base_filter = or_(
+                TaskDB.criador_id == user_id,
+                TaskDB.responsavel_id == user_id
+            )
+        else:
+            # Outros perfis vêem todas as tarefas ativas
+            base_filter = TaskDB.ativo == True
+        
+        hoje = datetime.utcnow().date()
+        fim_semana = hoje + timedelta(days=7)
+        data_limite = func.date(TaskDB.data_limite)
+        
+        # Uma única consulta com agregação condicional (COUNT(*) FILTER (WHERE ...))
+        row = self.db.query(
+            func.count().label("total"),
+            func.count().filter(TaskDB.status == TaskStatus.PENDING).label("pendentes"),
+            func.count().filter(TaskDB.status == TaskStatus.IN_PROGRESS).label("em_andamento"),
+            func.count().filter(TaskDB.status == TaskStatus.COMPLETED).label("concluidas"),
             # Tarefas atrasadas (data_limite < hoje e status != completed)
-            hoje = datetime.utcnow().date()
-            tarefas_atrasadas = self.db.query(func.count(TaskDB.id)).filter(
-                base_filter,
+            func.count().filter(
                 TaskDB.data_limite < hoje,
-                TaskDB.status != TaskStatus.COMPLETED,
-                TaskDB.ativo == True
-            ).scalar() or 0
-            
+                TaskDB.status != TaskStatus.COMPLETED
+            ).label("atrasadas"),
             # Tarefas para hoje
-            tarefas_hoje = self.db.query(func.count(TaskDB.id)).filter(
-                base_filter,
-                func.date(TaskDB.data_limite) == hoje,
-                TaskDB.ativo == True
-            ).scalar() or 0
-            
+            func.count().filter(data_limite == hoje).label("hoje"),
             # Tarefas da semana
-            fim_semana = hoje + timedelta(days=7)
-            tarefas_semana = self.db.query(func.count(TaskDB.id)).filter(
-                base_filter,
-                func.date(TaskDB.data_limite) <= fim_semana,
-                func.date(TaskDB.data_limite) >= hoje,
-                TaskDB.ativo == True
-            ).scalar() or 0
-            
-            return TaskStats(
-                total_tarefas=total_tarefas,
-                tarefas_pendentes=tarefas_pendentes,
-                tarefas_em_andamento=tarefas_em_andamento,
-                tarefas_concluidas=tarefas_concluidas,
-                tarefas_atrasadas=tarefas_atrasadas,
-                tarefas_hoje=tarefas_hoje,
-                tarefas_semana=tarefas_semana
-            )
-        except Exception:
-            # Fallback para dados simulados
-            return self._get_fallback_task_stats(profile)
+            func.count().filter(
+                data_limite <= fim_semana,
+                data_limite >= hoje
+            ).label("semana")
+        ).filter(base_filter, TaskDB.ativo == True).one()
+        
+        total_tarefas = row.total or 0
+        tarefas_pendentes = row.pendentes or 0
+        tarefas_em_andamento = row.em_andamento or 0
+        tarefas_concluidas = row.concluidas or 0
+        tarefas_atrasadas = row.atrasadas or 0
+        tarefas_hoje = row.hoje or 0
+        tarefas_semana = row.semana or 0
+        
+        return TaskStats(
+            total_tarefas=total_tarefas,
+            tarefas_pendentes=tarefas_pendentes,
+            tarefas_em_andamento=tarefas_em_andamento,
+            tarefas_concluidas=tarefas_concluidas,
+            tarefas_atrasadas=tarefas_atrasadas,
+            tarefas_hoje=tarefas_hoje,
+            tarefas_semana=tarefas_semana
+        )
     
     def _get_notification_stats(self, user_id: str, profile: UserProfile) -> NotificationStats:
         """Busca estatísticas de notificações baseadas no perfil"""
         try:
-            # Filtro base para notificações do usuário
-            base_filter = NotificationDB.destinatario_id == user_id
-            
-            # Estatísticas gerais
-            total_notificacoes = self.db.query(func.count(NotificationDB.id)).filter(
-                base_filter, NotificationDB.ativo == True
-            ).scalar() or 0
-            
-            notificacoes_nao_lidas = self.db.query(func.count(NotificationDB.id)).filter(
-                base_filter, NotificationDB.lida == False, NotificationDB.ativo == True
-            ).scalar() or 0
-            
-            # Notificações de hoje
-            hoje = datetime.utcnow().date()
-            notificacoes_hoje = self.db.query(func.count(NotificationDB.id)).filter(
-                base_filter,
-                func.date(NotificationDB.data_criacao) == hoje,
-                NotificationDB.ativo == True
-            ).scalar() or 0
-            
-            # Notificações da semana
-            fim_semana = hoje + timedelta(days=7)
-            notificacoes_semana = self.db.query(func.count(NotificationDB.id)).filter(
-                base_filter,
-                func.date(NotificationDB.data_criacao) <= fim_semana,
-                func.date(NotificationDB.data_criacao) >= hoje,
-                NotificationDB.ativo == True
-            ).scalar() or 0
-            
-            # Notificações urgentes
-            notificacoes_urgentes = self.db.query(func.count(NotificationDB.id)).filter(
-                base_filter,
-                NotificationDB.prioridade == "urgente",
-                NotificationDB.ativo == True
-            ).scalar() or 0
-            
-            # Notificações por tipo
-            notificacoes_por_tipo = {}
-            tipos = self.db.query(NotificationDB.tipo, func.count(NotificationDB.id)).filter(
-                base_filter, NotificationDB.ativo == True
-            ).group_by(NotificationDB.tipo).all()
-            
-            for tipo, count in tipos:
-                notificacoes_por_tipo[tipo] = count
-            
-            return NotificationStats(
-                total_notificacoes=total_notificacoes,
-                notificacoes_nao_lidas=notificacoes_nao_lidas,
-                notificacoes_hoje=notificacoes_hoje,
-                notificacoes_semana=notificacoes_semana,
-                notificacoes_urgentes=notificacoes_urgentes,
-                notificacoes_por_tipo=notificacoes_por_tipo
-            )
+            return self.query_notification_stats(user_id)
         except Exception:
             # Fallback para dados simulados
             return self._get_fallback_notification_stats(profile)
     
+    def query_notification_stats(self, user_id: str) -> NotificationStats:
+        """Consulta estatísticas de notificações no banco (propaga erros, sem fallback)"""
+        # Filtro base para notificações do usuário
+        base_filter = NotificationDB.destinatario_id == user_id
+        
+        hoje = datetime.utcnow().date()
+        fim_semana = hoje + timedelta(days=7)
+        data_criacao = func.date(NotificationDB.data_criacao)
+        
+        # Uma única consulta: agregação condicional agrupada por tipo;
+        # os totais gerais são a soma das linhas
+        rows = self.db.query(
+            NotificationDB.tipo,
+            func.count().label("total"),
+            func.count().filter(NotificationDB.lida == False).label("nao_lidas"),
+            func.count().filter(data_criacao == hoje).label("hoje"),
+            func.count().filter(
+                data_criacao <= fim_semana,
+                data_criacao >= hoje
+            ).label("semana"),
+            func.count().filter(NotificationDB.prioridade == "urgente").label("urgentes")
+        ).filter(
+            base_filter, NotificationDB.ativo == True
+        ).group_by(NotificationDB.tipo).all()
+        
+        total_notificacoes = sum(row.total for row in rows)
+        notificacoes_nao_lidas = sum(row.nao_lidas for row in rows)
+        notificacoes_hoje = sum(row.hoje for row in rows)
+        notificacoes_semana = sum(row.semana for row in rows)
+        notificacoes_urgentes = sum(row.urgentes for row in rows)
+        notificacoes_por_tipo = {row.tipo: row.total for row in rows}
+        
+        return NotificationStats(
+            total_notificacoes=total_notificacoes,
+            notificacoes_nao_lidas=notificacoes_nao_lidas,
+            notificacoes_hoje=notificacoes_hoje,
+            notificacoes_semana=notificacoes_semana,
+            notificacoes_urgentes=notificacoes_urgentes,
+            notificacoes_por_tipo=notificacoes_por_tipo
+        )
+    
     def _get_users_online(self, profile: UserProfile) -> int:
         """Busca número de usuários online baseado no perfil"""
         try:
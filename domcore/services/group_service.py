@@ -8,15 +8,26 @@ Serviço de Grupos para DOM v1
 @author DOM Team
 """
 
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, joinedload, selectinload
 from sqlalchemy import and_, or_, func, desc
-from typing import Dict, List, Any, Optional
+from sqlalchemy.dialects.postgresql import insert
+from typing import Dict, List, Any, Optional, Tuple
 from datetime import datetime, timedelta
 import uuid
 
 from ..models.group import Group, GroupCreate, GroupUpdate, GroupResponse
 from ..models.user import UserDB, UserGroupRole
 from ..core.exceptions import NotFoundException, ValidationException, PermissionException
+from ..utils.pagination import paginate_keyset
+from .permission_cache import ROLE_HIERARCHY, group_permission_cache, role_level
+
+
+def _parse_uuid(value: Any, label: str) -> uuid.UUID:
+    """Converte um ID recebido da rota, tratando ID malformado como erro de validação (400)"""
+    try:
+        return uuid.UUID(str(value))
+    except ValueError:
+        raise ValidationException(f"ID de {label} inválido: {value}")
 
 
 class GroupService:
@@ -82,9 +93,16 @@ class GroupService:
         search: Optional[str] = None,
         tipo: Optional[str] = None,
         ativo: Optional[bool] = None,
-        user_id: Optional[str] = None
+        user_id: Optional[str] = None,
+        cursor: Optional[str] = None,
+        include_total: bool = True
     ) -> Dict[str, Any]:
-        """Busca grupos com filtros"""
+        """
+        Busca grupos com filtros
+        
+        Com cursor, a página é buscada por chave (data_criacao, id) e skip é ignorado;
+        next_cursor da resposta aponta para a página seguinte.
+        """
         query = db.query(Group)
         
         # Aplicar filtros
@@ -113,17 +131,20 @@ class GroupService:
                 )
             )
         
-        # Contar total
-        total = query.count()
+        # Contar total (opcional)
+        total = query.count() if include_total else None
         
-        # Aplicar paginação e ordenação
-        groups = query.order_by(desc(Group.data_criacao)).offset(skip).limit(limit).all()
+        # Aplicar ordenação e paginação
+        groups, next_cursor = paginate_keyset(
+            query, Group.data_criacao, Group.id, limit, cursor=cursor, offset=skip
+        )
         
         return {
             "items": [group.to_dict() for group in groups],
             "total": total,
             "skip": skip,
-            "limit": limit
+            "limit": limit,
+            "next_cursor": next_cursor
         }
     
     @staticmethod
@@ -208,8 +229,13 @@ class GroupService:
         # Contar total
         total = query.count()
         
-        # Aplicar paginação
-        members = query.offset(skip).limit(limit).all()
+        # Aplicar paginação; usuários, seus papéis e grupos (usados por to_api_dict)
+        # são carregados em consultas fixas por página em vez de lazy loads por membro
+        members = query.options(
+            selectinload(UserGroupRole.user)
+            .selectinload(UserDB.grupos)
+            .selectinload(UserGroupRole.grupo)
+        ).offset(skip).limit(limit).all()
         
         # Enriquecer com dados do usuário
         enriched_members = []
@@ -234,53 +260,101 @@ class GroupService:
         role: str = "member",
         added_by: Optional[str] = None
     ) -> UserGroupRole:
-        """Adiciona um usuário a um grupo"""
-        # Verificar se grupo existe
-        group = GroupService.get_group(db, group_id)
-        
-        # Verificar se usuário existe
-        user = db.query(UserDB).filter(UserDB.id == uuid.UUID(user_id)).first()
-        if not user:
-            raise NotFoundException(f"Usuário com ID {user_id} não encontrado")
-        
-        # Verificar se já é membro ativo
-        existing = db.query(UserGroupRole).filter(
-            and_(
-                UserGroupRole.user_id == uuid.UUID(user_id),
-                UserGroupRole.group_id == uuid.UUID(group_id),
-                UserGroupRole.ativo == True
+        """Adiciona um usuário a um grupo (mesmo upsert e validações de add_members_to_group)"""
+        result = GroupService.add_members_to_group(db, group_id, [(user_id, role)])
+        if result["skipped"]:
+            raise ValidationException(f"Usuário já é membro ativo deste grupo")
+        return result["items"][0]
+    
+    @staticmethod
+    def add_members_to_group(
+        db: Session,
+        group_id: str,
+        members: List[Tuple[str, str]]
+    ) -> Dict[str, Any]:
+        """
+        Adiciona vários usuários a um grupo de uma vez
+        
+        Uma consulta valida o grupo e todos os usuários (LEFT JOIN de users no grupo) e um
+        único INSERT ... ON CONFLICT (user_id, group_id) DO UPDATE ... WHERE NOT ativo cria
+        os vínculos novos e reativa os inativos. Membros já ativos não são alterados (como em
+        add_member_to_group, o papel deles muda só pela rota de papel) e voltam em `skipped`.
+        Se o mesmo usuário aparecer mais de uma vez, vale o último papel.
+        
+        Args:
+            db: Sessão do banco
+            group_id: ID do grupo
+            members: Lista de (user_id, role); role deve existir em ROLE_HIERARCHY
+            
+        Returns:
+            Dict: {"items": vínculos gravados, "skipped": IDs dos que já eram membros ativos}
+        """
+        invalid = sorted({role for _, role in members if role not in ROLE_HIERARCHY})
+        if invalid:
+            raise ValidationException(
+                f"Papel inválido: {', '.join(invalid)} (válidos: {', '.join(ROLE_HIERARCHY)})"
             )
-        ).first()
         
-        if existing:
-            raise ValidationException(f"Usuário já é membro ativo deste grupo")
+        group_uuid = _parse_uuid(group_id, "grupo")
+        roles = {_parse_uuid(user_id, "usuário"): role for user_id, role in members}
+        if not roles:
+            return {"items": [], "skipped": []}
         
-        # Criar ou reativar relacionamento
-        user_group = db.query(UserGroupRole).filter(
+        # Validação única: a linha do grupo aparece (ativo) com cada usuário encontrado
+        rows = db.query(Group.id, UserDB.id).select_from(Group).outerjoin(
+            UserDB, UserDB.id.in_(roles)
+        ).filter(
             and_(
-                UserGroupRole.user_id == uuid.UUID(user_id),
-                UserGroupRole.group_id == uuid.UUID(group_id)
+                Group.id == group_uuid,
+                Group.ativo == True
             )
-        ).first()
+        ).all()
         
-        if user_group:
-            # Reativar membro inativo
-            user_group.role = role
-            user_group.ativo = True
-            user_group.updated_at = datetime.utcnow()
-        else:
-            # Criar novo relacionamento
-            user_group = UserGroupRole(
-                user_id=uuid.UUID(user_id),
-                group_id=uuid.UUID(group_id),
-                role=role,
-                ativo=True
+        if not rows:
+            raise NotFoundException(f"Grupo com ID {group_id} não encontrado")
+        
+        missing = set(roles) - {user_id for _, user_id in rows}
+        if missing:
+            raise NotFoundException(
+                f"Usuários não encontrados: {', '.join(sorted(str(user_id) for user_id in missing))}"
             )
-            db.add(user_group)
         
+        now = datetime.utcnow()
+        statement = insert(UserGroupRole).values([
+            {
+                "id": uuid.uuid4(),
+                "user_id": user_id,
+                "group_id": group_uuid,
+                "role": role,
+                "ativo": True,
+                "created_at": now,
+                "updated_at": now
+            }
+            for user_id, role in roles.items()
+        ])
+        # Só reativa vínculos inativos: os ativos não entram no RETURNING
+        statement = statement.on_conflict_do_update(
+            index_elements=[UserGroupRole.user_id, UserGroupRole.group_id],
+            set_={
+                "role": statement.excluded.role,
+                "ativo": True,
+                "updated_at": statement.excluded.updated_at
+            },
+            where=UserGroupRole.ativo.isnot(True)
+        ).returning(UserGroupRole)
+        
+        user_groups = db.scalars(
+            statement, execution_options={"populate_existing": True}
+        ).all()
         db.commit()
-        db.refresh(user_group)
-        return user_group
+        
+        written = {user_group.user_id for user_group in user_groups}
+        for user_id in written:
+            group_permission_cache.invalidate_user(db, user_id)
+        return {
+            "items": user_groups,
+            "skipped": sorted(str(user_id) for user_id in roles if user_id not in written)
+        }
     
     @staticmethod
     def remove_member_from_group(db: Session, group_id: str, user_id: str) -> bool:
@@ -301,6 +375,7 @@ class GroupService:
         user_group.updated_at = datetime.utcnow()
         
         db.commit()
+        group_permission_cache.invalidate_user(db, user_id)
         return True
     
     @staticmethod
@@ -327,62 +402,82 @@ class GroupService:
         
         db.commit()
         db.refresh(user_group)
+        group_permission_cache.invalidate_user(db, user_id)
         return user_group
     
     @staticmethod
     def get_group_stats(db: Session, group_id: str) -> Dict[str, Any]:
         """Retorna estatísticas de um grupo"""
-        group = GroupService.get_group(db, group_id)
-        
-        # Contar membros por papel
-        member_stats = db.query(
+        stats = GroupService.get_groups_stats(db, [group_id])
+        if not stats:
+            raise NotFoundException(f"Grupo com ID {group_id} não encontrado")
+        return stats[str(uuid.UUID(group_id))]
+    
+    @staticmethod
+    def get_groups_stats(db: Session, group_ids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Retorna estatísticas de vários grupos ativos em uma única consulta
+        
+        Os membros são agregados por (grupo, papel, ativo) em um LEFT JOIN com groups, de
+        modo que dados do grupo, distribuição de papéis e contagem de ativos/inativos vêm
+        juntos. Grupos inexistentes ou inativos são omitidos do resultado.
+        
+        Returns:
+            Dict[str, Dict[str, Any]]: Estatísticas indexadas pelo ID do grupo
+        """
+        ids = [uuid.UUID(str(group_id)) for group_id in group_ids]
+        if not ids:
+            return {}
+        
+        group_columns = (Group.id, Group.nome, Group.data_criacao, Group.data_atualizacao)
+        rows = db.query(
+            *group_columns,
             UserGroupRole.role,
+            UserGroupRole.ativo,
             func.count(UserGroupRole.id).label('count')
+        ).outerjoin(
+            UserGroupRole, UserGroupRole.group_id == Group.id
         ).filter(
             and_(
-                UserGroupRole.group_id == uuid.UUID(group_id),
-                UserGroupRole.ativo == True
-            )
-        ).group_by(UserGroupRole.role).all()
-        
-        # Contar total de membros
-        total_members = sum(stat.count for stat in member_stats)
-        
-        # Contar membros ativos vs inativos
-        active_members = db.query(UserGroupRole).filter(
-            and_(
-                UserGroupRole.group_id == uuid.UUID(group_id),
-                UserGroupRole.ativo == True
-            )
-        ).count()
-        
-        inactive_members = db.query(UserGroupRole).filter(
-            and_(
-                UserGroupRole.group_id == uuid.UUID(group_id),
-                UserGroupRole.ativo == False
+                Group.id.in_(ids),
+                Group.ativo == True
             )
-        ).count()
-        
-        # Estatísticas por papel
-        roles_stats = {}
-        for stat in member_stats:
-            roles_stats[stat.role] = stat.count
-        
-        return {
-            "group_id": str(group.id),
-            "group_name": group.nome,
-            "total_members": total_members,
-            "active_members": active_members,
-            "inactive_members": inactive_members,
-            "roles_distribution": roles_stats,
-            "created_at": group.data_criacao.isoformat() if group.data_criacao else None,
-            "updated_at": group.data_atualizacao.isoformat() if group.data_atualizacao else None
-        }
+        ).group_by(*group_columns, UserGroupRole.role, UserGroupRole.ativo).all()
+        
+        stats: Dict[str, Dict[str, Any]] = {}
+        for row in rows:
+            group_stats = stats.get(str(row.id))
+            if group_stats is None:
+                group_stats = stats[str(row.id)] = {
+                    "group_id": str(row.id),
+                    "group_name": row.nome,
+                    "total_members": 0,
+                    "active_members": 0,
+                    "inactive_members": 0,
+                    "roles_distribution": {},
+                    "created_at": row.data_criacao.isoformat() if row.data_criacao else None,
+                    "updated_at": row.data_atualizacao.isoformat() if row.data_atualizacao else None
+                }
+            
+            # Grupo sem membros: o LEFT JOIN traz uma linha com papel nulo
+            if row.role is None:
+                continue
+            
+            # Total e distribuição por papel consideram apenas membros ativos
+            if row.ativo is True:
+                group_stats["active_members"] += row.count
+                group_stats["total_members"] += row.count
+                group_stats["roles_distribution"][row.role] = row.count
+            elif row.ativo is False:
+                group_stats["inactive_members"] += row.count
+        
+        # Mesma ordem dos IDs recebidos
+        return {str(group_id): stats[str(group_id)] for group_id in ids if str(group_id) in stats}
     
     @staticmethod
     def get_user_groups(db: Session, user_id: str) -> List[Dict[str, Any]]:
         """Retorna todos os grupos de um usuário"""
-        user_groups = db.query(UserGroupRole).filter(
+        user_groups = db.query(UserGroupRole).options(joinedload(UserGroupRole.grupo)).filter(
             and_(
                 UserGroupRole.user_id == uuid.UUID(user_id),
                 UserGroupRole.ativo == True
@@ -399,6 +494,16 @@ class GroupService:
         
         return result
     
+    @staticmethod
+    def get_permission_map(db: Session, user_id: str) -> Dict[str, int]:
+        """
+        Retorna {group_id: nível do papel} do usuário em todos os seus grupos ativos
+        
+        Uma consulta por usuário, memorizada na requisição e por alguns segundos entre
+        requisições (services/permission_cache.py).
+        """
+        return group_permission_cache.get(db, user_id)
+    
     @staticmethod
     def check_user_permission(
         db: Session,
@@ -407,25 +512,10 @@ class GroupService:
         required_role: str = "member"
     ) -> bool:
         """Verifica se usuário tem permissão no grupo"""
-        user_group = db.query(UserGroupRole).filter(
-            and_(
-                UserGroupRole.user_id == uuid.UUID(user_id),
-                UserGroupRole.group_id == uuid.UUID(group_id),
-                UserGroupRole.ativo == True
-            )
-        ).first()
+        levels = GroupService.get_permission_map(db, user_id)
+        user_role_level = levels.get(str(_parse_uuid(group_id, "grupo")))
         
-        if not user_group:
+        if user_role_level is None:
             return False
         
-        # Hierarquia de papéis
-        role_hierarchy = {
-            "admin": 3,
-            "moderator": 2,
-            "member": 1
-        }
-        
-        user_role_level = role_hierarchy.get(user_group.role, 0)
-        required_role_level = role_hierarchy.get(required_role, 0)
-        
-        return user_role_level >= required_role_level 
\ No newline at end of file
+        return user_role_level >= role_level(required_role)
@@ -12,7 +12,7 @@ Serviço de Notificações - Gerenciamento completo de notificações
 from datetime import datetime, timedelta
 from typing import List, Optional, Dict, Any
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_, func, desc
+from sqlalchemy import and_, or_, func, desc, update, insert, select, cast, literal, String
 import uuid
 import logging
 
@@ -23,9 +23,12 @@ from ..models.notification import (
     Notification, 
     NotificationStats
 )
+from ..models.user import UserGroupRole
 from ..core.enums import NotificationType, UserProfile
 from ..core.exceptions import NotFoundException, ValidationError, NotificationError
 from ..core.db import SessionLocal
+from ..utils.pagination import paginate_keyset
+from .stats_cache import dashboard_stats_cache, notification_snapshot
 
 logger = logging.getLogger(__name__)
 
@@ -34,15 +37,41 @@ class NotificationService:
     
     def __init__(self, db: Optional[Session] = None):
         """Inicializa o serviço com sessão do banco"""
+        # Só fecha no __exit__ a sessão que o próprio serviço abriu
+        self._owns_db = db is None
         self.db = db or SessionLocal()
     
     def __enter__(self):
         return self
     
     def __exit__(self, exc_type, exc_val, exc_tb):
-        if not self.db:
+        if self._owns_db:
             self.db.close()
     
+    @staticmethod
+    def _generate_notification_id() -> str:
+        """Gera ID único para notificação"""
+        return f"notif_{uuid.uuid4().hex[:12]}"
+    
+    @staticmethod
+    def _build_values(notification_data: NotificationCreate, now: datetime) -> Dict[str, Any]:
+        """Monta os valores da linha de uma notificação"""
+        return {
+            "id": NotificationService._generate_notification_id(),
+            "tipo": notification_data.tipo.value,
+            "titulo": notification_data.titulo,
+            "mensagem": notification_data.mensagem,
+            "destinatario_id": notification_data.destinatario_id,
+            "remetente_id": notification_data.remetente_id,
+            "prioridade": notification_data.prioridade,
+            "categoria": notification_data.categoria,
+            "dados_extras": notification_data.dados_extras,
+            "lida": False,
+            "ativo": True,
+            "data_criacao": now,
+            "data_atualizacao": now
+        }
+    
     def create_notification(self, notification_data: NotificationCreate) -> Notification:
         """
         Cria uma nova notificação
@@ -58,40 +87,161 @@ class NotificationService:
             NotificationError: Se houver erro na criação
         """
         try:
-            # Gera ID único
-            notification_id = f"notif_{uuid.uuid4().hex[:12]}"
-            
-            # Cria instância do banco
-            db_notification = NotificationDB(
-                id=notification_id,
-                tipo=notification_data.tipo.value,
-                titulo=notification_data.titulo,
-                mensagem=notification_data.mensagem,
-                destinatario_id=notification_data.destinatario_id,
-                remetente_id=notification_data.remetente_id,
-                prioridade=notification_data.prioridade,
-                categoria=notification_data.categoria,
-                dados_extras=notification_data.dados_extras,
-                data_criacao=datetime.utcnow(),
-                data_atualizacao=datetime.utcnow()
-            )
+            db_notification = NotificationDB(**self._build_values(notification_data, datetime.utcnow()))
+            notification_id = db_notification.id
             
             # Salva no banco
             self.db.add(db_notification)
-            self.db.commit()
-            self.db.refresh(db_notification)
+            with dashboard_stats_cache.writing():
+                self.db.commit()
+                self.db.refresh(db_notification)
+                dashboard_stats_cache.apply_notification_change(None, notification_snapshot(db_notification))
             
             # Converte para modelo Pydantic
             notification = Notification.from_orm(db_notification)
             
-            logger.info(f"✅ Notificação criada: {notification_id}")
+            logger.info("✅ Notificação criada: %s", notification_id)
             return notification
             
         except Exception as e:
             self.db.rollback()
-            logger.error(f"❌ Erro ao criar notificação: {e}")
+            logger.error("❌ Erro ao criar notificação: %s", e)
             raise NotificationError(f"Erro ao criar notificação: {str(e)}")
     
+    def create_notifications_bulk(self, notifications: List[NotificationCreate]) -> List[Notification]:
+        """
+        Cria várias notificações com um INSERT multi-linha e um único commit
+        
+        Args:
+            notifications: Dados das notificações (destinatários podem ser diferentes)
+            
+        Returns:
+            List[Notification]: Notificações criadas, na mesma ordem
+            
+        Raises:
+            NotificationError: Se houver erro na criação (nenhuma é gravada)
+        """
+        if not notifications:
+            return []
+        
+        try:
+            now = datetime.utcnow()
+            rows = [self._build_values(notification_data, now) for notification_data in notifications]
+            
+            # executemany com insertmanyvalues: INSERT ... VALUES (...), (...) em lotes
+            created = [NotificationDB(**row) for row in rows]
+            with dashboard_stats_cache.writing():
+                self.db.execute(insert(NotificationDB), rows)
+                self.db.commit()
+                for db_notification in created:
+                    dashboard_stats_cache.apply_notification_change(None, notification_snapshot(db_notification))
+            
+            logger.info("✅ %s notificações criadas em lote", len(created))
+            return [Notification.from_orm(db_notification) for db_notification in created]
+            
+        except Exception as e:
+            self.db.rollback()
+            logger.error("❌ Erro ao criar notificações em lote: %s", e)
+            raise NotificationError(f"Erro ao criar notificações em lote: {str(e)}")
+    
+    def notify_group(
+        self,
+        group_id: str,
+        titulo: str,
+        mensagem: str,
+        notification_type: NotificationType = NotificationType.SYSTEM_ALERT,
+        remetente_id: Optional[str] = None,
+        prioridade: str = "normal",
+        categoria: Optional[str] = "sistema",
+        dados_extras: Optional[Dict[str, Any]] = None,
+        roles: Optional[List[str]] = None,
+        exclude_user_ids: Optional[List[str]] = None
+    ) -> int:
+        """
+        Envia a mesma notificação a todos os membros ativos de um grupo
+        
+        Executa um único INSERT ... SELECT a partir de user_group_roles (sem buscar os
+        membros no Python), com RETURNING apenas dos destinatários para atualizar o
+        cache de estatísticas.
+        
+        Args:
+            group_id: ID do grupo
+            titulo: Título da notificação
+            mensagem: Mensagem da notificação
+            notification_type: Tipo da notificação
+            remetente_id: ID do remetente (None para sistema)
+            prioridade: Prioridade da notificação
+            categoria: Categoria da notificação
+            dados_extras: Dados extras
+            roles: Restringe aos papéis informados (ex.: ["admin", "owner"])
+            exclude_user_ids: Membros que não devem receber (ex.: o próprio remetente)
+            
+        Returns:
+            int: Número de notificações criadas
+        """
+        try:
+            now = datetime.utcnow()
+            member_id = cast(UserGroupRole.user_id, String)
+            
+            # Membros distintos (um usuário pode ter mais de um papel ativo no grupo)
+            members = select(member_id.label("user_id")).where(
+                UserGroupRole.group_id == uuid.UUID(str(group_id)),
+                UserGroupRole.ativo == True
+            ).distinct()
+            if roles:
+                members = members.where(UserGroupRole.role.in_(roles))
+            if exclude_user_ids:
+                members = members.where(~member_id.in_([str(user_id) for user_id in exclude_user_ids]))
+            members = members.subquery()
+            
+            rows = select(
+                # ID no mesmo formato de _generate_notification_id, gerado no banco
+                func.concat("notif_", func.substr(func.md5(func.concat(members.c.user_id, func.random())), 1, 12)),
+                literal(notification_type.value),
+                literal(titulo),
+                literal(mensagem),
+                members.c.user_id,
+                literal(remetente_id, String),
+                literal(prioridade),
+                literal(categoria, String),
+                cast(literal(dados_extras or {}, NotificationDB.dados_extras.type), NotificationDB.dados_extras.type),
+                literal(False),
+                literal(True),
+                literal(now),
+                literal(now)
+            )
+            
+            result = self.db.execute(
+                insert(NotificationDB)
+                .from_select(
+                    ["id", "tipo", "titulo", "mensagem", "destinatario_id", "remetente_id",
+                     "prioridade", "categoria", "dados_extras", "lida", "ativo",
+                     "data_criacao", "data_atualizacao"],
+                    rows
+                )
+                .returning(NotificationDB.destinatario_id)
+            )
+            recipients = [row.destinatario_id for row in result]
+            with dashboard_stats_cache.writing():
+                self.db.commit()
+                for destinatario_id in recipients:
+                    dashboard_stats_cache.apply_notification_change(None, {
+                        "ativo": True,
+                        "lida": False,
+                        "data_criacao": now,
+                        "prioridade": prioridade,
+                        "tipo": notification_type.value,
+                        "destinatario_id": str(destinatario_id)
+                    })
+            
+            logger.info("✅ %s notificações enviadas ao grupo %s", len(recipients), group_id)
+            return len(recipients)
+            
+        except Exception as e:
+            self.db.rollback()
+            logger.error("❌ Erro ao notificar grupo %s: %s", group_id, e)
+            raise NotificationError(f"Erro ao notificar grupo: {str(e)}")
+    
     def get_notification(self, notification_id: str) -> Notification:
         """
         Busca uma notificação por ID
@@ -139,38 +289,71 @@ class NotificationService:
             List[Notification]: Lista de notificações
         """
         try:
-            # Query base
-            query = self.db.query(NotificationDB).filter(
-                NotificationDB.destinatario_id == user_id,
-                NotificationDB.ativo == True
-            )
-            
-            # Filtros adicionais
-            if unread_only:
-                query = query.filter(NotificationDB.lida == False)
-            
-            if notification_type:
-                query = query.filter(NotificationDB.tipo == notification_type.value)
-            
-            # Ordenação por data de criação (mais recentes primeiro)
-            query = query.order_by(desc(NotificationDB.data_criacao))
-            
-            # Paginação
-            query = query.offset(offset).limit(limit)
-            
-            # Executa query
-            db_notifications = query.all()
-            
-            # Converte para modelos Pydantic
-            notifications = [Notification.from_orm(n) for n in db_notifications]
-            
-            logger.info(f"📋 Buscadas {len(notifications)} notificações para usuário {user_id}")
-            return notifications
-            
+            return self.get_user_notifications_page(
+                user_id, profile, limit=limit, offset=offset,
+                unread_only=unread_only, notification_type=notification_type
+            )["items"]
         except Exception as e:
-            logger.error(f"❌ Erro ao buscar notificações: {e}")
+            logger.error("❌ Erro ao buscar notificações: %s", e)
             return []
     
+    def get_user_notifications_page(
+        self,
+        user_id: str,
+        profile: UserProfile,
+        limit: int = 50,
+        offset: int = 0,
+        unread_only: bool = False,
+        notification_type: Optional[NotificationType] = None,
+        cursor: Optional[str] = None,
+        include_total: bool = False
+    ) -> Dict[str, Any]:
+        """
+        Busca notificações de um usuário paginando por cursor (data_criacao, id) ou offset
+        
+        Args:
+            user_id: ID do usuário
+            profile: Perfil do usuário para adaptação
+            limit: Limite de resultados
+            offset: Offset usado quando não há cursor
+            unread_only: Apenas não lidas
+            notification_type: Tipo específico de notificação
+            cursor: Cursor retornado pela página anterior
+            include_total: Se deve contar o total de notificações do filtro
+            
+        Returns:
+            Dict[str, Any]: items (List[Notification]), next_cursor e total
+        """
+        # Query base
+        query = self.db.query(NotificationDB).filter(
+            NotificationDB.destinatario_id == user_id,
+            NotificationDB.ativo == True
+        )
+        
+        # Filtros adicionais
+        if unread_only:
+            query = query.filter(NotificationDB.lida == False)
+        
+        if notification_type:
+            query = query.filter(NotificationDB.tipo == notification_type.value)
+        
+        total = query.count() if include_total else None
+        
+        # Ordenação por data de criação (mais recentes primeiro) e paginação
+        db_notifications, next_cursor = paginate_keyset(
+            query, NotificationDB.data_criacao, NotificationDB.id, limit, cursor=cursor, offset=offset
+        )
+        
+        # Converte para modelos Pydantic
+        notifications = [Notification.from_orm(n) for n in db_notifications]
+        
+        logger.info("📋 Buscadas %s notificações para usuário %s", len(notifications), user_id)
+        return {
+            "items": notifications,
+            "next_cursor": next_cursor,
+            "total": total
+        }
+    
     def mark_as_read(self, notification_id: str, user_id: str) -> Notification:
         """
         Marca uma notificação como lida
@@ -200,23 +383,27 @@ class NotificationService:
             if db_notification.destinatario_id != user_id:
                 raise ValidationError("Usuário não autorizado a marcar esta notificação como lida")
             
+            old_snapshot = notification_snapshot(db_notification)
+            
             # Atualiza status
             db_notification.lida = True
             db_notification.data_leitura = datetime.utcnow()
             db_notification.data_atualizacao = datetime.utcnow()
             
             # Salva no banco
-            self.db.commit()
-            self.db.refresh(db_notification)
+            with dashboard_stats_cache.writing():
+                self.db.commit()
+                self.db.refresh(db_notification)
+                dashboard_stats_cache.apply_notification_change(old_snapshot, notification_snapshot(db_notification))
             
             notification = Notification.from_orm(db_notification)
             
-            logger.info(f"✅ Notificação {notification_id} marcada como lida")
+            logger.info("✅ Notificação %s marcada como lida", notification_id)
             return notification
             
         except Exception as e:
             self.db.rollback()
-            logger.error(f"❌ Erro ao marcar notificação como lida: {e}")
+            logger.error("❌ Erro ao marcar notificação como lida: %s", e)
             raise
     
     def mark_all_as_read(self, user_id: str) -> int:
@@ -230,30 +417,29 @@ class NotificationService:
             int: Número de notificações marcadas como lidas
         """
         try:
-            # Busca notificações não lidas
-            unread_notifications = self.db.query(NotificationDB).filter(
-                NotificationDB.destinatario_id == user_id,
-                NotificationDB.lida == False,
-                NotificationDB.ativo == True
-            ).all()
-            
-            # Marca como lidas
+            # Um único UPDATE no banco (sem carregar as linhas no Python); a contagem
+            # vem do rowcount do próprio comando
             now = datetime.utcnow()
-            for notification in unread_notifications:
-                notification.lida = True
-                notification.data_leitura = now
-                notification.data_atualizacao = now
-            
-            # Salva no banco
-            self.db.commit()
-            
-            count = len(unread_notifications)
-            logger.info(f"✅ {count} notificações marcadas como lidas para usuário {user_id}")
+            result = self.db.execute(
+                update(NotificationDB)
+                .where(
+                    NotificationDB.destinatario_id == user_id,
+                    NotificationDB.lida == False,
+                    NotificationDB.ativo == True
+                )
+                .values(lida=True, data_leitura=now, data_atualizacao=now)
+                .execution_options(synchronize_session=False)
+            )
+            with dashboard_stats_cache.writing():
+                self.db.commit()
+                count = result.rowcount
+                dashboard_stats_cache.apply_notifications_read(user_id, count)
+            logger.info("✅ %s notificações marcadas como lidas para usuário %s", count, user_id)
             return count
             
         except Exception as e:
             self.db.rollback()
-            logger.error(f"❌ Erro ao marcar notificações como lidas: {e}")
+            logger.error("❌ Erro ao marcar notificações como lidas: %s", e)
             return 0
     
     def update_notification(self, notification_id: str, update_data: NotificationUpdate) -> Notification:
@@ -280,6 +466,8 @@ class NotificationService:
             if not db_notification:
                 raise NotFoundException(f"Notificação {notification_id} não encontrada")
             
+            old_snapshot = notification_snapshot(db_notification)
+            
             # Atualiza campos fornecidos
             update_dict = update_data.dict(exclude_unset=True)
             for field, value in update_dict.items():
@@ -289,17 +477,19 @@ class NotificationService:
             db_notification.data_atualizacao = datetime.utcnow()
             
             # Salva no banco
-            self.db.commit()
-            self.db.refresh(db_notification)
+            with dashboard_stats_cache.writing():
+                self.db.commit()
+                self.db.refresh(db_notification)
+                dashboard_stats_cache.apply_notification_change(old_snapshot, notification_snapshot(db_notification))
             
             notification = Notification.from_orm(db_notification)
             
-            logger.info(f"✅ Notificação {notification_id} atualizada")
+            logger.info("✅ Notificação %s atualizada", notification_id)
             return notification
             
         except Exception as e:
             self.db.rollback()
-            logger.error(f"❌ Erro ao atualizar notificação: {e}")
+            logger.error("❌ Erro ao atualizar notificação: %s", e)
             raise
     
     def delete_notification(self, notification_id: str, user_id: str) -> bool:
@@ -331,19 +521,23 @@ class NotificationService:
             if db_notification.destinatario_id != user_id:
                 raise ValidationError("Usuário não autorizado a deletar esta notificação")
             
+            old_snapshot = notification_snapshot(db_notification)
+            
             # Soft delete
             db_notification.ativo = False
             db_notification.data_atualizacao = datetime.utcnow()
             
             # Salva no banco
-            self.db.commit()
+            with dashboard_stats_cache.writing():
+                self.db.commit()
+                dashboard_stats_cache.apply_notification_change(old_snapshot, notification_snapshot(db_notification))
             
-            logger.info(f"✅ Notificação {notification_id} deletada")
+            logger.info("✅ Notificação %s deletada", notification_id)
             return True
             
         except Exception as e:
             self.db.rollback()
-            logger.error(f"❌ Erro ao deletar notificação: {e}")
+            logger.error("❌ Erro ao deletar notificação: %s", e)
             raise
     
     def get_notification_stats(self, user_id: str, profile: UserProfile) -> NotificationStats:
@@ -415,11 +609,11 @@ class NotificationService:
                 notificacoes_por_tipo=notificacoes_por_tipo
             )
             
-            logger.info(f"📊 Estatísticas de notificações geradas para usuário {user_id}")
+            logger.info("📊 Estatísticas de notificações geradas para usuário %s", user_id)
             return stats
             
         except Exception as e:
-            logger.error(f"❌ Erro ao gerar estatísticas: {e}")
+            logger.error("❌ Erro ao gerar estatísticas: %s", e)
             # Retorna estatísticas vazias em caso de erro
             return NotificationStats()
     
@@ -0,0 +1,84 @@
+"""
+Cache de permissões em grupos
+
+@fileoverview Mapa de permissões por usuário do DOM v1
+@directory domcore/services
+@description Resolve em uma única consulta o mapa {group_id: nível do papel} de um usuário e o
+             memoriza na sessão da requisição (Session.info) e, por poucos segundos, entre
+             requisições; alterações de membros invalidam o usuário afetado
+@created 2024-12-19
+@lastModified 2024-12-19
+@author Equipe DOM v1
+"""
+
+import uuid
+from typing import Dict
+from sqlalchemy.orm import Session
+
+from ..core.cache import TTLCache
+from ..core.config import config
+from ..models.user import UserGroupRole
+
+# Hierarquia de papéis
+ROLE_HIERARCHY = {
+    "admin": 3,
+    "moderator": 2,
+    "member": 1
+}
+
+# Chave do memo por requisição em Session.info (cada requisição usa sua própria sessão)
+_SESSION_INFO_KEY = "group_permissions"
+
+
+def role_level(role: str) -> int:
+    """Nível numérico de um papel (0 para papéis desconhecidos)"""
+    return ROLE_HIERARCHY.get(role, 0)
+
+
+class GroupPermissionCache:
+    """Cache TTL de {group_id: nível} indexado pelo ID do usuário"""
+
+    def __init__(self, ttl: float, maxsize: int):
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+
+    @staticmethod
+    def load(db: Session, user_id: str) -> Dict[str, int]:
+        """Busca no banco os papéis ativos do usuário em todos os grupos"""
+        rows = db.query(UserGroupRole.group_id, UserGroupRole.role).filter(
+            UserGroupRole.user_id == uuid.UUID(str(user_id)),
+            UserGroupRole.ativo == True
+        ).all()
+        levels: Dict[str, int] = {}
+        for group_id, role in rows:
+            key = str(group_id)
+            levels[key] = max(levels.get(key, 0), role_level(role))
+        return levels
+
+    def get(self, db: Session, user_id: str) -> Dict[str, int]:
+        """Retorna o mapa do memo da requisição, do cache ou, em caso de falta, do banco"""
+        user_id = str(user_id)
+        memo = db.info.setdefault(_SESSION_INFO_KEY, {})
+        levels = memo.get(user_id)
+        if levels is None:
+            levels = self._cache.get(user_id)
+            if levels is None:
+                levels = self.load(db, user_id)
+                self._cache.set(user_id, levels)
+            memo[user_id] = levels
+        return levels
+
+    def invalidate_user(self, db: Session, user_id: str) -> None:
+        """Descarta o mapa do usuário (após adicionar, remover ou alterar papel de membro)"""
+        user_id = str(user_id)
+        db.info.get(_SESSION_INFO_KEY, {}).pop(user_id, None)
+        self._cache.pop(user_id)
+
+    def clear(self) -> None:
+        self._cache.clear()
+
+
+# Instância global do cache
+group_permission_cache = GroupPermissionCache(
+    ttl=config.cache.group_permission_ttl_seconds,
+    maxsize=config.cache.group_permission_max_entries
+)
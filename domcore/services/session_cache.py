@@ -0,0 +1,78 @@
+"""
+Cache de contexto de sessão
+
+@fileoverview Cache write-through do contexto ativo das sessões do DOM v1
+@directory domcore/services
+@description Mantém em memória o grupo/papel ativo de cada sessão, indexado pelo hash do token,
+             para que /api/auth/session/context não consulte user_sessions a cada navegação
+@created 2024-12-19
+@lastModified 2024-12-19
+@author Equipe DOM v1
+"""
+
+import uuid
+import hashlib
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Optional
+
+from ..core.cache import TTLCache
+from ..core.config import config
+
+
+@dataclass(frozen=True)
+class SessionContext:
+    """Contexto ativo de uma sessão"""
+
+    user_id: uuid.UUID
+    active_context_group_id: Optional[uuid.UUID]
+    active_context_role: Optional[str]
+
+
+class SessionContextCache:
+    """
+    Cache LRU/TTL de SessionContext indexado por sha256(token)
+
+    Write-through: o login e a troca de contexto gravam no banco e em seguida no cache do
+    processo que atendeu a requisição. Com vários workers os demais não veem a troca, então a
+    entrada vive no máximo `ttl` segundos (e nunca além da sessão) antes de reler o banco.
+    O token em si não fica guardado em memória.
+    """
+
+    def __init__(self, ttl: float, maxsize: int):
+        self._ttl = ttl
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+
+    @staticmethod
+    def _key(token: str) -> str:
+        return hashlib.sha256(token.encode()).hexdigest()
+
+    def get(self, token: str) -> Optional[SessionContext]:
+        return self._cache.get(self._key(token))
+
+    def set(self, token: str, context: SessionContext, expires_at: Optional[datetime]) -> None:
+        """Grava o contexto por até `ttl` segundos, limitado à expiração da sessão (sessões já expiradas não são guardadas)"""
+        ttl = self._ttl
+        if expires_at:
+            ttl = min(ttl, (expires_at - datetime.utcnow()).total_seconds())
+        if ttl <= 0:
+            return
+        self._cache.set(self._key(token), context, ttl=ttl)
+
+    def invalidate(self, token: str) -> None:
+        self._cache.pop(self._key(token))
+
+    def invalidate_user(self, user_id: str) -> None:
+        """Descarta todas as sessões de um usuário"""
+        user_id = str(user_id)
+        self._cache.pop_matching(lambda key, context: str(context.user_id) == user_id)
+
+    def clear(self) -> None:
+        self._cache.clear()
+
+
+# Instância global do cache
+session_context_cache = SessionContextCache(
+    ttl=config.cache.session_context_ttl_seconds,
+    maxsize=config.cache.session_context_max_entries
+)
@@ -0,0 +1,97 @@
+"""
+Limpeza de sessões expiradas
+
+@fileoverview Reaper de sessões do DOM v1
+@directory domcore/services
+@description Remove periodicamente, em lotes, as linhas de user_sessions cujo token já expirou,
+             mantendo a tabela (e os índices usados em /api/auth/session/context) enxuta
+@created 2024-12-19
+@lastModified 2024-12-19
+@author Equipe DOM v1
+"""
+
+import asyncio
+import logging
+from datetime import datetime
+from typing import Optional
+from sqlalchemy import delete, select
+
+from ..core.config import config
+from ..core.db import AsyncSessionLocal
+from ..models.user import UserSession
+
+logger = logging.getLogger(__name__)
+
+
+class SessionReaper:
+    """Tarefa de fundo que apaga sessões expiradas em lotes (uma transação curta por lote)"""
+
+    def __init__(self, interval_seconds: float, batch_size: int):
+        self.interval_seconds = interval_seconds
+        self.batch_size = batch_size
+        self._task: Optional[asyncio.Task] = None
+
+    async def purge_expired(self, now: Optional[datetime] = None) -> int:
+        """
+        Apaga as sessões com expires_at no passado
+
+        Cada lote é um DELETE ... WHERE id IN (SELECT id ... LIMIT n) guiado pelo índice de
+        expires_at, para não segurar locks de muitas linhas nem inflar o WAL de uma vez.
+
+        Returns:
+            int: Total de sessões removidas
+        """
+        now = now or datetime.utcnow()
+        expired_ids = (
+            select(UserSession.id)
+            .where(UserSession.expires_at < now)
+            .limit(self.batch_size)
+            .scalar_subquery()
+        )
+        total = 0
+        async with AsyncSessionLocal() as db:
+            while True:
+                result = await db.execute(
+                    delete(UserSession)
+                    .where(UserSession.id.in_(expired_ids))
+                    .execution_options(synchronize_session=False)
+                )
+                await db.commit()
+                total += result.rowcount
+                if result.rowcount < self.batch_size:
+                    return total
+                # Cede o event loop entre lotes
+                await asyncio.sleep(0)
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                removed = await self.purge_expired()
+                if removed:
+                    logger.info("🧹 %s sessões expiradas removidas", removed)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error("❌ Erro ao remover sessões expiradas: %s", e)
+            await asyncio.sleep(self.interval_seconds)
+
+    def start(self) -> None:
+        """Agenda a limpeza periódica no event loop atual"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+# Instância global do reaper
+session_reaper = SessionReaper(
+    interval_seconds=config.security.session_reaper_interval_seconds,
+    batch_size=config.security.session_reaper_batch_size
+)
@@ -0,0 +1,318 @@
+"""
+Cache de estatísticas do dashboard
+
+@fileoverview Cache de estatísticas do dashboard mantido por deltas (DOM v1)
+@directory domcore/services
+@description Mantém contadores de tarefas e notificações por escopo de usuário em memória,
+             atualizados por deltas pelos serviços de escrita deste processo; o TTL curto
+             limita o atraso das escritas de outros processos (worker de consultas, outros
+             workers do uvicorn)
+@created 2024-12-19
+@lastModified 2024-12-19
+@author Equipe DOM v1
+"""
+
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timedelta, date
+from typing import Dict, Any, Callable, Iterator, Optional, Tuple, Iterable
+from sqlalchemy.orm import Session
+
+from ..core.cache import TTLCache
+from ..core.config import config
+from ..core.enums import UserProfile, TaskStatus
+from ..models.task import TaskDB, TaskStats
+from ..models.notification import NotificationDB, NotificationStats
+from .dashboard_service import DashboardService
+
+# Campos de contagem de TaskStats
+TASK_COUNTERS = (
+    "total_tarefas", "tarefas_pendentes", "tarefas_em_andamento", "tarefas_concluidas",
+    "tarefas_atrasadas", "tarefas_hoje", "tarefas_semana"
+)
+
+
+def task_snapshot(task: Optional[TaskDB]) -> Optional[Dict[str, Any]]:
+    """Captura os campos de uma tarefa que influenciam as estatísticas"""
+    if task is None:
+        return None
+    return {
+        "ativo": bool(task.ativo),
+        "status": task.status,
+        "data_limite": task.data_limite,
+        "criador_id": str(task.criador_id) if task.criador_id else None,
+        "responsavel_id": str(task.responsavel_id) if task.responsavel_id else None
+    }
+
+
+def notification_snapshot(notification: Optional[NotificationDB]) -> Optional[Dict[str, Any]]:
+    """Captura os campos de uma notificação que influenciam as estatísticas"""
+    if notification is None:
+        return None
+    return {
+        "ativo": bool(notification.ativo),
+        "lida": bool(notification.lida),
+        "data_criacao": notification.data_criacao,
+        "prioridade": notification.prioridade,
+        "tipo": notification.tipo,
+        "destinatario_id": str(notification.destinatario_id)
+    }
+
+
+def _in_week(value: Optional[datetime], hoje: date) -> bool:
+    return value is not None and hoje <= value.date() <= hoje + timedelta(days=7)
+
+
+def _task_counters(snapshot: Optional[Dict[str, Any]], hoje: date) -> Dict[str, int]:
+    """Contribuição de uma tarefa para cada contador (mesma semântica de query_task_stats)"""
+    if not snapshot or not snapshot["ativo"]:
+        return {}
+    status = snapshot["status"]
+    data_limite = snapshot["data_limite"]
+    return {
+        "total_tarefas": 1,
+        "tarefas_pendentes": int(status == TaskStatus.PENDING),
+        "tarefas_em_andamento": int(status == TaskStatus.IN_PROGRESS),
+        "tarefas_concluidas": int(status == TaskStatus.COMPLETED),
+        "tarefas_atrasadas": int(
+            data_limite is not None and data_limite.date() < hoje and status != TaskStatus.COMPLETED
+        ),
+        "tarefas_hoje": int(data_limite is not None and data_limite.date() == hoje),
+        "tarefas_semana": int(_in_week(data_limite, hoje))
+    }
+
+
+def _notification_counters(snapshot: Optional[Dict[str, Any]], hoje: date) -> Dict[str, int]:
+    """Contribuição de uma notificação para cada contador (mesma semântica de query_notification_stats)"""
+    if not snapshot or not snapshot["ativo"]:
+        return {}
+    data_criacao = snapshot["data_criacao"]
+    return {
+        "total_notificacoes": 1,
+        "notificacoes_nao_lidas": int(not snapshot["lida"]),
+        "notificacoes_hoje": int(data_criacao is not None and data_criacao.date() == hoje),
+        "notificacoes_semana": int(_in_week(data_criacao, hoje)),
+        "notificacoes_urgentes": int(snapshot["prioridade"] == "urgente")
+    }
+
+
+def _copy_counters(counters: Dict[str, Any]) -> Dict[str, Any]:
+    copy = dict(counters)
+    if "notificacoes_por_tipo" in copy:
+        copy["notificacoes_por_tipo"] = dict(copy["notificacoes_por_tipo"])
+    return copy
+
+
+class DashboardStatsCache:
+    """
+    Cache por usuário das estatísticas do dashboard
+
+    As entradas são criadas com uma única consulta agregada e depois mantidas por deltas
+    enviados pelos serviços de escrita, de modo que uma leitura custa O(1). Contadores que
+    dependem da data (atrasadas, hoje, semana) são recalculados quando o dia muda ou o TTL expira.
+
+    Escritas de outros processos não chegam aqui: o TTL (curto) limita quanto tempo ficam
+    invisíveis. Dentro do processo, cada escrita roda em `writing()` do commit até o delta;
+    uma falta só grava o resultado se nenhuma escrita estava em andamento durante a consulta
+    (contador de geração), senão o delta seria perdido ou contado duas vezes.
+    """
+
+    def __init__(self, ttl: float, maxsize: int):
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+        self._lock = threading.Lock()
+        self._generation = 0
+        self._writes_in_flight = 0
+
+    # ------------------------------------------------------------------
+    # Escopos
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def task_scope(user_id: str, profile: UserProfile) -> Tuple[str, ...]:
+        """Escopo de tarefas visto pelo perfil (mesmos filtros de query_task_stats)"""
+        if profile == UserProfile.EMPREGADOR:
+            return ("tasks", "criador", str(user_id))
+        if profile == UserProfile.EMPREGADO:
+            return ("tasks", "responsavel", str(user_id))
+        if profile == UserProfile.FAMILIAR:
+            return ("tasks", "envolvido", str(user_id))
+        # Demais perfis compartilham o escopo de todas as tarefas ativas
+        return ("tasks", "todas")
+
+    @staticmethod
+    def notification_scope(user_id: str) -> Tuple[str, ...]:
+        return ("notifications", str(user_id))
+
+    @staticmethod
+    def _task_scopes_for(snapshot: Optional[Dict[str, Any]]) -> Iterable[Tuple[str, ...]]:
+        """Escopos cujos contadores incluem a tarefa"""
+        if not snapshot:
+            return []
+        scopes = {("tasks", "todas")}
+        if snapshot["criador_id"]:
+            scopes.add(("tasks", "criador", snapshot["criador_id"]))
+            scopes.add(("tasks", "envolvido", snapshot["criador_id"]))
+        if snapshot["responsavel_id"]:
+            scopes.add(("tasks", "responsavel", snapshot["responsavel_id"]))
+            scopes.add(("tasks", "envolvido", snapshot["responsavel_id"]))
+        return scopes
+
+    # ------------------------------------------------------------------
+    # Leitura
+    # ------------------------------------------------------------------
+
+    def _get_counters(self, scope: Tuple[str, ...], compute: Callable[[], Any]) -> Dict[str, Any]:
+        """Cópia dos contadores do escopo (os deltas alteram a entrada sob o lock)"""
+        hoje = datetime.utcnow().date()
+        with self._lock:
+            entry = self._cache.get(scope)
+            if entry is not None and entry["hoje"] == hoje:
+                return _copy_counters(entry["counters"])
+            generation = None if self._writes_in_flight else self._generation
+        counters = compute().dict()
+        if generation is not None:
+            with self._lock:
+                if self._generation == generation:
+                    self._cache.set(scope, {"hoje": hoje, "counters": _copy_counters(counters)})
+        return counters
+
+    def get_task_stats(self, db: Session, user_id: str, profile: UserProfile) -> TaskStats:
+        """Estatísticas de tarefas do cache, consultando o banco apenas em caso de falta"""
+        counters = self._get_counters(
+            self.task_scope(user_id, profile),
+            lambda: DashboardService(db).query_task_stats(str(user_id), profile)
+        )
+        return TaskStats(**counters)
+
+    def get_notification_stats(self, db: Session, user_id: str) -> NotificationStats:
+        """Estatísticas de notificações do cache, consultando o banco apenas em caso de falta"""
+        counters = self._get_counters(
+            self.notification_scope(user_id),
+            lambda: DashboardService(db).query_notification_stats(str(user_id))
+        )
+        return NotificationStats(**counters)
+
+    def get_dashboard_stats(self, db: Session, user_id: str, profile: UserProfile) -> Dict[str, Any]:
+        """Estatísticas completas do dashboard no mesmo formato de DashboardService.get_dashboard_stats"""
+        task_stats = self.get_task_stats(db, user_id, profile)
+        notification_stats = self.get_notification_stats(db, user_id)
+        return {
+            "task_stats": task_stats.dict(),
+            "notification_stats": notification_stats.dict(),
+            "users_online": DashboardService(db)._get_users_online(profile),
+            "profile": profile.value,
+            "last_updated": datetime.utcnow().isoformat()
+        }
+
+    # ------------------------------------------------------------------
+    # Deltas enviados pelos serviços de escrita
+    # ------------------------------------------------------------------
+
+    @contextmanager
+    def writing(self) -> Iterator[None]:
+        """
+        Envolve commit + apply_* de uma escrita
+
+        Enquanto houver escrita em andamento, faltas não gravam no cache: um cálculo feito
+        depois do commit já incluiria a escrita e o delta aplicado em seguida a contaria de novo.
+        """
+        with self._lock:
+            self._writes_in_flight += 1
+            self._generation += 1
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._writes_in_flight -= 1
+                self._generation += 1
+
+    def _apply(self, scope: Tuple[str, ...], hoje: date, delta: Dict[str, int],
+               tipo_delta: Optional[Dict[str, int]] = None) -> None:
+        def apply(entry: Dict[str, Any]) -> None:
+            if entry["hoje"] != hoje:
+                return
+            counters = entry["counters"]
+            for field, value in delta.items():
+                counters[field] = max(0, counters.get(field, 0) + value)
+            for tipo, value in (tipo_delta or {}).items():
+                por_tipo = counters["notificacoes_por_tipo"]
+                por_tipo[tipo] = por_tipo.get(tipo, 0) + value
+                if por_tipo[tipo] <= 0:
+                    del por_tipo[tipo]
+        with self._lock:
+            self._generation += 1
+            self._cache.update(scope, apply)
+
+    def invalidate_scopes(self, scopes: Iterable[Tuple[str, ...]]) -> None:
+        """Descarta escopos cujo delta não pode ser calculado (recontados na próxima leitura)"""
+        with self._lock:
+            self._generation += 1
+            for scope in scopes:
+                self._cache.pop(scope)
+
+    def apply_task_change(self, old: Optional[Dict[str, Any]], new: Optional[Dict[str, Any]]) -> None:
+        """
+        Aplica a mudança de uma tarefa (snapshots antes/depois) aos escopos em cache
+
+        Args:
+            old: task_snapshot antes da alteração (None na criação)
+            new: task_snapshot depois da alteração
+        """
+        hoje = datetime.utcnow().date()
+        old_scopes = set(self._task_scopes_for(old))
+        new_scopes = set(self._task_scopes_for(new))
+        old_counters = _task_counters(old, hoje)
+        new_counters = _task_counters(new, hoje)
+
+        for scope in old_scopes | new_scopes:
+            delta = {field: 0 for field in TASK_COUNTERS}
+            if scope in old_scopes:
+                for field, value in old_counters.items():
+                    delta[field] -= value
+            if scope in new_scopes:
+                for field, value in new_counters.items():
+                    delta[field] += value
+            if any(delta.values()):
+                self._apply(scope, hoje, delta)
+
+    def apply_notification_change(self, old: Optional[Dict[str, Any]], new: Optional[Dict[str, Any]]) -> None:
+        """Aplica a mudança de uma notificação (snapshots antes/depois) ao escopo do destinatário"""
+        hoje = datetime.utcnow().date()
+        for snapshot, sign in ((old, -1), (new, 1)):
+            counters = _notification_counters(snapshot, hoje)
+            if not counters:
+                continue
+            delta = {field: sign * value for field, value in counters.items()}
+            self._apply(
+                self.notification_scope(snapshot["destinatario_id"]),
+                hoje,
+                delta,
+                {snapshot["tipo"]: sign}
+            )
+
+    def apply_notifications_read(self, user_id: str, count: Optional[int]) -> None:
+        """
+        Desconta notificações marcadas como lidas em lote (mark_all_as_read)
+
+        Sem contagem confiável (rowcount None/-1 em alguns drivers) o escopo é descartado.
+        """
+        if count is None or count < 0:
+            self.invalidate_scopes([self.notification_scope(user_id)])
+        elif count:
+            self._apply(
+                self.notification_scope(user_id),
+                datetime.utcnow().date(),
+                {"notificacoes_nao_lidas": -count}
+            )
+
+    def clear(self) -> None:
+        with self._lock:
+            self._generation += 1
+            self._cache.clear()
+
+
+# Instância global do cache
+dashboard_stats_cache = DashboardStatsCache(
+    ttl=config.cache.dashboard_stats_ttl_seconds,
+    maxsize=config.cache.dashboard_stats_max_entries
+)
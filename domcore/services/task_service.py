@@ -16,11 +16,13 @@ from sqlalchemy import and_, or_, func
 import uuid
 import logging
 
-from ..models.task import TaskDB, TaskCreate, TaskUpdate, Task, TaskStats
+from ..models.task import TaskDB, TaskCreate, TaskUpdate, Task, TaskStats, TASK_SEARCH_CONFIG
 from ..models.user import UserDB
 from ..core.enums import TaskStatus, UserProfile
 from ..core.exceptions import NotFoundException, ValidationException, PermissionException
 from ..core.messages import message_service
+from ..utils.pagination import paginate_keyset
+from .stats_cache import dashboard_stats_cache, task_snapshot
 
 logger = logging.getLogger(__name__)
 
@@ -73,15 +75,17 @@ class TaskService:
             )
             
             db.add(db_task)
-            db.commit()
-            db.refresh(db_task)
+            with dashboard_stats_cache.writing():
+                db.commit()
+                db.refresh(db_task)
+                dashboard_stats_cache.apply_task_change(None, task_snapshot(db_task))
             
-            logger.info(f"✅ Tarefa criada: {task_id} por {current_user.id}")
+            logger.info("✅ Tarefa criada: %s por %s", task_id, current_user.id)
             return Task.from_orm(db_task)
             
         except Exception as e:
             db.rollback()
-            logger.error(f"❌ Erro ao criar tarefa: {e}")
+            logger.error("❌ Erro ao criar tarefa: %s", e)
             raise
     
     @staticmethod
@@ -102,7 +106,7 @@ class TaskService:
             return Task.from_orm(task)
             
         except Exception as e:
-            logger.error(f"❌ Erro ao buscar tarefa {task_id}: {e}")
+            logger.error("❌ Erro ao buscar tarefa %s: %s", task_id, e)
             raise
     
     @staticmethod
@@ -117,6 +121,35 @@ class TaskService:
         offset: int = 0
     ) -> List[Task]:
         """Lista tarefas com filtros"""
+        return TaskService.get_tasks_page(
+            db, current_user, status=status, categoria=categoria,
+            responsavel_id=responsavel_id, criador_id=criador_id,
+            limit=limit, offset=offset
+        )["items"]
+    
+    @staticmethod
+    def get_tasks_page(
+        db: Session,
+        current_user: UserDB,
+        status: Optional[TaskStatus] = None,
+        categoria: Optional[str] = None,
+        responsavel_id: Optional[str] = None,
+        criador_id: Optional[str] = None,
+        limit: int = 50,
+        offset: int = 0,
+        cursor: Optional[str] = None,
+        include_total: bool = False,
+        search: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Lista tarefas com filtros, paginando por cursor (data_criacao, id) ou offset
+        
+        Com search, a busca textual em português (índice GIN de search_vector) ordena por
+        relevância; nesse caso a paginação é por offset e next_cursor é sempre None.
+        
+        Returns:
+            Dict com items (List[Task]), next_cursor e total (None se include_total=False)
+        """
         try:
             query = db.query(TaskDB).filter(TaskDB.ativo == True)
             
@@ -150,16 +183,38 @@ class TaskService:
             if criador_id:
                 query = query.filter(TaskDB.criador_id == criador_id)
             
-            # Ordenar por data de criação (mais recentes primeiro)
-            query = query.order_by(TaskDB.data_criacao.desc())
-            
-            # Paginação
-            tasks = query.offset(offset).limit(limit).all()
+            ts_query = None
+            if search and search.strip():
+                # websearch_to_tsquery aceita a sintaxe de buscador ("frase", -termo, or)
+                ts_query = func.websearch_to_tsquery(TASK_SEARCH_CONFIG, search.strip())
+                query = query.filter(TaskDB.search_vector.op("@@")(ts_query))
+            
+            total = query.count() if include_total else None
+            
+            if ts_query is not None:
+                rank = func.ts_rank_cd(TaskDB.search_vector, ts_query)
+                tasks = query.order_by(
+                    rank.desc(), TaskDB.data_criacao.desc(), TaskDB.id.desc()
+                ).offset(offset).limit(limit).all()
+                return {
+                    "items": [Task.from_orm(task) for task in tasks],
+                    "next_cursor": None,
+                    "total": total
+                }
+            
+            # Mais recentes primeiro, desempate por id
+            tasks, next_cursor = paginate_keyset(
+                query, TaskDB.data_criacao, TaskDB.id, limit, cursor=cursor, offset=offset
+            )
             
-            return [Task.from_orm(task) for task in tasks]
+            return {
+                "items": [Task.from_orm(task) for task in tasks],
+                "next_cursor": next_cursor,
+                "total": total
+            }
             
         except Exception as e:
-            logger.error(f"❌ Erro ao listar tarefas: {e}")
+            logger.error("❌ Erro ao listar tarefas: %s", e)
             raise
     
     @staticmethod
@@ -177,6 +232,8 @@ class TaskService:
             if not TaskService._validate_user_permissions(current_user, task):
                 raise PermissionException(message_service.get_task_message("no_permission_edit"))
             
+            old_snapshot = task_snapshot(task)
+            
             # Atualizar campos
             update_data = task_data.dict(exclude_unset=True)
             for field, value in update_data.items():
@@ -194,15 +251,17 @@ class TaskService:
             if task_data.status != TaskStatus.COMPLETED and task.status == TaskStatus.COMPLETED:
                 task.data_conclusao = None
             
-            db.commit()
-            db.refresh(task)
+            with dashboard_stats_cache.writing():
+                db.commit()
+                db.refresh(task)
+                dashboard_stats_cache.apply_task_change(old_snapshot, task_snapshot(task))
             
-            logger.info(f"✅ Tarefa atualizada: {task_id} por {current_user.id}")
+            logger.info("✅ Tarefa atualizada: %s por %s", task_id, current_user.id)
             return Task.from_orm(task)
             
         except Exception as e:
             db.rollback()
-            logger.error(f"❌ Erro ao atualizar tarefa {task_id}: {e}")
+            logger.error("❌ Erro ao atualizar tarefa %s: %s", task_id, e)
             raise
     
     @staticmethod
@@ -221,18 +280,22 @@ class TaskService:
                    current_user.perfil in [UserProfile.ADMIN, UserProfile.OWNER]):
                 raise PermissionException(message_service.get_task_message("no_permission_delete"))
             
+            old_snapshot = task_snapshot(task)
+            
             # Soft delete
             task.ativo = False
             task.data_atualizacao = datetime.utcnow()
             
-            db.commit()
+            with dashboard_stats_cache.writing():
+                db.commit()
+                dashboard_stats_cache.apply_task_change(old_snapshot, task_snapshot(task))
             
-            logger.info(f"✅ Tarefa deletada: {task_id} por {current_user.id}")
+            logger.info("✅ Tarefa deletada: %s por %s", task_id, current_user.id)
             return True
             
         except Exception as e:
             db.rollback()
-            logger.error(f"❌ Erro ao deletar tarefa {task_id}: {e}")
+            logger.error("❌ Erro ao deletar tarefa %s: %s", task_id, e)
             raise
     
     @staticmethod
@@ -250,6 +313,8 @@ class TaskService:
             if not TaskService._validate_user_permissions(current_user, task):
                 raise PermissionException(message_service.get_task_message("no_permission_edit"))
             
+            old_snapshot = task_snapshot(task)
+            
             # Atualizar status
             task.status = status
             task.data_atualizacao = datetime.utcnow()
@@ -260,69 +325,69 @@ class TaskService:
             elif task.data_conclusao and status != TaskStatus.COMPLETED:
                 task.data_conclusao = None
             
-            db.commit()
-            db.refresh(task)
+            with dashboard_stats_cache.writing():
+                db.commit()
+                db.refresh(task)
+                dashboard_stats_cache.apply_task_change(old_snapshot, task_snapshot(task))
             
-            logger.info(f"✅ Status da tarefa atualizado: {task_id} -> {status} por {current_user.id}")
+            logger.info("✅ Status da tarefa atualizado: %s -> %s por %s", task_id, status, current_user.id)
             return Task.from_orm(task)
             
         except Exception as e:
             db.rollback()
-            logger.error(f"❌ Erro ao atualizar status da tarefa {task_id}: {e}")
+            logger.error("❌ Erro ao atualizar status da tarefa %s: %s", task_id, e)
             raise
     
     @staticmethod
     def get_task_stats(db: Session, current_user: UserDB) -> TaskStats:
         """Obtém estatísticas de tarefas para o usuário"""
         try:
-            # Base query baseada no perfil
-            base_query = db.query(TaskDB).filter(TaskDB.ativo == True)
+            # Filtro base pelo perfil
+            filters = [TaskDB.ativo == True]
             
             if current_user.perfil == UserProfile.EMPREGADO:
-                base_query = base_query.filter(TaskDB.responsavel_id == current_user.id)
+                filters.append(TaskDB.responsavel_id == current_user.id)
             elif current_user.perfil in [UserProfile.ADMIN, UserProfile.OWNER]:
                 pass  # Ver todas as tarefas
             else:
-                base_query = base_query.filter(
+                filters.append(
                     or_(
                         TaskDB.criador_id == current_user.id,
                         TaskDB.responsavel_id == current_user.id
                     )
                 )
             
-            # Calcular estatísticas
-            total_tarefas = base_query.count()
-            
-            tarefas_pendentes = base_query.filter(TaskDB.status == TaskStatus.PENDING).count()
-            tarefas_em_andamento = base_query.filter(TaskDB.status == TaskStatus.IN_PROGRESS).count()
-            tarefas_concluidas = base_query.filter(TaskDB.status == TaskStatus.COMPLETED).count()
-            
-            # Tarefas atrasadas (pendentes ou em andamento com data_limite passada)
             hoje = datetime.utcnow().date()
-            tarefas_atrasadas = base_query.filter(
-                and_(
-                    TaskDB.status.in_([TaskStatus.PENDING, TaskStatus.IN_PROGRESS]),
-                    TaskDB.data_limite < hoje
-                )
-            ).count()
-            
-            # Tarefas para hoje
-            tarefas_hoje = base_query.filter(
-                and_(
-                    TaskDB.status.in_([TaskStatus.PENDING, TaskStatus.IN_PROGRESS]),
-                    func.date(TaskDB.data_limite) == hoje
-                )
-            ).count()
-            
-            # Tarefas da semana (próximos 7 dias)
             fim_semana = hoje + timedelta(days=7)
-            tarefas_semana = base_query.filter(
-                and_(
-                    TaskDB.status.in_([TaskStatus.PENDING, TaskStatus.IN_PROGRESS]),
-                    func.date(TaskDB.data_limite) <= fim_semana,
-                    func.date(TaskDB.data_limite) >= hoje
-                )
-            ).count()
+            data_limite = func.date(TaskDB.data_limite)
+            abertas = TaskDB.status.in_([TaskStatus.PENDING, TaskStatus.IN_PROGRESS])
+            
+            # Uma única consulta com agregação condicional (COUNT(*) FILTER (WHERE ...)),
+            # em vez de um COUNT sobre subconsulta para cada estatística
+            row = db.query(
+                func.count().label("total"),
+                func.count().filter(TaskDB.status == TaskStatus.PENDING).label("pendentes"),
+                func.count().filter(TaskDB.status == TaskStatus.IN_PROGRESS).label("em_andamento"),
+                func.count().filter(TaskDB.status == TaskStatus.COMPLETED).label("concluidas"),
+                # Tarefas atrasadas (pendentes ou em andamento com data_limite passada)
+                func.count().filter(abertas, TaskDB.data_limite < hoje).label("atrasadas"),
+                # Tarefas para hoje
+                func.count().filter(abertas, data_limite == hoje).label("hoje"),
+                # Tarefas da semana (próximos 7 dias)
+                func.count().filter(
+                    abertas,
+                    data_limite <= fim_semana,
+                    data_limite >= hoje
+                ).label("semana")
+            ).filter(*filters).one()
+            
+            total_tarefas = row.total or 0
+            tarefas_pendentes = row.pendentes or 0
+            tarefas_em_andamento = row.em_andamento or 0
+            tarefas_concluidas = row.concluidas or 0
+            tarefas_atrasadas = row.atrasadas or 0
+            tarefas_hoje = row.hoje or 0
+            tarefas_semana = row.semana or 0
             
             return TaskStats(
                 total_tarefas=total_tarefas,
@@ -335,5 +400,5 @@ class TaskService:
             )
             
         except Exception as e:
-            logger.error(f"❌ Erro ao calcular estatísticas: {e}")
+            logger.error("❌ Erro ao calcular estatísticas: %s", e)
             raise 
\ No newline at end of file
@@ -0,0 +1,100 @@
+"""
+Cache de usuários autenticados
+
+@fileoverview Cache de principais de usuário do DOM v1
+@directory domcore/services
+@description Mantém em memória uma versão enxuta (sem foto) do usuário dono de cada token,
+             evitando a consulta à tabela users a cada requisição autenticada
+@created 2024-12-19
+@lastModified 2024-12-19
+@author Equipe DOM v1
+"""
+
+import re
+import uuid
+from dataclasses import dataclass
+from typing import Optional
+from sqlalchemy.orm import Session
+
+from ..core.cache import TTLCache
+from ..core.config import config
+from ..core.signed_urls import signed_photo_url
+from ..models.user import UserDB
+
+
+@dataclass(frozen=True)
+class UserPrincipal:
+    """Dados do usuário autenticado necessários às rotas (sem senha e sem foto)"""
+
+    id: uuid.UUID
+    cpf: str
+    nome: str
+    nickname: Optional[str]
+    email: Optional[str]
+    celular: Optional[str]
+    perfil: str
+    ativo: bool
+    has_photo: bool = False
+
+    @property
+    def photo_url(self) -> Optional[str]:
+        """URL da foto (mesma regra de UserDB.photo_url)"""
+        return signed_photo_url(self.id) if self.has_photo else None
+
+
+# Colunas carregadas para montar o principal (user_photo e senha_hash ficam de fora;
+# has_photo é só um IS NOT NULL)
+_PRINCIPAL_COLUMNS = (
+    UserDB.id, UserDB.cpf, UserDB.nome, UserDB.nickname,
+    UserDB.email, UserDB.celular, UserDB.perfil, UserDB.ativo, UserDB.has_photo
+)
+
+
+class UserPrincipalCache:
+    """Cache LRU/TTL de UserPrincipal indexado pelo CPF (claim `sub` do token)"""
+
+    def __init__(self, ttl: float, maxsize: int):
+        self._cache = TTLCache(maxsize=maxsize, ttl=ttl)
+
+    @staticmethod
+    def _key(cpf: str) -> str:
+        return re.sub(r'\D', '', cpf or '')
+
+    @staticmethod
+    def load(db: Session, cpf: str) -> Optional[UserPrincipal]:
+        """Busca o principal de um usuário ativo no banco"""
+        row = db.query(*_PRINCIPAL_COLUMNS).filter(
+            UserDB.cpf == UserPrincipalCache._key(cpf),
+            UserDB.ativo == True
+        ).first()
+        if row is None:
+            return None
+        return UserPrincipal(**row._asdict())
+
+    def get(self, db: Session, cpf: str) -> Optional[UserPrincipal]:
+        """Retorna o principal do cache, consultando o banco apenas em caso de falta"""
+        key = self._key(cpf)
+        principal = self._cache.get(key)
+        if principal is None:
+            principal = self.load(db, key)
+            if principal is not None:
+                self._cache.set(key, principal)
+        return principal
+
+    def invalidate_user(self, user_id: str) -> None:
+        """Descarta o principal de um usuário (após alteração, desativação ou remoção)"""
+        user_id = str(user_id)
+        self._cache.pop_matching(lambda cpf, principal: str(principal.id) == user_id)
+
+    def invalidate_cpf(self, cpf: str) -> None:
+        self._cache.pop(self._key(cpf))
+
+    def clear(self) -> None:
+        self._cache.clear()
+
+
+# Instância global do cache
+user_principal_cache = UserPrincipalCache(
+    ttl=config.cache.user_principal_ttl_seconds,
+    maxsize=config.cache.user_principal_max_entries
+)
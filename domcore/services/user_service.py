@@ -8,32 +8,48 @@
 """
 
 from typing import List, Optional, Dict, Any
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, selectinload
 from sqlalchemy import and_, or_, func, desc
 from datetime import datetime, timedelta
 import uuid
-from passlib.context import CryptContext
 
 from ..models.user import UserDB, UserGroupRole
 from ..models.group import Group
 from ..core.exceptions import NotFoundException, ValidationError, DuplicateError
+from ..core.password_hashing import password_hasher
 from ..utils.cpf_validator import CPFValidator
-
-# Configuração para hash de senhas
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+from ..utils.pagination import paginate_keyset
+from .user_cache import user_principal_cache
+from .session_cache import session_context_cache
+from .permission_cache import group_permission_cache
 
 class UserService:
     """Serviço para gerenciar usuários"""
     
     @staticmethod
     def verify_password(plain_password: str, hashed_password: str) -> bool:
-        """Verifica se a senha está correta"""
-        return pwd_context.verify(plain_password, hashed_password)
+        """Verifica se a senha está correta (no executor limitado de bcrypt)"""
+        return password_hasher.verify(plain_password, hashed_password)
     
     @staticmethod
     def get_password_hash(password: str) -> str:
-        """Gera hash da senha"""
-        return pwd_context.hash(password)
+        """Gera hash da senha (no executor limitado de bcrypt)"""
+        return password_hasher.hash(password)
+    
+    @staticmethod
+    def password_needs_update(hashed_password: str) -> bool:
+        """Indica se o hash deve ser regerado com a política atual (BCRYPT_ROUNDS)"""
+        return password_hasher.needs_update(hashed_password)
+    
+    @staticmethod
+    async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+        """Verifica a senha sem bloquear o event loop"""
+        return await password_hasher.verify_async(plain_password, hashed_password)
+    
+    @staticmethod
+    async def get_password_hash_async(password: str) -> str:
+        """Gera hash da senha sem bloquear o event loop"""
+        return await password_hasher.hash_async(password)
     
     @staticmethod
     def get_users(
@@ -44,9 +60,16 @@ class UserService:
         perfil: Optional[str] = None,
         status: Optional[str] = None,
         ativo: Optional[bool] = None,
-        grupo: Optional[str] = None
+        grupo: Optional[str] = None,
+        cursor: Optional[str] = None,
+        include_total: bool = True
     ) -> Dict[str, Any]:
-        """Busca usuários com filtros"""
+        """
+        Busca usuários com filtros
+        
+        Com cursor, a página é buscada por chave (data_criacao, id) e skip é ignorado;
+        next_cursor da resposta aponta para a página seguinte.
+        """
         query = db.query(UserDB)
         
         # Aplicar filtros
@@ -89,17 +112,22 @@ class UserService:
                 )
             )
         
-        # Contar total
-        total = query.count()
+        # Contar total (opcional: em listagens por cursor o COUNT costuma ser o custo dominante)
+        total = query.count() if include_total else None
         
-        # Aplicar paginação
-        users = query.offset(skip).limit(limit).all()
+        # Aplicar paginação; papéis e grupos usados por to_api_dict vêm em duas consultas
+        # por página (selectin) em vez de um lazy load por usuário e por papel
+        users, next_cursor = paginate_keyset(
+            query.options(selectinload(UserDB.grupos).selectinload(UserGroupRole.grupo)),
+            UserDB.data_criacao, UserDB.id, limit, cursor=cursor, offset=skip
+        )
         
         return {
             "items": [user.to_api_dict() for user in users],
             "total": total,
             "skip": skip,
-            "limit": limit
+            "limit": limit,
+            "next_cursor": next_cursor
         }
     
     @staticmethod
@@ -195,6 +223,7 @@ class UserService:
         db.commit()
         db.refresh(user)
         
+        user_principal_cache.invalidate_user(user_id)
         return user
     
     @staticmethod
@@ -204,6 +233,8 @@ class UserService:
         user.ativo = False
         user.data_atualizacao = datetime.utcnow()
         db.commit()
+        user_principal_cache.invalidate_user(user_id)
+        session_context_cache.invalidate_user(user_id)
         return True
     
     @staticmethod
@@ -224,6 +255,8 @@ class UserService:
         user.data_atualizacao = datetime.utcnow()
         db.commit()
         db.refresh(user)
+        user_principal_cache.invalidate_user(user_id)
+        session_context_cache.invalidate_user(user_id)
         return user
     
     @staticmethod
@@ -242,6 +275,7 @@ class UserService:
             existing.ativo = True
             existing.updated_at = datetime.utcnow()
             db.commit()
+            group_permission_cache.invalidate_user(db, user_id)
             return existing
         
         # Criar novo relacionamento
@@ -255,6 +289,7 @@ class UserService:
         db.add(user_group)
         db.commit()
         db.refresh(user_group)
+        group_permission_cache.invalidate_user(db, user_id)
         return user_group
     
     @staticmethod
@@ -271,6 +306,7 @@ class UserService:
             user_group.ativo = False
             user_group.updated_at = datetime.utcnow()
             db.commit()
+            group_permission_cache.invalidate_user(db, user_id)
             return True
         
         return False
@@ -11,8 +11,12 @@ Utilitários do DOM v1 - Funções auxiliares
 
 from .cpf_validator import CPFValidator
 from .receita_federal import ReceitaFederalService
+from .pagination import encode_cursor, decode_cursor, paginate_keyset
 
 __all__ = [
     "CPFValidator",
-    "ReceitaFederalService"
+    "ReceitaFederalService",
+    "encode_cursor",
+    "decode_cursor",
+    "paginate_keyset"
 ] 
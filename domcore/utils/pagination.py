@@ -0,0 +1,105 @@
+"""
+Paginação por cursor (keyset) - Listagens ordenadas por data de criação
+
+@fileoverview Paginação keyset do DOM v1
+@directory domcore/utils
+@description Cursores opacos sobre (data_criacao, id) para listagens em ordem decrescente,
+             cujo custo não cresce com a profundidade da página como OFFSET
+@created 2024-12-19
+@lastModified 2024-12-19
+@author Equipe DOM v1
+"""
+
+import json
+import base64
+import binascii
+from datetime import datetime
+from typing import Any, List, Optional, Tuple
+from sqlalchemy import tuple_
+from sqlalchemy.orm import Query
+
+from ..core.exceptions import ValidationError
+
+
+def encode_cursor(created_at: datetime, row_id: Any) -> str:
+    """
+    Gera um cursor opaco a partir da chave (data_criacao, id) do último item da página
+
+    Args:
+        created_at: data_criacao do último item
+        row_id: id do último item
+
+    Returns:
+        str: Cursor base64 url-safe
+    """
+    payload = json.dumps([created_at.isoformat(), str(row_id)], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, id_type: type = str) -> Tuple[datetime, Any]:
+    """
+    Decodifica um cursor gerado por encode_cursor
+
+    Args:
+        cursor: Cursor recebido do cliente
+        id_type: Tipo Python do id (str ou uuid.UUID)
+
+    Returns:
+        Tuple[datetime, Any]: (data_criacao, id)
+
+    Raises:
+        ValidationError: Se o cursor for inválido
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, row_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(created_at), id_type(row_id)
+    except (ValueError, TypeError, binascii.Error) as e:
+        raise ValidationError("Cursor de paginação inválido", field="cursor", value=cursor) from e
+
+
+def paginate_keyset(
+    query: Query,
+    created_column,
+    id_column,
+    limit: int,
+    cursor: Optional[str] = None,
+    offset: int = 0
+) -> Tuple[List[Any], Optional[str]]:
+    """
+    Aplica ordenação (data_criacao DESC, id DESC) e pagina a consulta
+
+    Com cursor, a página começa logo após a chave codificada (WHERE (data_criacao, id) < ...),
+    o que usa o índice diretamente; sem cursor, usa o OFFSET legado. Em ambos os casos é
+    buscado um item a mais para saber se existe próxima página.
+
+    Args:
+        query: Consulta já filtrada
+        created_column: Coluna data_criacao do modelo
+        id_column: Coluna id do modelo
+        limit: Tamanho da página
+        cursor: Cursor retornado pela página anterior
+        offset: Offset usado quando não há cursor
+
+    Returns:
+        Tuple[List[Any], Optional[str]]: (itens da página, cursor da próxima página ou None)
+    """
+    query = query.order_by(created_column.desc(), id_column.desc())
+
+    if cursor:
+        created_at, row_id = decode_cursor(cursor, id_column.type.python_type)
+        query = query.filter(tuple_(created_column, id_column) < tuple_(created_at, row_id))
+    elif offset:
+        query = query.offset(offset)
+
+    rows = query.limit(limit + 1).all()
+    items = rows[:limit]
+
+    next_cursor = None
+    if len(rows) > limit and items:
+        last = items[-1]
+        created_at = getattr(last, created_column.key)
+        if created_at is not None:
+            next_cursor = encode_cursor(created_at, getattr(last, id_column.key))
+
+    return items, next_cursor
@@ -7,6 +7,8 @@
  * @author Equipe DOM v1
  */
 
+import { queryWorker } from '@/services/domcoreWorker'
+
 export default async function handler(req, res) {
   const { method } = req
 
@@ -40,7 +42,9 @@ export default async function handler(req, res) {
       offset = 0, 
       unread_only = false,
       notification_type = null,
-      profile = user.profile
+      profile = user.profile,
+      cursor = null,
+      include_total = false
     } = req.query
 
     switch (method) {
@@ -50,7 +54,9 @@ export default async function handler(req, res) {
           offset: parseInt(offset),
           unread_only: unread_only === 'true',
           notification_type,
-          profile
+          profile,
+          cursor,
+          include_total: include_total === 'true'
         })
       
       case 'POST':
@@ -77,35 +83,29 @@ export default async function handler(req, res) {
  */
 async function getNotifications(req, res, user, filters) {
   try {
-    const { limit, offset, unread_only, notification_type, profile } = filters
-
-    // Chama script Python para buscar notificações
-    const pythonScript = 'domcore/get_notifications.py'
-    const command = `python ${pythonScript} --user-id "${user.id}" --profile "${profile}" --limit ${limit} --offset ${offset} --unread-only ${unread_only} --notification-type "${notification_type || ''}"`
-
-    const { exec } = require('child_process')
-    const util = require('util')
-    const execAsync = util.promisify(exec)
-
-    const { stdout, stderr } = await execAsync(command)
-
-    if (stderr) {
-      console.error('❌ Erro no script Python:', stderr)
-      return res.status(500).json({ 
-        error: 'Database Error',
-        message: 'Erro ao buscar notificações'
-      })
-    }
-
-    const notifications = JSON.parse(stdout)
+    const { limit, offset, unread_only, notification_type, profile, cursor, include_total } = filters
+
+    // Consulta o worker persistente do domcore (sem iniciar um novo processo Python).
+    // Com cursor, a página é buscada por (data_criacao, id) e o offset é ignorado
+    const page = await queryWorker('get_notifications_page', {
+      user_id: user.id,
+      profile,
+      limit,
+      offset,
+      unread_only,
+      notification_type: notification_type || null,
+      cursor: cursor || null,
+      include_total
+    })
 
     return res.status(200).json({
       success: true,
-      data: notifications,
+      data: page.items,
       pagination: {
         limit,
         offset,
-        total: notifications.length
+        total: include_total ? page.total : page.items.length,
+        next_cursor: page.next_cursor
       }
     })
 
@@ -7,6 +7,8 @@
  * @author Equipe DOM v1
  */
 
+import { queryWorker } from '@/services/domcoreWorker'
+
 export default async function handler(req, res) {
   const { method } = req
 
@@ -111,26 +113,17 @@ async function markAsRead(req, res, user, notificationId) {
  */
 async function markAllAsRead(req, res, user) {
   try {
-    // Chama script Python para marcar todas como lidas
-    const pythonScript = 'domcore/mark_all_notifications_read.py'
-    const command = `python ${pythonScript} --user-id "${user.id}"`
-
-    const { exec } = require('child_process')
-    const util = require('util')
-    const execAsync = util.promisify(exec)
+    // Worker persistente: um único UPDATE, sem iniciar um processo Python por requisição
+    const result = await queryWorker('mark_all_notifications_read', { user_id: user.id })
 
-    const { stdout, stderr } = await execAsync(command)
-
-    if (stderr) {
-      console.error('❌ Erro no script Python:', stderr)
+    if (!result.success) {
+      console.error('❌ Erro no worker domcore:', result.message)
       return res.status(500).json({ 
         error: 'Database Error',
         message: 'Erro ao marcar notificações como lidas'
       })
     }
 
-    const result = JSON.parse(stdout)
-
     return res.status(200).json({
       success: true,
       data: result,
@@ -7,6 +7,7 @@
  * @author DOM Team
  */
 
+import { queryWorker } from '@/services/domcoreWorker';
 
 
 export default async function handler(req, res) {
@@ -55,25 +56,15 @@ async function getTasks(req, res, token, filters) {
   try {
     const { profile, limit, offset, status, priority, search } = filters;
 
-    // Chama script Python para buscar tarefas
-    const pythonScript = '../domcore/get_tasks.py';
-    const command = `python ${pythonScript} --profile "${profile}" --limit ${limit} --offset ${offset} --status "${status || ''}" --priority "${priority || ''}" --search "${search || ''}"`;
-
-    const { exec } = require('child_process');
-    const util = require('util');
-    const execAsync = util.promisify(exec);
-
-    const { stdout, stderr } = await execAsync(command, { cwd: process.cwd() });
-
-    if (stderr) {
-      console.error('❌ Erro no script Python:', stderr);
-      return res.status(500).json({ 
-        success: false,
-        message: 'Erro ao buscar tarefas'
-      });
-    }
-
-    const tasks = JSON.parse(stdout);
+    // Consulta o worker persistente do domcore (sem iniciar um novo processo Python)
+    const tasks = await queryWorker('get_tasks', {
+      profile,
+      limit: parseInt(limit),
+      offset: parseInt(offset),
+      status: status || null,
+      priority: priority || null,
+      search: search || null
+    });
 
     return res.status(200).json({
       success: true,
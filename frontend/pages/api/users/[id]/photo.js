@@ -0,0 +1,71 @@
+/**
+ * @fileoverview User Photo API
+ * @directory pages/api/users/[id]
+ * @description Repassa a foto do usuário do backend preservando ETag/Cache-Control,
+ *              para que o navegador revalide com If-None-Match e receba 304 sem os bytes.
+ *              Encaminha a credencial: assinatura da URL (exp/sig) ou cabeçalho Authorization
+ * @created 2024-12-19
+ * @lastModified 2024-12-19
+ * @author DOM Team
+ */
+
+const FORWARDED_HEADERS = ['content-type', 'etag', 'cache-control']
+
+export default async function handler(req, res) {
+  if (req.method !== 'GET') {
+    return res.status(405).json({
+      success: false,
+      message: 'Método não permitido'
+    })
+  }
+
+  try {
+    const { id, exp, sig } = req.query
+    const backendUrl = process.env.BACKEND_URL || 'http://localhost:8000'
+
+    const headers = {}
+    if (req.headers['if-none-match']) {
+      headers['If-None-Match'] = req.headers['if-none-match']
+    }
+    if (req.headers.authorization) {
+      headers['Authorization'] = req.headers.authorization
+    }
+
+    // URL assinada gerada pelo backend (user_photo); sem ela vale só o Authorization
+    const params = new URLSearchParams()
+    if (exp) params.set('exp', exp)
+    if (sig) params.set('sig', sig)
+    const query = params.toString() ? `?${params.toString()}` : ''
+
+    const response = await fetch(`${backendUrl}/api/users/${encodeURIComponent(id)}/photo${query}`, {
+      method: 'GET',
+      headers
+    })
+
+    FORWARDED_HEADERS.forEach((name) => {
+      const value = response.headers.get(name)
+      if (value) res.setHeader(name, value)
+    })
+
+    if (response.status === 304) {
+      return res.status(304).end()
+    }
+
+    if (!response.ok) {
+      return res.status(response.status).json({
+        success: false,
+        message: response.status === 401 ? 'Não autorizado' : 'Foto não encontrada'
+      })
+    }
+
+    const photo = Buffer.from(await response.arrayBuffer())
+    return res.status(200).send(photo)
+
+  } catch (error) {
+    console.error('Erro na API de foto do usuário:', error)
+    return res.status(500).json({
+      success: false,
+      message: 'Erro interno do servidor'
+    })
+  }
+}
@@ -7,6 +7,8 @@
  * @author DOM Team
  */
 
+import { queryWorker } from '@/services/domcoreWorker';
+
 export default async function handler(req, res) {
   const { method } = req;
 
@@ -47,25 +49,8 @@ export default async function handler(req, res) {
  */
 async function getUserStats(req, res, token) {
   try {
-    // Chama script Python para buscar estatísticas
-    const pythonScript = 'domcore/get_user_stats.py';
-    const command = `python ${pythonScript}`;
-
-    const { exec } = require('child_process');
-    const util = require('util');
-    const execAsync = util.promisify(exec);
-
-    const { stdout, stderr } = await execAsync(command);
-
-    if (stderr) {
-      console.error('❌ Erro no script Python:', stderr);
-      return res.status(500).json({ 
-        success: false,
-        message: 'Erro ao buscar estatísticas'
-      });
-    }
-
-    const stats = JSON.parse(stdout);
+    // Consulta o worker persistente do domcore (sem iniciar um novo processo Python)
+    const stats = await queryWorker('get_user_stats');
 
     return res.status(200).json({
       success: true,
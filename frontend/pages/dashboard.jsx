@@ -152,7 +152,7 @@ function User(props) {
           <Box display="flex" alignItems="center" justifyContent="center" minWidth={96} minHeight={96}>
             {user_photo ? (
               <Avatar
-                src={`data:image/jpeg;base64,${user_photo}`}
+                src={user_photo}
                 alt={displayName}
                 sx={{ width: 96, height: 96, border: `2px solid ${getProfileColor(profile)}`, bgcolor: '#fff' }}
               />
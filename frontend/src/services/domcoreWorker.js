@@ -0,0 +1,129 @@
+/**
+ * @fileoverview Cliente do worker persistente do domcore
+ * @directory src/services
+ * @description Mantém um único processo domcore/query_worker.py vivo e envia consultas via JSON-lines,
+ *              evitando iniciar um interpretador Python a cada requisição das rotas de API
+ * @created 2024-12-19
+ * @lastModified 2024-12-19
+ * @author Equipe DOM v1
+ */
+
+import path from 'path'
+import { spawn } from 'child_process'
+
+const WORKER_SCRIPT = path.join(process.cwd(), '..', 'domcore', 'query_worker.py')
+const DEFAULT_TIMEOUT_MS = 10000
+
+// Estado global para sobreviver ao hot reload do Next.js em desenvolvimento
+const state = globalThis.__domcoreWorker || (globalThis.__domcoreWorker = {
+  process: null,
+  buffer: '',
+  nextId: 1,
+  pending: new Map()
+})
+
+/**
+ * Rejeita todas as requisições pendentes (ex.: quando o worker encerra)
+ */
+function failPending(error) {
+  for (const { reject, timer } of state.pending.values()) {
+    clearTimeout(timer)
+    reject(error)
+  }
+  state.pending.clear()
+}
+
+/**
+ * Processa as linhas completas recebidas no stdout do worker
+ */
+function handleStdout(chunk) {
+  state.buffer += chunk.toString()
+
+  let newline = state.buffer.indexOf('\n')
+  while (newline !== -1) {
+    const line = state.buffer.slice(0, newline).trim()
+    state.buffer = state.buffer.slice(newline + 1)
+    newline = state.buffer.indexOf('\n')
+
+    if (!line) continue
+
+    let message
+    try {
+      message = JSON.parse(line)
+    } catch (parseError) {
+      console.error('❌ Worker domcore: resposta inválida:', line)
+      continue
+    }
+
+    const entry = state.pending.get(message.id)
+    if (!entry) continue
+
+    state.pending.delete(message.id)
+    clearTimeout(entry.timer)
+
+    if (message.ok) {
+      entry.resolve(message.result)
+    } else {
+      entry.reject(new Error(message.error || 'Erro no worker domcore'))
+    }
+  }
+}
+
+/**
+ * Retorna o processo do worker, iniciando-o se necessário
+ */
+function getWorker() {
+  if (state.process && state.process.exitCode === null && !state.process.killed) {
+    return state.process
+  }
+
+  const worker = spawn('python', [WORKER_SCRIPT], { stdio: ['pipe', 'pipe', 'pipe'] })
+  state.buffer = ''
+
+  worker.stdout.on('data', handleStdout)
+  worker.stderr.on('data', (chunk) => {
+    console.error('⚠️ Worker domcore:', chunk.toString())
+  })
+  worker.on('exit', (code) => {
+    if (state.process === worker) {
+      state.process = null
+    }
+    failPending(new Error(`Worker domcore encerrado (código ${code})`))
+  })
+  worker.on('error', (err) => {
+    console.error('❌ Erro ao iniciar worker domcore:', err)
+    if (state.process === worker) {
+      state.process = null
+    }
+    failPending(err)
+  })
+
+  state.process = worker
+  return worker
+}
+
+/**
+ * Executa uma consulta no worker persistente
+ *
+ * @param {string} method - Nome do método (get_tasks, get_notifications, get_notifications_page, get_user_stats,
+ *                          mark_all_notifications_read, ping)
+ * @param {Object} params - Parâmetros repassados ao método Python
+ * @param {Object} options - { timeout } em milissegundos
+ * @returns {Promise<any>} Resultado retornado pelo worker
+ */
+export function queryWorker(method, params = {}, { timeout = DEFAULT_TIMEOUT_MS } = {}) {
+  return new Promise((resolve, reject) => {
+    const worker = getWorker()
+    const id = state.nextId++
+
+    const timer = setTimeout(() => {
+      state.pending.delete(id)
+      reject(new Error(`Tempo esgotado aguardando o worker domcore (${method})`))
+    }, timeout)
+
+    state.pending.set(id, { resolve, reject, timer })
+    worker.stdin.write(JSON.stringify({ id, method, params }) + '\n')
+  })
+}
+
+export default queryWorker
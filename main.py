@@ -10,36 +10,41 @@ Servidor principal do sistema de gestão doméstica
 @author Equipe DOM v1
 """
 
-from fastapi import FastAPI, HTTPException, Depends, status, Request
+from fastapi import FastAPI, HTTPException, Depends, status, Request, Response
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import FileResponse
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from pydantic import BaseModel
-from typing import Optional, Dict, Any, List
+from pydantic import BaseModel, Field
+from typing import Optional, Dict, Any, List, Tuple
 import uvicorn
 from datetime import datetime, timedelta
 import jwt
-from passlib.context import CryptContext
 import os
 from dotenv import load_dotenv
-from sqlalchemy.orm import Session
-import base64
+from sqlalchemy.orm import Session, joinedload
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import func, select, update
 import re
+import hmac
 import uuid
 
 # Importar módulos do domcore
 import sys
 sys.path.append('domcore')
 
-# Adicionar logs para debug
+# Logging estruturado: QueueHandler + thread de escrita, ID de requisição e amostragem de INFO
 import logging
-logging.basicConfig(level=logging.DEBUG)
+from domcore.core.structured_logging import (
+    configure_logging, shutdown_logging, logging_stats, RequestIdMiddleware
+)
+configure_logging()
 logger = logging.getLogger(__name__)
 
 try:
-    from domcore.core.db import SessionLocal, engine
+    from domcore.core.db import SessionLocal, engine, AsyncSessionLocal
     logger.info("✅ Engine importado com sucesso")
 except Exception as e:
-    logger.error(f"❌ Erro ao importar engine: {e}")
+    logger.error("❌ Erro ao importar engine: %s", e)
     raise
 
 try:
@@ -48,9 +53,24 @@ try:
     from domcore.models.task import TaskCreate, TaskUpdate, Task, TaskStats
     from domcore.services.task_service import TaskService
     from domcore.services.group_service import GroupService
+    from domcore.services.notification_service import NotificationService
+    from domcore.services.async_services import AsyncTaskService, AsyncGroupService
+    from domcore.services.stats_cache import dashboard_stats_cache
+    from domcore.services.user_cache import user_principal_cache, UserPrincipal
+    from domcore.services.session_reaper import session_reaper
+    from domcore.services.session_cache import session_context_cache, SessionContext
+    from domcore.services.permission_cache import role_level
+    from domcore.core.enums import UserProfile, NotificationType
+    from domcore.core.exceptions import ValidationError, ValidationException, ServiceUnavailableError
+    from domcore.core.password_hashing import password_hasher
+    from domcore.core.signed_urls import verify_photo_signature
+    from domcore.core.config import config
+    from domcore.core.metrics import MetricsMiddleware, metrics_registry
+    from domcore.core.slow_query import slow_query_recorder
+    from domcore.core.profiling import ProfilingMiddleware, request_profiler
     logger.info("✅ Modelos e serviços importados com sucesso")
 except Exception as e:
-    logger.error(f"❌ Erro ao importar modelos: {e}")
+    logger.error("❌ Erro ao importar modelos: %s", e)
     raise
 
 # Carregar variáveis de ambiente
@@ -60,12 +80,13 @@ load_dotenv()
 SECRET_KEY = os.getenv("SECRET_KEY", "dom-v1-secret-key-change-in-production")
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
-
-# Configuração de senhas
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Tempo (s) que o navegador pode reutilizar a foto antes de revalidar com If-None-Match
+USER_PHOTO_MAX_AGE = int(os.getenv("USER_PHOTO_MAX_AGE", "300"))
 
 # Configuração de segurança
 security = HTTPBearer()
+# Para rotas que aceitam outra credencial além do token (ex.: URL assinada da foto)
+optional_security = HTTPBearer(auto_error=False)
 
 # Criar aplicação FastAPI
 app = FastAPI(
@@ -85,6 +106,48 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Perfis que podem pedir o profiler por requisição, baixar os resultados e ler /api/metrics
+PROFILER_ALLOWED_PROFILES = {UserProfile.ADMIN.value, UserProfile.OWNER.value}
+
+async def authorize_profiling(scope) -> bool:
+    """Autoriza X-Profile/?_profile=1 apenas para token válido de usuário admin/owner ativo"""
+    authorization = ""
+    for name, value in scope["headers"]:
+        if name == b"authorization":
+            authorization = value.decode("latin-1")
+            break
+    scheme, _, token = authorization.partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return False
+    try:
+        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    except jwt.PyJWTError:
+        return False
+    async with AsyncSessionLocal() as db:
+        user = await db.run_sync(user_principal_cache.get, payload.get("sub"))
+    return user is not None and user.perfil in PROFILER_ALLOWED_PROFILES
+
+# Profiler sob demanda (cProfile) para uma requisição; resultado em /api/admin/profiles/{id}
+app.add_middleware(ProfilingMiddleware, profiler=request_profiler, authorize=authorize_profiling)
+
+# Latência por rota e contadores de banco por requisição (GET /api/metrics, restrito)
+app.add_middleware(MetricsMiddleware)
+
+# ID de requisição (X-Request-ID) nos logs; adicionado por último para envolver os demais
+app.add_middleware(RequestIdMiddleware)
+
+@app.on_event("startup")
+async def start_background_tasks():
+    """Inicia a limpeza periódica de sessões expiradas"""
+    session_reaper.start()
+
+@app.on_event("shutdown")
+async def stop_background_tasks():
+    await session_reaper.stop()
+    password_hasher.shutdown()
+    slow_query_recorder.shutdown()
+    shutdown_logging()
+
 # Modelos Pydantic
 class UserLogin(BaseModel):
     cpf: str
@@ -104,26 +167,26 @@ class TokenData(BaseModel):
 
 # Dependency para obter sessão do banco
 def get_db():
-    logger.info("🔄 Iniciando get_db()")
+    db = SessionLocal()
     try:
-        logger.info("🔄 Criando SessionLocal...")
-        db = SessionLocal()
-        logger.info("✅ SessionLocal criado com sucesso")
-        try:
-            yield db
-        finally:
-            logger.info("🔄 Fechando sessão...")
-            db.close()
-            logger.info("✅ Sessão fechada")
-    except Exception as e:
-        logger.error(f"❌ Erro em get_db(): {type(e).__name__}: {str(e)}")
-        logger.error(f"Detalhes do erro: {e}")
-        raise
+        yield db
+    finally:
+        db.close()
+
+# Dependency para obter sessão assíncrona (asyncpg) sem bloquear o event loop
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
 
 # Funções utilitárias
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    """Verifica se a senha está correta"""
-    return pwd_context.verify(plain_password, hashed_password)
+async def verify_password(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """
+    Verifica se a senha está correta (bcrypt roda no executor limitado, fora do event loop)
+
+    Retorna também o novo hash quando o armazenado não segue a política atual (custo diferente
+    de BCRYPT_ROUNDS), para ser regravado no login bem-sucedido.
+    """
+    return await password_hasher.verify_and_update_async(plain_password, hashed_password)
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     """Cria token de acesso JWT"""
@@ -145,8 +208,30 @@ def get_user_by_cpf(db: Session, cpf: str):
     cpf_clean = clean_cpf(cpf)
     return db.query(UserDB).filter(UserDB.cpf == cpf_clean, UserDB.ativo == True).first()
 
-async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security), db: Session = Depends(get_db)):
-    """Obtém usuário atual baseado no token"""
+def detect_image_media_type(data: bytes) -> str:
+    """Identifica o tipo da imagem pelos bytes iniciais (fotos antigas não guardam o mime type)"""
+    if data.startswith(b"\x89PNG\r\n\x1a\n"):
+        return "image/png"
+    if data.startswith((b"GIF87a", b"GIF89a")):
+        return "image/gif"
+    if data[:4] == b"RIFF" and data[8:12] == b"WEBP":
+        return "image/webp"
+    return "image/jpeg"
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Verifica se o cabeçalho If-None-Match contém a ETag atual"""
+    if not if_none_match:
+        return False
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in candidates or any(tag.removeprefix("W/") == etag for tag in candidates)
+
+async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(security), db: AsyncSession = Depends(get_async_db)) -> UserPrincipal:
+    """
+    Obtém usuário atual baseado no token
+
+    A assinatura do token é verificada a cada requisição; os dados do usuário vêm do
+    cache de principais (sem foto), que só consulta o banco em caso de falta.
+    """
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -161,7 +246,7 @@ async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(s
     except jwt.PyJWTError:
         raise credentials_exception
     
-    user = get_user_by_cpf(db, cpf=token_data.cpf)
+    user = await db.run_sync(user_principal_cache.get, token_data.cpf)
     if user is None:
         raise credentials_exception
     return user
@@ -182,35 +267,114 @@ async def health_check():
     return {
         "status": "healthy",
         "timestamp": datetime.utcnow().isoformat(),
-        "version": "1.0.0"
+        "version": "1.0.0",
+        "password_hashing": password_hasher.stats(),
+        "logging": logging_stats()
     }
 
+def metrics_token_matches(credentials: Optional[HTTPAuthorizationCredentials]) -> bool:
+    """Compara o bearer recebido com METRICS_TOKEN (desligado quando vazio)"""
+    expected = config.observability.metrics_token
+    return bool(expected) and credentials is not None and hmac.compare_digest(
+        credentials.credentials.encode(), expected.encode()
+    )
+
+if config.observability.metrics_enabled:
+    @app.get("/api/metrics")
+    async def get_metrics(
+        credentials: Optional[HTTPAuthorizationCredentials] = Depends(optional_security),
+        db: AsyncSession = Depends(get_async_db)
+    ):
+        """
+        Métricas do processo no formato texto do Prometheus
+
+        Aceita o METRICS_TOKEN como bearer (coletor) ou o token de um usuário admin/owner
+        (mesma regra de /api/admin/profiles).
+        """
+        if not metrics_token_matches(credentials):
+            if credentials is None:
+                raise HTTPException(
+                    status_code=status.HTTP_401_UNAUTHORIZED,
+                    detail="Not authenticated",
+                    headers={"WWW-Authenticate": "Bearer"},
+                )
+            current_user = await get_current_user(credentials, db)
+            if current_user.perfil not in PROFILER_ALLOWED_PROFILES:
+                raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Acesso restrito a administradores")
+        return Response(
+            content=metrics_registry.render(),
+            media_type="text/plain; version=0.0.4"
+        )
+
+@app.get("/api/admin/profiles")
+async def list_profiles(current_user: UserPrincipal = Depends(get_current_user)):
+    """Lista os perfis de requisição gravados (mais recentes primeiro)"""
+    if current_user.perfil not in PROFILER_ALLOWED_PROFILES:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Acesso restrito a administradores")
+    return {"profiles": request_profiler.list_ids()}
+
+@app.get("/api/admin/profiles/{profile_id}")
+async def get_profile(
+    profile_id: str,
+    format: str = "txt",
+    current_user: UserPrincipal = Depends(get_current_user)
+):
+    """
+    Retorna um perfil gravado pelo profiler por requisição
+
+    format=txt devolve o resumo ordenado por tempo cumulativo; format=pstats devolve o
+    arquivo .prof (abrir com `python -m pstats` ou snakeviz).
+    """
+    if current_user.perfil not in PROFILER_ALLOWED_PROFILES:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Acesso restrito a administradores")
+    if format not in ("txt", "pstats"):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="format deve ser txt ou pstats")
+    path = request_profiler.path_for(profile_id, "txt" if format == "txt" else "prof")
+    if path is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Perfil não encontrado")
+    if format == "txt":
+        return FileResponse(path, media_type="text/plain; charset=utf-8")
+    return FileResponse(path, media_type="application/octet-stream", filename=f"{profile_id}.prof")
+
 @app.post("/api/auth/login")
-async def login(user_credentials: UserLogin, db: Session = Depends(get_db)):
+async def login(user_credentials: UserLogin, db: AsyncSession = Depends(get_async_db)):
     """Endpoint de login"""
     # Buscar usuário no banco
-    user = get_user_by_cpf(db, user_credentials.cpf)
+    user = await db.run_sync(get_user_by_cpf, user_credentials.cpf)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="CPF ou senha incorretos",
             headers={"WWW-Authenticate": "Bearer"},
         )
-    if not verify_password(user_credentials.password, user.senha_hash):
+    try:
+        password_ok, new_hash = await verify_password(user_credentials.password, user.senha_hash)
+    except ServiceUnavailableError as e:
+        # Fila de bcrypt cheia: recusar rápido em vez de enfileirar logins indefinidamente
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=e.message,
+            headers={"Retry-After": "1"},
+        )
+    if not password_ok:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="CPF ou senha incorretos",
             headers={"WWW-Authenticate": "Bearer"},
         )
+    if new_hash:
+        # Atualização transparente do hash para o custo configurado
+        user.senha_hash = new_hash
+    # has_photo é uma expressão SQL (column_property) e expira no flush: ler antes do commit
+    # evita um lazy load fora do greenlet da sessão assíncrona
+    user_photo = user.photo_url
     user.ultimo_login = datetime.utcnow()
-    db.commit()
     access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
         data={"sub": user.cpf, "profile": user.perfil},
         expires_delta=access_token_expires
     )
-    photo_b64 = base64.b64encode(user.user_photo).decode() if user.user_photo else None
-    # Cria uma nova sessão (mantendo múltiplas sessões)
+    # Cria uma nova sessão (mantendo múltiplas sessões) na mesma transação do ultimo_login
     session = UserSession(
         id=uuid.uuid4(),
         user_id=user.id,
@@ -223,7 +387,12 @@ async def login(user_credentials: UserLogin, db: Session = Depends(get_db)):
         ip_address=None
     )
     db.add(session)
-    db.commit()
+    await db.commit()
+    session_context_cache.set(
+        access_token,
+        SessionContext(user_id=user.id, active_context_group_id=None, active_context_role=None),
+        session.expires_at
+    )
     return {
         "success": True,
         "id": user.id,
@@ -233,14 +402,13 @@ async def login(user_credentials: UserLogin, db: Session = Depends(get_db)):
         "profile": user.perfil,
         "email": user.email,
         "celular": user.celular,
-        "user_photo": photo_b64,
+        "user_photo": user_photo,
         "access_token": access_token
     }
 
 @app.get("/api/auth/me")
-async def get_current_user_info(current_user: UserDB = Depends(get_current_user)):
-    """Obtém informações do usuário atual"""
-    photo_b64 = base64.b64encode(current_user.user_photo).decode() if current_user.user_photo else None
+async def get_current_user_info(current_user: UserPrincipal = Depends(get_current_user)):
+    """Obtém informações do usuário atual (a foto é referenciada por URL)"""
     return {
         "id": current_user.id,
         "name": current_user.nome,
@@ -249,23 +417,41 @@ async def get_current_user_info(current_user: UserDB = Depends(get_current_user)
         "profile": current_user.perfil,
         "email": current_user.email,
         "celular": current_user.celular,
-        "user_photo": photo_b64
+        "user_photo": current_user.photo_url
     }
 
 @app.get("/api/dashboard/stats")
-async def get_dashboard_stats(current_user: UserDB = Depends(get_current_user)):
-    """Obtém estatísticas do dashboard"""
-    return {
-        "tasks_active": 12,
-        "notifications": 3,
-        "users_online": 5,
-        "profile": current_user.perfil
-    }
+async def get_dashboard_stats(
+    current_user: UserPrincipal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Obtém estatísticas do dashboard (servidas do cache por usuário mantido por deltas)"""
+    try:
+        try:
+            profile = UserProfile(current_user.perfil)
+        except ValueError:
+            profile = UserProfile.EMPREGADOR
+        
+        stats = await db.run_sync(dashboard_stats_cache.get_dashboard_stats, str(current_user.id), profile)
+        task_stats = stats["task_stats"]
+        
+        # Campos resumidos mantidos por compatibilidade com clientes antigos
+        stats["tasks_active"] = task_stats["tarefas_pendentes"] + task_stats["tarefas_em_andamento"]
+        stats["notifications"] = stats["notification_stats"]["notificacoes_nao_lidas"]
+        return stats
+        
+    except Exception as e:
+        logger.error("❌ Erro ao obter estatísticas do dashboard: %s", e)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Erro interno do servidor"
+        )
 
 @app.get("/api/users")
-async def get_users(db: Session = Depends(get_db)):
+async def get_users(db: AsyncSession = Depends(get_async_db)):
     """Lista todos os usuários (para desenvolvimento)"""
-    users = db.query(UserDB).filter(UserDB.ativo == True).all()
+    result = await db.execute(select(UserDB).where(UserDB.ativo == True))
+    users = result.scalars().all()
     return [
         {
             "id": user.id,
@@ -278,11 +464,70 @@ async def get_users(db: Session = Depends(get_db)):
         for user in users
     ]
 
+@app.get("/api/users/{user_id}/photo")
+async def get_user_photo(
+    user_id: str,
+    request: Request,
+    exp: Optional[int] = None,
+    sig: Optional[str] = None,
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(optional_security),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Retorna a foto do usuário como imagem binária
+
+    Exige a assinatura da URL gerada por photo_url (exp/sig, para <img src>) ou um token
+    válido no cabeçalho Authorization.
+
+    A ETag é o hash MD5 do conteúdo calculado no banco: quando o cliente envia um
+    If-None-Match válido a resposta é 304 sem ler os bytes da foto.
+    """
+    if not verify_photo_signature(user_id, exp, sig):
+        if credentials is None:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Not authenticated",
+                headers={"WWW-Authenticate": "Bearer"},
+            )
+        await get_current_user(credentials, db)
+    
+    try:
+        user_uuid = uuid.UUID(user_id)
+    except ValueError:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Foto não encontrada")
+    
+    if_none_match = request.headers.get("if-none-match")
+    columns = [func.md5(UserDB.user_photo)]
+    if not if_none_match:
+        # Sem validador do cliente: hash e bytes numa única consulta
+        columns.append(UserDB.user_photo)
+    row = (await db.execute(select(*columns).where(UserDB.id == user_uuid, UserDB.ativo == True))).first()
+    if row is None or row[0] is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Foto não encontrada")
+    
+    headers = {
+        "ETag": f'"{row[0]}"',
+        "Cache-Control": f"private, max-age={USER_PHOTO_MAX_AGE}"
+    }
+    if etag_matches(if_none_match, headers["ETag"]):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    
+    photo = row[1] if len(row) > 1 else await db.scalar(select(UserDB.user_photo).where(UserDB.id == user_uuid))
+    if photo is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Foto não encontrada")
+    photo = bytes(photo)
+    return Response(content=photo, media_type=detect_image_media_type(photo), headers=headers)
+
 # Endpoint: Buscar contextos disponíveis do usuário logado
 @app.get("/api/auth/contexts")
-async def get_user_contexts(current_user: UserDB = Depends(get_current_user), db: Session = Depends(get_db)):
+async def get_user_contexts(current_user: UserPrincipal = Depends(get_current_user), db: AsyncSession = Depends(get_async_db)):
     """Retorna todos os contextos (grupo/perfil) do usuário logado"""
-    roles = db.query(UserGroupRole).filter(UserGroupRole.user_id == current_user.id).all()
+    result = await db.execute(
+        select(UserGroupRole)
+        .options(joinedload(UserGroupRole.group))
+        .where(UserGroupRole.user_id == current_user.id)
+    )
+    roles = result.scalars().all()
     return [
         {
             'groupId': str(r.group_id),
@@ -302,30 +547,62 @@ class ContextUpdateRequest(BaseModel):
 async def update_session_context(
     req: Request,
     context: ContextUpdateRequest,
-    db: Session = Depends(get_db),
-    current_user: UserDB = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: UserPrincipal = Depends(get_current_user)
 ):
-    """Atualiza o contexto ativo da sessão do usuário"""
+    """Atualiza o contexto ativo da sessão do usuário (grava no banco e no cache)"""
     # Recuperar token do header Authorization
     token = req.headers.get('authorization', '').replace('Bearer ', '')
-    session = db.query(UserSession).filter_by(user_id=current_user.id, session_token=token).first()
-    if not session:
+    try:
+        group_id = uuid.UUID(context.groupId)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="groupId inválido")
+    result = await db.execute(
+        update(UserSession)
+        .where(UserSession.user_id == current_user.id, UserSession.session_token == token)
+        .values(active_context_group_id=group_id, active_context_role=context.role)
+        .returning(UserSession.expires_at)
+    )
+    row = result.first()
+    if row is None:
         raise HTTPException(status_code=401, detail="Sessão não encontrada")
-    session.active_context_group_id = context.groupId
-    session.active_context_role = context.role
-    db.commit()
+    await db.commit()
+    session_context_cache.set(
+        token,
+        SessionContext(user_id=current_user.id, active_context_group_id=group_id,
+                       active_context_role=context.role),
+        row.expires_at
+    )
     return {"ok": True, "active_context_group_id": context.groupId, "active_context_role": context.role}
 
 # Endpoint: Retornar o contexto ativo da sessão
 @app.get("/api/auth/session/context")
 async def get_session_context(
     req: Request,
-    db: Session = Depends(get_db),
-    current_user: UserDB = Depends(get_current_user)
+    db: AsyncSession = Depends(get_async_db),
+    current_user: UserPrincipal = Depends(get_current_user)
 ):
+    """Retorna o contexto ativo da sessão (do cache; o banco só é lido em caso de falta)"""
     token = req.headers.get('authorization', '').replace('Bearer ', '')
-    session = db.query(UserSession).filter_by(user_id=current_user.id, session_token=token).first()
-    if not session:
+    session = session_context_cache.get(token)
+    if session is None:
+        result = await db.execute(
+            select(
+                UserSession.active_context_group_id,
+                UserSession.active_context_role,
+                UserSession.expires_at
+            ).filter_by(user_id=current_user.id, session_token=token)
+        )
+        row = result.first()
+        if row is None:
+            raise HTTPException(status_code=401, detail="Sessão não encontrada")
+        session = SessionContext(
+            user_id=current_user.id,
+            active_context_group_id=row.active_context_group_id,
+            active_context_role=row.active_context_role
+        )
+        session_context_cache.set(token, session, row.expires_at)
+    elif session.user_id != current_user.id:
         raise HTTPException(status_code=401, detail="Sessão não encontrada")
     return {
         "active_context_group_id": session.active_context_group_id,
@@ -344,10 +621,19 @@ async def get_tasks(
     criador_id: Optional[str] = None,
     limit: int = 50,
     offset: int = 0,
-    current_user: UserDB = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    cursor: Optional[str] = None,
+    include_total: bool = False,
+    search: Optional[str] = None,
+    current_user: UserPrincipal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
-    """Lista tarefas com filtros"""
+    """
+    Lista tarefas com filtros
+    
+    Paginação por offset (legado) ou por cursor: envie o next_cursor da resposta anterior
+    em `cursor`. O total só é contado com include_total=true. `search` faz busca textual
+    no título e na descrição, com resultados ordenados por relevância (paginação por offset).
+    """
     try:
         from domcore.core.enums import TaskStatus
         
@@ -362,7 +648,7 @@ async def get_tasks(
                     detail=f"Status inválido: {status}"
                 )
         
-        tasks = TaskService.get_tasks(
+        page = await AsyncTaskService.get_tasks_page(
             db=db,
             current_user=current_user,
             status=status_enum,
@@ -370,18 +656,28 @@ async def get_tasks(
             responsavel_id=responsavel_id,
             criador_id=criador_id,
             limit=limit,
-            offset=offset
+            offset=offset,
+            cursor=cursor,
+            include_total=include_total,
+            search=search
         )
+        tasks = page["items"]
         
         return {
             "tasks": [task.dict() for task in tasks],
-            "total": len(tasks),
+            "total": page["total"] if include_total else len(tasks),
             "limit": limit,
-            "offset": offset
+            "offset": offset,
+            "next_cursor": page["next_cursor"]
         }
         
+    except ValidationError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=e.message
+        )
     except Exception as e:
-        logger.error(f"❌ Erro ao listar tarefas: {e}")
+        logger.error("❌ Erro ao listar tarefas: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Erro interno do servidor"
@@ -389,16 +685,16 @@ async def get_tasks(
 
 @app.get("/api/tasks/stats")
 async def get_task_stats(
-    current_user: UserDB = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: UserPrincipal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Obtém estatísticas de tarefas"""
     try:
-        stats = TaskService.get_task_stats(db=db, current_user=current_user)
+        stats = await AsyncTaskService.get_task_stats(db=db, current_user=current_user)
         return stats.dict()
         
     except Exception as e:
-        logger.error(f"❌ Erro ao obter estatísticas: {e}")
+        logger.error("❌ Erro ao obter estatísticas: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Erro interno do servidor"
@@ -407,16 +703,16 @@ async def get_task_stats(
 @app.get("/api/tasks/{task_id}")
 async def get_task(
     task_id: str,
-    current_user: UserDB = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: UserPrincipal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Obtém uma tarefa específica"""
     try:
-        task = TaskService.get_task(db=db, task_id=task_id, current_user=current_user)
+        task = await AsyncTaskService.get_task(db=db, task_id=task_id, current_user=current_user)
         return task.dict()
         
     except Exception as e:
-        logger.error(f"❌ Erro ao buscar tarefa {task_id}: {e}")
+        logger.error("❌ Erro ao buscar tarefa %s: %s", task_id, e)
         if "não encontrada" in str(e):
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -436,16 +732,16 @@ async def get_task(
 @app.post("/api/tasks")
 async def create_task(
     task_data: TaskCreate,
-    current_user: UserDB = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: UserPrincipal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Cria uma nova tarefa"""
     try:
-        task = TaskService.create_task(db=db, task_data=task_data, current_user=current_user)
+        task = await AsyncTaskService.create_task(db=db, task_data=task_data, current_user=current_user)
         return task.dict()
         
     except Exception as e:
-        logger.error(f"❌ Erro ao criar tarefa: {e}")
+        logger.error("❌ Erro ao criar tarefa: %s", e)
         if "permissão" in str(e).lower():
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
@@ -461,16 +757,16 @@ async def create_task(
 async def update_task(
     task_id: str,
     task_data: TaskUpdate,
-    current_user: UserDB = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: UserPrincipal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Atualiza uma tarefa"""
     try:
-        task = TaskService.update_task(db=db, task_id=task_id, task_data=task_data, current_user=current_user)
+        task = await AsyncTaskService.update_task(db=db, task_id=task_id, task_data=task_data, current_user=current_user)
         return task.dict()
         
     except Exception as e:
-        logger.error(f"❌ Erro ao atualizar tarefa {task_id}: {e}")
+        logger.error("❌ Erro ao atualizar tarefa %s: %s", task_id, e)
         if "não encontrada" in str(e):
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -490,16 +786,16 @@ async def update_task(
 @app.delete("/api/tasks/{task_id}")
 async def delete_task(
     task_id: str,
-    current_user: UserDB = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: UserPrincipal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Remove uma tarefa"""
     try:
-        success = TaskService.delete_task(db=db, task_id=task_id, current_user=current_user)
+        success = await AsyncTaskService.delete_task(db=db, task_id=task_id, current_user=current_user)
         return {"success": success, "message": "Tarefa removida com sucesso"}
         
     except Exception as e:
-        logger.error(f"❌ Erro ao deletar tarefa {task_id}: {e}")
+        logger.error("❌ Erro ao deletar tarefa %s: %s", task_id, e)
         if "não encontrada" in str(e):
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -520,8 +816,8 @@ async def delete_task(
 async def update_task_status(
     task_id: str,
     status: str,
-    current_user: UserDB = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: UserPrincipal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Atualiza apenas o status de uma tarefa"""
     try:
@@ -535,11 +831,11 @@ async def update_task_status(
                 detail=f"Status inválido: {status}"
             )
         
-        task = TaskService.update_task_status(db=db, task_id=task_id, status=status_enum, current_user=current_user)
+        task = await AsyncTaskService.update_task_status(db=db, task_id=task_id, status=status_enum, current_user=current_user)
         return task.dict()
         
     except Exception as e:
-        logger.error(f"❌ Erro ao atualizar status da tarefa {task_id}: {e}")
+        logger.error("❌ Erro ao atualizar status da tarefa %s: %s", task_id, e)
         if "não encontrada" in str(e):
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -568,24 +864,43 @@ async def get_groups(
     user_id: Optional[str] = None,
     limit: int = 50,
     offset: int = 0,
-    current_user: UserDB = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    cursor: Optional[str] = None,
+    include_total: bool = True,
+    include_stats: bool = False,
+    current_user: UserPrincipal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
-    """Lista grupos com filtros"""
+    """
+    Lista grupos com filtros (paginação por offset ou pelo next_cursor da página anterior)
+    
+    include_stats anexa a cada grupo suas estatísticas de membros, calculadas para a
+    página inteira em uma única consulta.
+    """
     try:
-        result = GroupService.get_groups(
+        result = await AsyncGroupService.get_groups(
             db=db,
             skip=offset,
             limit=limit,
             search=search,
             tipo=tipo,
             ativo=ativo,
-            user_id=user_id or str(current_user.id)
+            user_id=user_id or str(current_user.id),
+            cursor=cursor,
+            include_total=include_total
         )
+        if include_stats:
+            stats = await AsyncGroupService.get_groups_stats(db, [group["id"] for group in result["items"]])
+            for group in result["items"]:
+                group["stats"] = stats.get(group["id"])
         return result
         
+    except ValidationError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=e.message
+        )
     except Exception as e:
-        logger.error(f"❌ Erro ao listar grupos: {e}")
+        logger.error("❌ Erro ao listar grupos: %s", e)
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail="Erro interno do servidor"
@@ -594,16 +909,16 @@ async def get_groups(
 @app.get("/api/groups/{group_id}")
 async def get_group(
     group_id: str,
-    current_user: UserDB = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: UserPrincipal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Obtém um grupo específico"""
     try:
-        group = GroupService.get_group(db=db, group_id=group_id)
+        group = await AsyncGroupService.get_group(db=db, group_id=group_id)
         return group.to_dict()
         
     except Exception as e:
-        logger.error(f"❌ Erro ao buscar grupo {group_id}: {e}")
+        logger.error("❌ Erro ao buscar grupo %s: %s", group_id, e)
         if "não encontrado" in str(e):
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -618,12 +933,12 @@ async def get_group(
 @app.post("/api/groups")
 async def create_group(
     group_data: GroupCreate,
-    current_user: UserDB = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: UserPrincipal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Cria um novo grupo"""
     try:
-        group = GroupService.create_group(
+        group = await AsyncGroupService.create_group(
             db=db,
             group_data=group_data,
             created_by=str(current_user.id)
@@ -631,7 +946,7 @@ async def create_group(
         return group.to_dict()
         
     except Exception as e:
-        logger.error(f"❌ Erro ao criar grupo: {e}")
+        logger.error("❌ Erro ao criar grupo: %s", e)
         if "já existe" in str(e).lower():
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
@@ -647,23 +962,23 @@ async def create_group(
 async def update_group(
     group_id: str,
     group_data: GroupUpdate,
-    current_user: UserDB = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: UserPrincipal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Atualiza um grupo"""
     try:
         # Verificar permissão
-        if not GroupService.check_user_permission(db, str(current_user.id), group_id, "admin"):
+        if not await AsyncGroupService.check_user_permission(db, str(current_user.id), group_id, "admin"):
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="Acesso negado. Apenas administradores podem editar grupos."
             )
         
-        group = GroupService.update_group(db=db, group_id=group_id, group_data=group_data)
+        group = await AsyncGroupService.update_group(db=db, group_id=group_id, group_data=group_data)
         return group.to_dict()
         
     except Exception as e:
-        logger.error(f"❌ Erro ao atualizar grupo {group_id}: {e}")
+        logger.error("❌ Erro ao atualizar grupo %s: %s", group_id, e)
         if "não encontrado" in str(e):
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -683,23 +998,23 @@ async def update_group(
 @app.delete("/api/groups/{group_id}")
 async def delete_group(
     group_id: str,
-    current_user: UserDB = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: UserPrincipal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Remove um grupo"""
     try:
         # Verificar permissão
-        if not GroupService.check_user_permission(db, str(current_user.id), group_id, "admin"):
+        if not await AsyncGroupService.check_user_permission(db, str(current_user.id), group_id, "admin"):
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="Acesso negado. Apenas administradores podem excluir grupos."
             )
         
-        success = GroupService.delete_group(db=db, group_id=group_id)
+        success = await AsyncGroupService.delete_group(db=db, group_id=group_id)
         return {"success": success, "message": "Grupo removido com sucesso"}
         
     except Exception as e:
-        logger.error(f"❌ Erro ao deletar grupo {group_id}: {e}")
+        logger.error("❌ Erro ao deletar grupo %s: %s", group_id, e)
         if "não encontrado" in str(e):
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -723,19 +1038,19 @@ async def get_group_members(
     ativo: Optional[bool] = None,
     limit: int = 50,
     offset: int = 0,
-    current_user: UserDB = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: UserPrincipal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Lista membros de um grupo"""
     try:
         # Verificar permissão
-        if not GroupService.check_user_permission(db, str(current_user.id), group_id, "member"):
+        if not await AsyncGroupService.check_user_permission(db, str(current_user.id), group_id, "member"):
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="Acesso negado. Você não é membro deste grupo."
             )
         
-        result = GroupService.get_group_members(
+        result = await AsyncGroupService.get_group_members(
             db=db,
             group_id=group_id,
             skip=offset,
@@ -746,7 +1061,7 @@ async def get_group_members(
         return result
         
     except Exception as e:
-        logger.error(f"❌ Erro ao listar membros do grupo {group_id}: {e}")
+        logger.error("❌ Erro ao listar membros do grupo %s: %s", group_id, e)
         if "não encontrado" in str(e):
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -758,24 +1073,54 @@ async def get_group_members(
                 detail="Erro interno do servidor"
             )
 
+class GroupMemberItem(BaseModel):
+    user_id: str
+    role: str = "member"
+
+class GroupMembersBulkRequest(BaseModel):
+    members: List[GroupMemberItem] = Field(..., min_length=1, max_length=500)
+
 @app.post("/api/groups/{group_id}/members")
 async def add_group_member(
     group_id: str,
-    user_id: str,
+    user_id: Optional[str] = None,
     role: str = "member",
-    current_user: UserDB = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    payload: Optional[GroupMembersBulkRequest] = None,
+    current_user: UserPrincipal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
-    """Adiciona um usuário a um grupo"""
+    """
+    Adiciona um usuário a um grupo (user_id/role na query) ou vários de uma vez
+    (corpo {"members": [{"user_id": ..., "role": ...}]}, gravados em um único upsert)
+    """
     try:
         # Verificar permissão
-        if not GroupService.check_user_permission(db, str(current_user.id), group_id, "admin"):
+        if not await AsyncGroupService.check_user_permission(db, str(current_user.id), group_id, "admin"):
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="Acesso negado. Apenas administradores podem adicionar membros."
             )
         
-        user_group = GroupService.add_member_to_group(
+        if payload is not None:
+            result = await AsyncGroupService.add_members_to_group(
+                db=db,
+                group_id=group_id,
+                members=[(member.user_id, member.role) for member in payload.members]
+            )
+            return {
+                "items": [user_group.to_dict() for user_group in result["items"]],
+                "total": len(result["items"]),
+                # Já eram membros ativos: não alterados
+                "skipped": result["skipped"]
+            }
+        
+        if not user_id:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Informe user_id ou a lista de membros"
+            )
+        
+        user_group = await AsyncGroupService.add_member_to_group(
             db=db,
             group_id=group_id,
             user_id=user_id,
@@ -784,8 +1129,12 @@ async def add_group_member(
         )
         return user_group.to_dict()
         
+    except HTTPException:
+        raise
+    except ValidationException as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=e.message)
     except Exception as e:
-        logger.error(f"❌ Erro ao adicionar membro ao grupo {group_id}: {e}")
+        logger.error("❌ Erro ao adicionar membro ao grupo %s: %s", group_id, e)
         if "não encontrado" in str(e):
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -802,27 +1151,72 @@ async def add_group_member(
                 detail="Erro interno do servidor"
             )
 
+class GroupNotificationRequest(BaseModel):
+    titulo: str
+    mensagem: str
+    tipo: NotificationType = NotificationType.SYSTEM_ALERT
+    prioridade: str = "normal"
+    roles: Optional[List[str]] = None
+    dados_extras: Optional[Dict[str, Any]] = None
+
+@app.post("/api/groups/{group_id}/notifications")
+async def notify_group_members(
+    group_id: str,
+    req: GroupNotificationRequest,
+    current_user: UserPrincipal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Envia uma notificação a todos os membros ativos do grupo (um único INSERT)"""
+    try:
+        if not await AsyncGroupService.check_user_permission(db, str(current_user.id), group_id, "admin"):
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Acesso negado. Apenas administradores podem notificar o grupo."
+            )
+        
+        count = await db.run_sync(lambda session: NotificationService(session).notify_group(
+            group_id=group_id,
+            titulo=req.titulo,
+            mensagem=req.mensagem,
+            notification_type=req.tipo,
+            remetente_id=str(current_user.id),
+            prioridade=req.prioridade,
+            dados_extras=req.dados_extras,
+            roles=req.roles,
+            exclude_user_ids=[str(current_user.id)]
+        ))
+        return {"success": True, "count": count}
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error("❌ Erro ao notificar grupo %s: %s", group_id, e)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="Erro interno do servidor"
+        )
+
 @app.delete("/api/groups/{group_id}/members/{user_id}")
 async def remove_group_member(
     group_id: str,
     user_id: str,
-    current_user: UserDB = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: UserPrincipal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Remove um usuário de um grupo"""
     try:
         # Verificar permissão
-        if not GroupService.check_user_permission(db, str(current_user.id), group_id, "admin"):
+        if not await AsyncGroupService.check_user_permission(db, str(current_user.id), group_id, "admin"):
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="Acesso negado. Apenas administradores podem remover membros."
             )
         
-        success = GroupService.remove_member_from_group(db=db, group_id=group_id, user_id=user_id)
+        success = await AsyncGroupService.remove_member_from_group(db=db, group_id=group_id, user_id=user_id)
         return {"success": success, "message": "Membro removido com sucesso"}
         
     except Exception as e:
-        logger.error(f"❌ Erro ao remover membro do grupo {group_id}: {e}")
+        logger.error("❌ Erro ao remover membro do grupo %s: %s", group_id, e)
         if "não encontrado" in str(e):
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -839,23 +1233,23 @@ async def update_member_role(
     group_id: str,
     user_id: str,
     role: str,
-    current_user: UserDB = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: UserPrincipal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Atualiza o papel de um membro no grupo"""
     try:
         # Verificar permissão
-        if not GroupService.check_user_permission(db, str(current_user.id), group_id, "admin"):
+        if not await AsyncGroupService.check_user_permission(db, str(current_user.id), group_id, "admin"):
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="Acesso negado. Apenas administradores podem alterar papéis."
             )
         
-        user_group = GroupService.update_member_role(db=db, group_id=group_id, user_id=user_id, new_role=role)
+        user_group = await AsyncGroupService.update_member_role(db=db, group_id=group_id, user_id=user_id, new_role=role)
         return user_group.to_dict()
         
     except Exception as e:
-        logger.error(f"❌ Erro ao atualizar papel do membro {user_id} no grupo {group_id}: {e}")
+        logger.error("❌ Erro ao atualizar papel do membro %s no grupo %s: %s", user_id, group_id, e)
         if "não encontrado" in str(e):
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -870,23 +1264,23 @@ async def update_member_role(
 @app.get("/api/groups/{group_id}/stats")
 async def get_group_stats(
     group_id: str,
-    current_user: UserDB = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: UserPrincipal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Obtém estatísticas de um grupo"""
     try:
         # Verificar permissão
-        if not GroupService.check_user_permission(db, str(current_user.id), group_id, "member"):
+        if not await AsyncGroupService.check_user_permission(db, str(current_user.id), group_id, "member"):
             raise HTTPException(
                 status_code=status.HTTP_403_FORBIDDEN,
                 detail="Acesso negado. Você não é membro deste grupo."
             )
         
-        stats = GroupService.get_group_stats(db=db, group_id=group_id)
+        stats = await AsyncGroupService.get_group_stats(db=db, group_id=group_id)
         return stats
         
     except Exception as e:
-        logger.error(f"❌ Erro ao obter estatísticas do grupo {group_id}: {e}")
+        logger.error("❌ Erro ao obter estatísticas do grupo %s: %s", group_id, e)
         if "não encontrado" in str(e):
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
@@ -901,21 +1295,20 @@ async def get_group_stats(
 @app.get("/api/users/{user_id}/groups")
 async def get_user_groups(
     user_id: str,
-    current_user: UserDB = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: UserPrincipal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Obtém todos os grupos de um usuário"""
     try:
+        groups = await AsyncGroupService.get_user_groups(db=db, user_id=user_id)
+        
         # Verificar se é o próprio usuário ou admin
         if str(current_user.id) != user_id:
-            # Verificar se current_user é admin em algum grupo do usuário
-            user_groups = GroupService.get_user_groups(db, user_id)
-            has_permission = False
-            
-            for group in user_groups:
-                if GroupService.check_user_permission(db, str(current_user.id), group['id'], "admin"):
-                    has_permission = True
-                    break
+            # Verificar se current_user é admin em algum grupo do usuário (um único mapa de
+            # permissões em vez de uma consulta por grupo)
+            levels = await AsyncGroupService.get_permission_map(db, str(current_user.id))
+            admin_level = role_level("admin")
+            has_permission = any(levels.get(group['id'], 0) >= admin_level for group in groups)
             
             if not has_permission:
                 raise HTTPException(
@@ -923,11 +1316,12 @@ async def get_user_groups(
                     detail="Acesso negado. Você não tem permissão para ver os grupos deste usuário."
                 )
         
-        groups = GroupService.get_user_groups(db=db, user_id=user_id)
         return {"groups": groups}
         
+    except HTTPException:
+        raise
     except Exception as e:
-        logger.error(f"❌ Erro ao obter grupos do usuário {user_id}: {e}")
+        logger.error("❌ Erro ao obter grupos do usuário %s: %s", user_id, e)
         if "não encontrado" in str(e):
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
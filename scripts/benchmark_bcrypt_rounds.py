@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Benchmark: custo do bcrypt por número de rounds
+
+@fileoverview Calibração de BCRYPT_ROUNDS
+@directory scripts
+@description Mede no host de implantação o tempo de hash para cada custo bcrypt e sugere o
+             maior número de rounds cuja mediana fica dentro da latência alvo por login
+@created 2024-12-19
+@lastModified 2024-12-19
+@author Equipe DOM v1
+
+Uso:
+    python scripts/benchmark_bcrypt_rounds.py --target-ms 250 --min-rounds 10 --max-rounds 14
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import statistics
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from domcore.core.config import config
+from domcore.core.password_hashing import build_crypt_context
+
+SAMPLE_PASSWORD = "dom-benchmark-123"
+
+
+def summarize(samples_ms):
+    """Resume uma lista de latências em milissegundos"""
+    ordered = sorted(samples_ms)
+    return {
+        "n": len(ordered),
+        "mean_ms": round(statistics.mean(ordered), 2),
+        "p50_ms": round(statistics.median(ordered), 2),
+        "max_ms": round(ordered[-1], 2)
+    }
+
+
+def bench_rounds(rounds, samples):
+    """Mede hash e verificação com o mesmo contexto usado pela API"""
+    context = build_crypt_context(rounds)
+    hashed = context.hash(SAMPLE_PASSWORD)  # Aquecimento (carrega o backend)
+
+    hash_samples, verify_samples = [], []
+    for _ in range(samples):
+        start = time.perf_counter()
+        hashed = context.hash(SAMPLE_PASSWORD)
+        hash_samples.append((time.perf_counter() - start) * 1000)
+
+        start = time.perf_counter()
+        context.verify(SAMPLE_PASSWORD, hashed)
+        verify_samples.append((time.perf_counter() - start) * 1000)
+
+    return {"hash": summarize(hash_samples), "verify": summarize(verify_samples)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Calibra BCRYPT_ROUNDS para uma latência alvo")
+    parser.add_argument("--target-ms", type=float, default=250.0,
+                        help="Latência máxima aceitável da verificação no login (mediana)")
+    parser.add_argument("--min-rounds", type=int, default=10, help="Menor custo medido")
+    parser.add_argument("--max-rounds", type=int, default=14, help="Maior custo medido")
+    parser.add_argument("--samples", type=int, default=5, help="Medições por custo")
+    args = parser.parse_args()
+
+    results = {}
+    suggested = None
+    for rounds in range(args.min_rounds, args.max_rounds + 1):
+        print(f"⏱️  rounds={rounds}...", file=sys.stderr)
+        results[rounds] = bench_rounds(rounds, args.samples)
+        if results[rounds]["verify"]["p50_ms"] <= args.target_ms:
+            suggested = rounds
+        else:
+            # Cada round a mais dobra o custo: os seguintes também estourariam o alvo
+            break
+
+    print(json.dumps({
+        "target_ms": args.target_ms,
+        "current_rounds": config.security.bcrypt_rounds,
+        "suggested_rounds": suggested,
+        "results": results
+    }, ensure_ascii=False, indent=2))
+
+    if suggested is None:
+        print(f"⚠️ Nenhum custo a partir de {args.min_rounds} atende {args.target_ms}ms", file=sys.stderr)
+        sys.exit(1)
+    print(f"✅ Use BCRYPT_ROUNDS={suggested} (hashes antigos são atualizados no próximo login)",
+          file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+#!/usr/bin/env python3
+"""
+Benchmark: processo por requisição vs. worker persistente
+
+@fileoverview Benchmark do worker de consultas do domcore
+@directory scripts
+@description Compara a latência de `python domcore/get_*.py` (um processo por requisição,
+             caminho antigo das rotas Next.js) com domcore/query_worker.py (processo único)
+@created 2024-12-19
+@lastModified 2024-12-19
+@author Equipe DOM v1
+
+Uso:
+    python scripts/benchmark_query_worker.py --iterations 20 --profile empregador --user-id <uuid>
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import statistics
+import subprocess
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DOMCORE_DIR = os.path.join(ROOT_DIR, "domcore")
+
+
+def summarize(samples_ms):
+    """Resume uma lista de latências em milissegundos"""
+    ordered = sorted(samples_ms)
+    p95_index = max(0, int(round(0.95 * len(ordered))) - 1)
+    return {
+        "n": len(ordered),
+        "mean_ms": round(statistics.mean(ordered), 2),
+        "p50_ms": round(statistics.median(ordered), 2),
+        "p95_ms": round(ordered[p95_index], 2),
+        "max_ms": round(ordered[-1], 2)
+    }
+
+
+def spawn_commands(profile, user_id):
+    """Comandos equivalentes aos que as rotas executavam a cada requisição"""
+    python = sys.executable
+    return {
+        "get_tasks": [python, os.path.join(DOMCORE_DIR, "get_tasks.py"), "--profile", profile],
+        "get_notifications": [python, os.path.join(DOMCORE_DIR, "get_notifications.py"),
+                              "--user-id", user_id, "--profile", profile],
+        "get_user_stats": [python, os.path.join(DOMCORE_DIR, "get_user_stats.py")]
+    }
+
+
+def worker_params(profile, user_id):
+    """Parâmetros equivalentes para o worker persistente"""
+    return {
+        "get_tasks": {"profile": profile},
+        "get_notifications": {"user_id": user_id, "profile": profile},
+        "get_user_stats": {}
+    }
+
+
+def bench_spawn(command, iterations):
+    """Mede um processo Python novo por requisição"""
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        subprocess.run(command, cwd=ROOT_DIR, capture_output=True, check=False)
+        samples.append((time.perf_counter() - start) * 1000)
+    return summarize(samples)
+
+
+def bench_worker(worker, method, params, iterations, start_id):
+    """Mede requisições JSON-lines ao worker já aquecido"""
+    samples = []
+    for i in range(iterations):
+        request = json.dumps({"id": start_id + i, "method": method, "params": params})
+        start = time.perf_counter()
+        worker.stdin.write(request + "\n")
+        worker.stdin.flush()
+        response = json.loads(worker.stdout.readline())
+        samples.append((time.perf_counter() - start) * 1000)
+        if not response.get("ok"):
+            print(f"⚠️ {method}: {response.get('error')}", file=sys.stderr)
+    return summarize(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark do worker de consultas do domcore")
+    parser.add_argument("--iterations", type=int, default=20, help="Requisições por método")
+    parser.add_argument("--profile", default="empregador", help="Perfil usado nas consultas")
+    parser.add_argument("--user-id", default="f16c4010-2cad-4bb7-9229-5e0b63ddd0d2",
+                        help="ID do usuário para notificações")
+    args = parser.parse_args()
+
+    commands = spawn_commands(args.profile, args.user_id)
+    params = worker_params(args.profile, args.user_id)
+
+    worker = subprocess.Popen(
+        [sys.executable, os.path.join(DOMCORE_DIR, "query_worker.py")],
+        cwd=ROOT_DIR,
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL,
+        text=True,
+        bufsize=1
+    )
+
+    results = {}
+    try:
+        # Aquecimento: imports e primeira conexão do pool
+        startup = time.perf_counter()
+        worker.stdin.write(json.dumps({"id": 0, "method": "ping"}) + "\n")
+        worker.stdin.flush()
+        worker.stdout.readline()
+        results["worker_startup_ms"] = round((time.perf_counter() - startup) * 1000, 2)
+
+        next_id = 1
+        for method, command in commands.items():
+            print(f"⏱️  {method}...", file=sys.stderr)
+            results[method] = {
+                "spawn": bench_spawn(command, args.iterations),
+                "worker": bench_worker(worker, method, params[method], args.iterations, next_id)
+            }
+            next_id += args.iterations
+            spawn_p50 = results[method]["spawn"]["p50_ms"]
+            worker_p50 = results[method]["worker"]["p50_ms"] or 0.01
+            results[method]["speedup_p50"] = round(spawn_p50 / worker_p50, 1)
+    finally:
+        worker.stdin.close()
+        worker.wait(timeout=10)
+
+    print(json.dumps(results, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+Benchmark: ILIKE vs. busca textual (tsvector + GIN) em tarefas
+
+@fileoverview Benchmark da busca de tarefas
+@directory scripts
+@description Cria uma tabela sintética com a mesma estrutura de busca de tasks (título,
+             descrição, search_vector gerado e índice GIN), popula N tarefas com
+             generate_series e compara a latência de ILIKE '%termo%' com
+             search_vector @@ websearch_to_tsquery ordenado por ts_rank_cd
+@created 2024-12-19
+@lastModified 2024-12-19
+@author Equipe DOM v1
+
+Uso:
+    python scripts/benchmark_task_search.py --rows 1000000 --term "limpeza cozinha"
+    python scripts/benchmark_task_search.py --keep   # mantém a tabela para novas medições
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import statistics
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from domcore.core.db import engine
+from domcore.models.task import TASK_SEARCH_CONFIG, TASK_SEARCH_VECTOR_SQL
+
+BENCH_TABLE = "tasks_search_bench"
+PAGE_SIZE = 50
+
+# Vocabulário das tarefas domésticas sintéticas
+ACTIONS = ["Limpar", "Organizar", "Lavar", "Passar", "Comprar", "Preparar", "Arrumar",
+           "Regar", "Trocar", "Levar", "Buscar", "Pagar", "Consertar", "Varrer"]
+OBJECTS = ["cozinha", "banheiro", "quarto", "sala", "roupas", "louça", "plantas", "janelas",
+           "geladeira", "quintal", "garagem", "almoço", "jantar", "compras do mês",
+           "crianças na escola", "conta de luz", "cachorro", "tapetes", "armários"]
+DETAILS = ["com produto neutro", "antes das visitas", "conforme combinado", "usando luvas",
+           "no período da manhã", "depois do almoço", "sem pressa", "com atenção aos detalhes",
+           "e avisar ao terminar", "seguindo a lista na geladeira"]
+
+
+def sql_array(words):
+    return "ARRAY[" + ", ".join("'" + word.replace("'", "''") + "'" for word in words) + "]"
+
+
+def setup(conn, rows):
+    """Cria e popula a tabela sintética (UNLOGGED: é descartável)"""
+    pick = "(%s)[1 + floor(random() * %d)::int]"
+    conn.exec_driver_sql(f"DROP TABLE IF EXISTS {BENCH_TABLE}")
+    conn.exec_driver_sql(f"""
+        CREATE UNLOGGED TABLE {BENCH_TABLE} (
+            id bigint PRIMARY KEY,
+            titulo varchar(200) NOT NULL,
+            descricao text,
+            data_criacao timestamp NOT NULL,
+            search_vector tsvector GENERATED ALWAYS AS ({TASK_SEARCH_VECTOR_SQL}) STORED
+        )
+    """)
+    conn.exec_driver_sql(f"""
+        INSERT INTO {BENCH_TABLE} (id, titulo, descricao, data_criacao)
+        SELECT
+            g,
+            {pick % (sql_array(ACTIONS), len(ACTIONS))} || ' ' || {pick % (sql_array(OBJECTS), len(OBJECTS))},
+            {pick % (sql_array(ACTIONS), len(ACTIONS))} || ' ' || {pick % (sql_array(OBJECTS), len(OBJECTS))}
+                || ' ' || {pick % (sql_array(DETAILS), len(DETAILS))},
+            now() - (g || ' minutes')::interval
+        FROM generate_series(1, {int(rows)}) AS g
+    """)
+    conn.exec_driver_sql(
+        f"CREATE INDEX {BENCH_TABLE}_search_vector ON {BENCH_TABLE} USING gin (search_vector)"
+    )
+    conn.exec_driver_sql(f"ANALYZE {BENCH_TABLE}")
+
+
+def bench_query(conn, sql, params, iterations):
+    """Mede a consulta e captura o plano de uma execução"""
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        conn.exec_driver_sql(sql, params).fetchall()
+        samples.append((time.perf_counter() - start) * 1000)
+    plan = conn.exec_driver_sql(f"EXPLAIN (ANALYZE, FORMAT JSON) {sql}", params).scalar()
+    plan = (json.loads(plan) if isinstance(plan, str) else plan)[0]["Plan"]
+    ordered = sorted(samples)
+    return {
+        "n": len(ordered),
+        "mean_ms": round(statistics.mean(ordered), 2),
+        "p50_ms": round(statistics.median(ordered), 2),
+        "max_ms": round(ordered[-1], 2),
+        "plan": plan_nodes(plan)
+    }
+
+
+def plan_nodes(plan):
+    """Resumo dos nós do plano (tipo e índice usado)"""
+    node = plan["Node Type"] + (f" ({plan['Index Name']})" if "Index Name" in plan else "")
+    return [node] + [child for sub in plan.get("Plans", []) for child in plan_nodes(sub)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compara ILIKE e busca textual em tarefas")
+    parser.add_argument("--rows", type=int, default=1_000_000, help="Tarefas sintéticas")
+    parser.add_argument("--term", default="limpar cozinha", help="Termo de busca")
+    parser.add_argument("--iterations", type=int, default=10, help="Execuções por consulta")
+    parser.add_argument("--keep", action="store_true", help="Não remove a tabela ao final")
+    parser.add_argument("--reuse", action="store_true", help="Usa a tabela já populada")
+    args = parser.parse_args()
+
+    results = {"rows": args.rows, "term": args.term}
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        try:
+            if not args.reuse:
+                print(f"🔄 Populando {args.rows} tarefas...", file=sys.stderr)
+                start = time.perf_counter()
+                setup(conn, args.rows)
+                results["setup_s"] = round(time.perf_counter() - start, 1)
+
+            like = f"%{args.term}%"
+            print("⏱️  ILIKE...", file=sys.stderr)
+            results["ilike"] = bench_query(conn, f"""
+                SELECT id, titulo FROM {BENCH_TABLE}
+                WHERE titulo ILIKE %(like)s OR descricao ILIKE %(like)s
+                ORDER BY data_criacao DESC LIMIT {PAGE_SIZE}
+            """, {"like": like}, args.iterations)
+
+            print("⏱️  tsvector + GIN...", file=sys.stderr)
+            results["full_text"] = bench_query(conn, f"""
+                SELECT id, titulo FROM {BENCH_TABLE}
+                WHERE search_vector @@ websearch_to_tsquery('{TASK_SEARCH_CONFIG}', %(term)s)
+                ORDER BY ts_rank_cd(search_vector, websearch_to_tsquery('{TASK_SEARCH_CONFIG}', %(term)s)) DESC,
+                         data_criacao DESC
+                LIMIT {PAGE_SIZE}
+            """, {"term": args.term}, args.iterations)
+
+            results["matches"] = conn.exec_driver_sql(
+                f"SELECT count(*) FROM {BENCH_TABLE} "
+                f"WHERE search_vector @@ websearch_to_tsquery('{TASK_SEARCH_CONFIG}', %(term)s)",
+                {"term": args.term}
+            ).scalar()
+            results["speedup_p50"] = round(
+                results["ilike"]["p50_ms"] / (results["full_text"]["p50_ms"] or 0.01), 1
+            )
+        finally:
+            if not args.keep:
+                conn.exec_driver_sql(f"DROP TABLE IF EXISTS {BENCH_TABLE}")
+
+    print(json.dumps(results, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,380 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Migração de índices compostos/parciais das consultas mais frequentes
+
+@fileoverview Script de criação e verificação de índices
+@directory scripts
+@description Cria em bancos existentes os índices declarados em __table_args__ de TaskDB,
+             NotificationDB, UserGroupRole e UserSession (CREATE INDEX CONCURRENTLY IF NOT EXISTS),
+             incluindo a coluna gerada tasks.search_vector, recusa-se a continuar se houver
+             vínculos duplicados que impediriam o índice único (removidos só com --dedupe),
+             remove os índices INVALID de execuções interrompidas e os substituídos e
+             verifica com EXPLAIN que as consultas quentes dos serviços os utilizam
+@created 2024-12-19
+@lastModified 2024-12-19
+@author Equipe DOM v1
+
+Uso:
+    python scripts/create_indexes.py            # cria os índices e verifica os planos
+    python scripts/create_indexes.py --dedupe   # remove antes os vínculos duplicados (irreversível)
+    python scripts/create_indexes.py --check    # apenas verifica os planos
+    python scripts/create_indexes.py --dry-run  # mostra o DDL sem executar
+"""
+
+import os
+import sys
+import json
+import argparse
+from datetime import datetime
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import select, func, or_, tuple_
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.schema import CreateColumn, CreateIndex
+
+from domcore.core.db import engine
+from domcore.core.enums import TaskStatus
+from domcore.models.task import TaskDB, TASK_SEARCH_CONFIG
+from domcore.models.notification import NotificationDB
+from domcore.models.user import UserGroupRole, UserSession
+
+# Índices gerenciados por esta migração (declarados nos modelos)
+MANAGED_INDEXES = {
+    TaskDB.__table__: (
+        "ix_tasks_responsavel_criacao",
+        "ix_tasks_criador_criacao",
+        "ix_tasks_criacao",
+        "ix_tasks_status_criacao",
+        "ix_tasks_data_limite_abertas",
+        "ix_tasks_search_vector",
+    ),
+    NotificationDB.__table__: (
+        "ix_notifications_destinatario_criacao",
+        "ix_notifications_destinatario_nao_lidas",
+    ),
+    UserGroupRole.__table__: (
+        "uq_user_group_roles_user_group",
+        "ix_user_group_roles_group_role",
+    ),
+    UserSession.__table__: (
+        "ix_user_sessions_user_token",
+        "ix_user_sessions_expires_at",
+    ),
+}
+
+# Colunas geradas exigidas pelos índices (criadas antes deles)
+MANAGED_COLUMNS = (
+    TaskDB.__table__.c.search_vector,
+)
+
+# Índices substituídos por versões acima (removidos após a criação das novas)
+OBSOLETE_INDEXES = (
+    # Parcial (WHERE ativo) não serve ao ON CONFLICT; substituído pelo único completo
+    "ix_user_group_roles_user_group",
+)
+
+# Limpeza exigida pelos índices únicos: o caminho antigo de adicionar membro permitia
+# vínculos repetidos por (user_id, group_id). (nome, consulta dos grupos duplicados, DELETE)
+# O DELETE é irreversível e só roda com --dedupe: mantém o ativo e, entre eles, o mais recente
+DEDUPE_STATEMENTS = (
+    (
+        "user_group_roles (duplicados)",
+        """
+        SELECT user_id, group_id, count(*) AS total
+        FROM user_group_roles
+        GROUP BY user_id, group_id
+        HAVING count(*) > 1
+        ORDER BY total DESC, user_id, group_id
+        """,
+        """
+        DELETE FROM user_group_roles AS duplicate
+        USING (
+            SELECT id, row_number() OVER (
+                PARTITION BY user_id, group_id
+                ORDER BY ativo IS TRUE DESC, updated_at DESC NULLS LAST,
+                         created_at DESC NULLS LAST, id DESC
+            ) AS position
+            FROM user_group_roles
+        ) AS ranked
+        WHERE duplicate.id = ranked.id AND ranked.position > 1
+        """
+    ),
+)
+
+# IDs fictícios: o plano depende dos predicados, não dos valores
+SAMPLE_USER_ID = "00000000-0000-0000-0000-000000000000"
+PAGE_SIZE = 51
+
+
+def column_ddl():
+    """Gera o ALTER TABLE ... ADD COLUMN IF NOT EXISTS de cada coluna gerenciada"""
+    dialect = postgresql.dialect()
+    statements = []
+    for column in MANAGED_COLUMNS:
+        definition = str(CreateColumn(column).compile(dialect=dialect)).strip()
+        # Coluna gerada STORED: o ALTER reescreve a tabela (lock exclusivo durante a operação)
+        statements.append((
+            f"{column.table.name}.{column.name}",
+            f"ALTER TABLE {column.table.name} ADD COLUMN IF NOT EXISTS {definition}"
+        ))
+    return statements
+
+
+def invalid_index_ddl(conn):
+    """
+    DROP dos índices gerenciados que ficaram INVALID
+
+    Um CREATE INDEX CONCURRENTLY interrompido (ex.: duplicados no índice único) deixa o
+    índice INVALID; o IF NOT EXISTS o manteria, então ele é removido para ser recriado.
+    """
+    names = [name for table_names in MANAGED_INDEXES.values() for name in table_names]
+    rows = conn.exec_driver_sql(
+        "SELECT c.relname FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid "
+        "WHERE NOT i.indisvalid AND c.relname = ANY(%(names)s)",
+        {"names": names}
+    ).scalars().all()
+    return [(name, f"DROP INDEX CONCURRENTLY IF EXISTS {name}") for name in rows]
+
+
+def index_ddl():
+    """Gera o DDL (CONCURRENTLY IF NOT EXISTS) de cada índice gerenciado"""
+    dialect = postgresql.dialect()
+    statements = []
+    for table, names in MANAGED_INDEXES.items():
+        indexes = {index.name: index for index in table.indexes}
+        for name in names:
+            ddl = str(CreateIndex(indexes[name], if_not_exists=True).compile(dialect=dialect))
+            # CONCURRENTLY não bloqueia escritas; não pode ser usado em create_all (transação)
+            ddl = ddl.replace("CREATE INDEX ", "CREATE INDEX CONCURRENTLY ", 1)
+            ddl = ddl.replace("CREATE UNIQUE INDEX ", "CREATE UNIQUE INDEX CONCURRENTLY ", 1)
+            statements.append((name, ddl))
+    for name in OBSOLETE_INDEXES:
+        statements.append((name, f"DROP INDEX CONCURRENTLY IF EXISTS {name}"))
+    return statements
+
+
+def find_duplicates(conn) -> bool:
+    """
+    Lista os grupos (user_id, group_id) duplicados que impediriam os índices únicos
+
+    Returns:
+        bool: True se não houver duplicados
+    """
+    ok = True
+    for name, query, _ in DEDUPE_STATEMENTS:
+        rows = conn.exec_driver_sql(query).all()
+        if not rows:
+            continue
+        ok = False
+        print(f"❌ {name}: {len(rows)} grupos com vínculos repetidos")
+        for row in rows:
+            print(f"   {', '.join(str(value) for value in row)}")
+    if not ok:
+        print("❌ Revise os vínculos acima e rode novamente com --dedupe para remover as "
+              "cópias (mantém o ativo mais recente de cada grupo; irreversível)")
+    return ok
+
+
+def create_indexes(dry_run: bool = False, dedupe: bool = False) -> bool:
+    """
+    Cria os índices fora de transação (exigência do CONCURRENTLY) e atualiza estatísticas
+
+    Sem dedupe, aborta listando os vínculos duplicados em vez de removê-los.
+    """
+    print("🔄 Criando índices...")
+    statements = column_ddl() + index_ddl()
+
+    if dry_run:
+        dedupe_sql = tuple((name, delete if dedupe else query) for name, query, delete in DEDUPE_STATEMENTS)
+        for _, ddl in dedupe_sql + tuple(statements):
+            print(f"{ddl.strip()};")
+        return True
+
+    try:
+        with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+            if dedupe:
+                for name, _, ddl in DEDUPE_STATEMENTS:
+                    removed = conn.exec_driver_sql(ddl).rowcount
+                    print(f"✅ {name}: {removed} removidos")
+            elif not find_duplicates(conn):
+                return False
+            for name, ddl in invalid_index_ddl(conn) + statements:
+                conn.exec_driver_sql(ddl)
+                print(f"✅ {name}")
+            for table in MANAGED_INDEXES:
+                conn.exec_driver_sql(f"ANALYZE {table.name}")
+        print("✅ Índices criados e estatísticas atualizadas")
+        return True
+    except Exception as e:
+        print(f"❌ Erro ao criar índices: {e}")
+        return False
+
+
+def hot_queries():
+    """
+    Consultas quentes dos serviços e os índices que devem atendê-las
+
+    Returns:
+        List[Tuple[str, Select, Set[str]]]: (descrição, consulta, índices aceitos)
+    """
+    now = datetime.utcnow()
+    ativas = TaskDB.ativo == True
+    return [
+        (
+            "TaskService.get_tasks_page (empregado)",
+            select(TaskDB.id).where(ativas, TaskDB.responsavel_id == SAMPLE_USER_ID)
+            .order_by(TaskDB.data_criacao.desc(), TaskDB.id.desc()).limit(PAGE_SIZE),
+            {"ix_tasks_responsavel_criacao"}
+        ),
+        (
+            "TaskService.get_tasks_page (empregador)",
+            select(TaskDB.id).where(ativas, or_(
+                TaskDB.criador_id == SAMPLE_USER_ID,
+                TaskDB.responsavel_id == SAMPLE_USER_ID
+            )).order_by(TaskDB.data_criacao.desc(), TaskDB.id.desc()).limit(PAGE_SIZE),
+            {"ix_tasks_criador_criacao", "ix_tasks_responsavel_criacao"}
+        ),
+        (
+            "TaskService.get_tasks_page (admin, cursor)",
+            select(TaskDB.id).where(
+                ativas,
+                tuple_(TaskDB.data_criacao, TaskDB.id) < tuple_(now, "task_zzzzzzzzzzzz")
+            ).order_by(TaskDB.data_criacao.desc(), TaskDB.id.desc()).limit(PAGE_SIZE),
+            {"ix_tasks_criacao"}
+        ),
+        (
+            "TaskService.get_tasks_page (admin, status)",
+            select(TaskDB.id).where(ativas, TaskDB.status == TaskStatus.PENDING.value)
+            .order_by(TaskDB.data_criacao.desc(), TaskDB.id.desc()).limit(PAGE_SIZE),
+            {"ix_tasks_status_criacao"}
+        ),
+        (
+            "TaskService.get_task_stats (atrasadas)",
+            select(func.count()).select_from(TaskDB).where(
+                ativas,
+                TaskDB.status != TaskStatus.COMPLETED.value,
+                TaskDB.data_limite < now
+            ),
+            {"ix_tasks_data_limite_abertas"}
+        ),
+        (
+            "TaskService.get_tasks_page (search)",
+            select(TaskDB.id).where(
+                ativas,
+                TaskDB.search_vector.op("@@")(func.websearch_to_tsquery(TASK_SEARCH_CONFIG, "limpeza"))
+            ).limit(PAGE_SIZE),
+            {"ix_tasks_search_vector"}
+        ),
+        (
+            "NotificationService.get_user_notifications_page",
+            select(NotificationDB.id).where(
+                NotificationDB.destinatario_id == SAMPLE_USER_ID,
+                NotificationDB.ativo == True
+            ).order_by(NotificationDB.data_criacao.desc(), NotificationDB.id.desc()).limit(PAGE_SIZE),
+            {"ix_notifications_destinatario_criacao"}
+        ),
+        (
+            "NotificationService.mark_all_as_read / não lidas",
+            select(NotificationDB.id).where(
+                NotificationDB.destinatario_id == SAMPLE_USER_ID,
+                NotificationDB.lida == False,
+                NotificationDB.ativo == True
+            ),
+            {"ix_notifications_destinatario_nao_lidas"}
+        ),
+        (
+            "GroupService.get_permission_map",
+            select(UserGroupRole.group_id, UserGroupRole.role).where(
+                UserGroupRole.user_id == SAMPLE_USER_ID,
+                UserGroupRole.ativo == True
+            ),
+            {"uq_user_group_roles_user_group"}
+        ),
+        (
+            "GroupService.get_group_members / get_group_stats",
+            select(UserGroupRole.role, func.count()).where(
+                UserGroupRole.group_id == SAMPLE_USER_ID,
+                UserGroupRole.ativo == True
+            ).group_by(UserGroupRole.role),
+            {"ix_user_group_roles_group_role"}
+        ),
+        (
+            "/api/auth/session/context",
+            select(UserSession.id).where(
+                UserSession.user_id == SAMPLE_USER_ID,
+                UserSession.session_token == "token"
+            ),
+            {"ix_user_sessions_user_token"}
+        ),
+        (
+            "SessionReaper.purge_expired",
+            select(UserSession.id).where(UserSession.expires_at < now).limit(1000),
+            {"ix_user_sessions_expires_at"}
+        ),
+    ]
+
+
+def plan_indexes(plan: dict) -> set:
+    """Coleta recursivamente os nomes de índices usados em um plano JSON"""
+    found = set()
+    if "Index Name" in plan:
+        found.add(plan["Index Name"])
+    for child in plan.get("Plans", []):
+        found |= plan_indexes(child)
+    return found
+
+
+def check_query_plans() -> bool:
+    """
+    Executa EXPLAIN nas consultas quentes e confere se usam os índices esperados
+
+    enable_seqscan é desligado na sessão para que tabelas pequenas (desenvolvimento)
+    não mascarem a verificação: o objetivo é garantir que o índice é aplicável.
+    """
+    print("\n🔍 Verificando planos de execução...")
+    dialect = postgresql.dialect()
+    ok = True
+
+    with engine.connect() as conn:
+        conn.exec_driver_sql("SET LOCAL enable_seqscan = off")
+        for description, query, expected in hot_queries():
+            compiled = query.compile(dialect=dialect)
+            result = conn.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {compiled}", compiled.params)
+            raw = result.scalar()
+            plan = (json.loads(raw) if isinstance(raw, str) else raw)[0]["Plan"]
+            used = plan_indexes(plan)
+            if used & expected:
+                print(f"✅ {description}: {', '.join(sorted(used & expected))}")
+            else:
+                ok = False
+                print(f"❌ {description}: esperado {', '.join(sorted(expected))}, "
+                      f"plano usa {', '.join(sorted(used)) or plan['Node Type']}")
+        conn.rollback()
+
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cria e verifica índices das consultas quentes")
+    parser.add_argument("--check", action="store_true", help="Apenas verifica os planos (EXPLAIN)")
+    parser.add_argument("--dry-run", action="store_true", help="Mostra o DDL sem executar")
+    parser.add_argument(
+        "--dedupe", action="store_true",
+        help="Remove os vínculos duplicados de user_group_roles antes do índice único (irreversível)"
+    )
+    args = parser.parse_args()
+
+    if args.dry_run:
+        create_indexes(dry_run=True, dedupe=args.dedupe)
+        return
+
+    if not args.check and not create_indexes(dedupe=args.dedupe):
+        sys.exit(1)
+
+    if not check_query_plans():
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -18,10 +18,10 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from sqlalchemy import create_engine, text
 from sqlalchemy.orm import sessionmaker
-from passlib.context import CryptContext
 from datetime import datetime
 import uuid
 from domcore.utils.cpf_validator import CPFValidator
+from domcore.core.password_hashing import password_hasher
 
 # Configurações do novo banco
 DB_CONFIG = {
@@ -111,9 +111,6 @@ def insert_sample_data():
     
     try:
         from domcore.models.user import UserDB
-        # Configuração de senhas
-        pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
-        
         # Criar engine e sessão
         engine = create_engine(
             DATABASE_URL,
@@ -144,7 +141,7 @@ def insert_sample_data():
                 "email": "maria@empregadora.com",
                 "celular": "11999999999",
                 "perfil": "empregador",
-                "senha_hash": pwd_context.hash("123456"),
+                "senha_hash": password_hasher.hash("123456"),
                 "ativo": True,
                 "plataformas": ["web"],
                 "permissoes": ["read", "write"],
@@ -157,7 +154,7 @@ def insert_sample_data():
                 "email": "ana@empregada.com",
                 "celular": "11888888888",
                 "perfil": "empregado",
-                "senha_hash": pwd_context.hash("123456"),
+                "senha_hash": password_hasher.hash("123456"),
                 "ativo": True,
                 "plataformas": ["web", "mobile"],
                 "permissoes": ["read"],
@@ -170,7 +167,7 @@ def insert_sample_data():
                 "email": "joao@familiar.com",
                 "celular": "11777777777",
                 "perfil": "familiar",
-                "senha_hash": pwd_context.hash("123456"),
+                "senha_hash": password_hasher.hash("123456"),
                 "ativo": True,
                 "plataformas": ["web"],
                 "permissoes": ["read"],
@@ -183,7 +180,7 @@ def insert_sample_data():
                 "email": "carlos@parceiro.com",
                 "celular": "11666666666",
                 "perfil": "parceiro",
-                "senha_hash": pwd_context.hash("123456"),
+                "senha_hash": password_hasher.hash("123456"),
                 "ativo": True,
                 "plataformas": ["web"],
                 "permissoes": ["read", "write", "admin"],
@@ -196,7 +193,7 @@ def insert_sample_data():
                 "email": "admin@dom.com",
                 "celular": "11976487066",
                 "perfil": "admin",
-                "senha_hash": pwd_context.hash("123456"),
+                "senha_hash": password_hasher.hash("123456"),
                 "ativo": True,
                 "plataformas": ["web"],
                 "permissoes": ["read", "write", "admin", "system"],
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Teste da checagem de regressão dos benchmarks
+
+@fileoverview Teste de benchmarks/compare.py
+@directory .
+@description Garante que a comparação de resultados marca regressões só acima do limite
+             (relativo e absoluto), detecta casos novos/removidos, percorre resultados
+             aninhados do benchmark HTTP e encerra com código 1 quando há regressão
+@created 2024-12-19
+@lastModified 2024-12-19
+@author Equipe DOM v1
+
+Não depende do banco: usa só JSONs sintéticos.
+"""
+
+import json
+
+import pytest
+
+from benchmarks.common import percentile, summarize
+from benchmarks.compare import check_regressions, collect_summaries, compare
+
+
+def result(**cases):
+    return {"results": {name: {"p50_ms": p50, "p95_ms": p95} for name, (p50, p95) in cases.items()}}
+
+
+def statuses(rows):
+    return {(row["name"], row["metric"]): row["status"] for row in rows}
+
+
+def test_summarize_percentiles():
+    summary = summarize([float(value) for value in range(1, 101)])
+    assert summary["n"] == 100
+    # nearest-rank: p50 e p95 são amostras reais
+    assert summary["p50_ms"] == 50.0
+    assert summary["p95_ms"] == 95.0
+    assert summary["max_ms"] == 100.0
+    assert percentile([7.0], 0.99) == 7.0
+    assert summarize([]) == {"n": 0}
+
+
+def test_regression_and_improvement_respect_threshold():
+    baseline = result(a=(10.0, 20.0), b=(10.0, 20.0))
+    current = result(a=(11.0, 30.0), b=(5.0, 21.0))
+    rows = statuses(compare(baseline, current, threshold=0.15))
+    assert rows[("a", "p50_ms")] == "ok"
+    assert rows[("a", "p95_ms")] == "regression"
+    assert rows[("b", "p50_ms")] == "improvement"
+    assert rows[("b", "p95_ms")] == "ok"
+
+
+def test_min_delta_ignores_tiny_cases():
+    rows = statuses(compare(result(a=(0.01, 0.02)), result(a=(0.02, 0.04)), threshold=0.15, min_delta_ms=0.5))
+    assert set(rows.values()) == {"ok"}
+
+
+def test_new_and_missing_cases():
+    rows = statuses(compare(result(old=(1.0, 1.0)), result(new=(1.0, 1.0)), threshold=0.15))
+    assert rows[("old", None)] == "missing"
+    assert rows[("new", None)] == "new"
+
+
+def test_nested_http_results_and_errors_are_flattened():
+    results = {"mixed": {"requests": 10, "operations": {"login": {"p50_ms": 1.0, "p95_ms": 2.0}}},
+               "TaskService.search": {"error": "OperationalError"}}
+    assert list(collect_summaries(results)) == ["mixed/operations/login"]
+
+
+def test_check_regressions_exit_code(tmp_path):
+    base, current = tmp_path / "base.json", tmp_path / "current.json"
+    base.write_text(json.dumps(result(a=(10.0, 20.0))))
+    current.write_text(json.dumps(result(a=(10.0, 20.0))))
+    check_regressions(str(base), str(current), 0.15)
+
+    current.write_text(json.dumps(result(a=(20.0, 40.0))))
+    with pytest.raises(SystemExit) as exc:
+        check_regressions(str(base), str(current), 0.15)
+    assert exc.value.code == 1
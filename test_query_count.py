@@ -0,0 +1,380 @@
+#!/usr/bin/env python3
+"""
+Teste de regressão de N+1 nas listagens de usuários
+
+@fileoverview Teste de contagem de consultas
+@directory .
+@description Garante que UserService.get_users e GroupService.get_group_members executam
+             um número constante de consultas por página, independente do número de
+             usuários e de grupos por usuário (to_api_dict não pode disparar lazy loads),
+             que verificações de permissão e estatísticas de vários grupos custam uma
+             única consulta, e que notificações em lote/para grupos gravam com um único
+             INSERT e commit e atualizam as estatísticas dos destinatários
+@created 2024-12-19
+@lastModified 2024-12-19
+@author Equipe DOM v1
+
+Usa um banco SQLite em memória com as tabelas users, groups, user_group_roles e
+notifications, sem depender do PostgreSQL. Os testes de notify_group (md5/random do
+PostgreSQL) só rodam com TEST_DATABASE_URL apontando para um PostgreSQL descartável.
+"""
+
+import os
+import sys
+import uuid
+import warnings
+from contextlib import contextmanager
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.schema import CreateTable
+
+# Adicionar o diretório raiz ao path
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+warnings.filterwarnings("ignore", module="sqlalchemy")
+
+from domcore.core.db import Base
+from domcore.core.enums import NotificationType
+from domcore.core.exceptions import ValidationException, NotificationError
+from domcore.models.user import UserDB, UserGroupRole
+from domcore.models.group import Group
+from domcore.models.notification import NotificationDB, NotificationCreate, NotificationStats
+from domcore.services.user_service import UserService
+from domcore.services.group_service import GroupService
+from domcore.services.notification_service import NotificationService
+from domcore.services.permission_cache import group_permission_cache
+from domcore.services.stats_cache import dashboard_stats_cache
+
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL", "")
+requires_postgres = pytest.mark.skipif(
+    not TEST_DATABASE_URL.startswith("postgresql"),
+    reason="notify_group usa md5/random do PostgreSQL (defina TEST_DATABASE_URL)"
+)
+
+
+@compiles(UUID, "sqlite")
+def compile_uuid_sqlite(type_, compiler, **kw):
+    """Os modelos usam o UUID do PostgreSQL; no SQLite ele é guardado como texto"""
+    return "CHAR(32)"
+
+
+@pytest.fixture
+def engine():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(
+        engine,
+        tables=[UserDB.__table__, Group.__table__, UserGroupRole.__table__, NotificationDB.__table__]
+    )
+    yield engine
+    engine.dispose()
+    group_permission_cache.clear()
+    dashboard_stats_cache.clear()
+
+
+@pytest.fixture
+def pg_session():
+    """Sessão em um schema temporário do PostgreSQL, desfeito ao final do teste"""
+    engine = create_engine(TEST_DATABASE_URL)
+    conn = engine.connect()
+    transaction = conn.begin()
+    schema = f"test_query_count_{uuid.uuid4().hex[:8]}"
+    conn.exec_driver_sql(f"CREATE SCHEMA {schema}")
+    conn.exec_driver_sql(f"SET LOCAL search_path TO {schema}")
+    UserDB.__table__.create(conn)
+    Group.__table__.create(conn)
+    # Sem o índice único: simula vínculos repetidos de bancos ainda não migrados
+    conn.execute(CreateTable(UserGroupRole.__table__))
+    # destinatario_id é texto e users.id é uuid: a FK fica de fora
+    conn.execute(CreateTable(NotificationDB.__table__, include_foreign_key_constraints=[]))
+    # Os commits do serviço viram savepoints; tudo é desfeito no rollback final
+    db = Session(bind=conn, join_transaction_mode="create_savepoint")
+    try:
+        yield db
+    finally:
+        db.close()
+        transaction.rollback()
+        conn.close()
+        engine.dispose()
+        dashboard_stats_cache.clear()
+
+
+@contextmanager
+def count_queries(engine):
+    """Conta os comandos SQL enviados ao banco dentro do bloco"""
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, "before_cursor_execute", before_cursor_execute)
+
+
+def seed(engine, users: int, groups_per_user: int) -> str:
+    """Cria usuários membros de vários grupos; retorna o ID do primeiro grupo"""
+    db = sessionmaker(bind=engine)()
+    groups = [Group(id=uuid.uuid4(), nome=f"Grupo {i}") for i in range(groups_per_user)]
+    db.add_all(groups)
+    for i in range(users):
+        user = UserDB(
+            id=uuid.uuid4(),
+            cpf=f"{i:011d}",
+            nome=f"Usuário {i}",
+            senha_hash="x",
+            user_photo=b"\xff\xd8\xff" if i % 2 else None
+        )
+        db.add(user)
+        for group in groups:
+            db.add(UserGroupRole(user_id=user.id, group_id=group.id, role="member"))
+    db.commit()
+    first_group_id = str(groups[0].id)
+    db.close()
+    return first_group_id
+
+
+def run_get_users(engine):
+    db = sessionmaker(bind=engine)()
+    try:
+        with count_queries(engine) as statements:
+            result = UserService.get_users(db, limit=100)
+            # Serialização fora do serviço não pode gerar novas consultas
+            assert all(len(item["grupos"]) > 0 for item in result["items"])
+        return len(statements), result
+    finally:
+        db.close()
+
+
+def run_get_group_members(engine, group_id):
+    db = sessionmaker(bind=engine)()
+    try:
+        with count_queries(engine) as statements:
+            result = GroupService.get_group_members(db, group_id, limit=100)
+        return len(statements), result
+    finally:
+        db.close()
+
+
+@pytest.mark.parametrize("users,groups_per_user", [(2, 1), (20, 3), (50, 5)])
+def test_get_users_constant_queries(engine, users, groups_per_user):
+    seed(engine, users, groups_per_user)
+    query_count, result = run_get_users(engine)
+
+    assert result["total"] == users
+    assert all(len(item["grupos"]) == groups_per_user for item in result["items"])
+    # count + página de usuários + papéis (selectin) + grupos (selectin)
+    assert query_count == 4
+
+
+@pytest.mark.parametrize("users,groups_per_user", [(2, 1), (20, 3), (50, 5)])
+def test_get_group_members_constant_queries(engine, users, groups_per_user):
+    group_id = seed(engine, users, groups_per_user)
+    query_count, result = run_get_group_members(engine, group_id)
+
+    assert result["total"] == users
+    assert all(len(item["user"]["grupos"]) == groups_per_user for item in result["items"])
+    # count + página de membros + usuários + papéis + grupos
+    assert query_count == 5
+
+
+def test_photo_not_loaded_in_listing(engine):
+    seed(engine, 4, 1)
+    _, result = run_get_users(engine)
+
+    photos = [item["user_photo"] for item in result["items"]]
+    assert sum(photo is not None for photo in photos) == 2
+    assert all("/photo?exp=" in photo for photo in photos if photo)
+
+
+@pytest.mark.parametrize("groups_per_user", [1, 5])
+def test_check_user_permission_single_query(engine, groups_per_user):
+    seed(engine, 2, groups_per_user)
+    db = sessionmaker(bind=engine)()
+    try:
+        user_id = str(db.query(UserDB.id).first()[0])
+        group_ids = [str(group_id) for (group_id,) in db.query(Group.id).all()]
+
+        with count_queries(engine) as statements:
+            assert all(GroupService.check_user_permission(db, user_id, g) for g in group_ids)
+            assert not any(GroupService.check_user_permission(db, user_id, g, "admin") for g in group_ids)
+        # Mapa {grupo: nível} carregado uma vez por usuário
+        assert len(statements) == 1
+
+        # Alterações de papel invalidam o mapa
+        GroupService.update_member_role(db, group_ids[0], user_id, "admin")
+        assert GroupService.check_user_permission(db, user_id, group_ids[0], "admin")
+        GroupService.remove_member_from_group(db, group_ids[0], user_id)
+        assert not GroupService.check_user_permission(db, user_id, group_ids[0])
+    finally:
+        db.close()
+
+
+@pytest.mark.parametrize("groups", [1, 10])
+def test_get_groups_stats_single_query(engine, groups):
+    seed(engine, 3, groups)
+    db = sessionmaker(bind=engine)()
+    try:
+        group_ids = [str(group_id) for (group_id,) in db.query(Group.id).all()]
+
+        with count_queries(engine) as statements:
+            stats = GroupService.get_groups_stats(db, group_ids)
+        assert len(statements) == 1
+
+        assert list(stats) == group_ids
+        assert all(item["active_members"] == 3 for item in stats.values())
+        assert all(item["roles_distribution"] == {"member": 3} for item in stats.values())
+    finally:
+        db.close()
+
+
+@pytest.mark.parametrize("group_id,user_id,role", [
+    ("nao-e-uuid", None, "member"),
+    (None, "nao-e-uuid", "member"),
+    (None, None, "owner"),
+])
+def test_add_member_rejects_invalid_input_before_querying(engine, group_id, user_id, role):
+    valid_group_id = seed(engine, 1, 1)
+    db = sessionmaker(bind=engine)()
+    try:
+        valid_user_id = str(db.query(UserDB.id).first()[0])
+        with count_queries(engine) as statements:
+            with pytest.raises(ValidationException):
+                GroupService.add_member_to_group(
+                    db, group_id or valid_group_id, user_id or valid_user_id, role
+                )
+        assert statements == []
+    finally:
+        db.close()
+
+
+@contextmanager
+def count_commits(engine):
+    """Conta os commits enviados ao banco dentro do bloco"""
+    commits = []
+
+    def commit(conn):
+        commits.append(1)
+
+    event.listen(engine, "commit", commit)
+    try:
+        yield commits
+    finally:
+        event.remove(engine, "commit", commit)
+
+
+def prime_notification_stats(user_ids):
+    """Coloca em cache estatísticas zeradas dos usuários (os deltas só alteram escopos em cache)"""
+    for user_id in user_ids:
+        dashboard_stats_cache._get_counters(
+            dashboard_stats_cache.notification_scope(user_id), NotificationStats
+        )
+
+
+def notification_totals(user_ids):
+    """Total de notificações em cache por usuário (None se o escopo foi descartado)"""
+    totals = {}
+    for user_id in user_ids:
+        entry = dashboard_stats_cache._cache.get(dashboard_stats_cache.notification_scope(user_id))
+        totals[user_id] = entry["counters"]["total_notificacoes"] if entry else None
+    return totals
+
+
+def notification_data(destinatario_id: str, titulo: str = "Aviso") -> NotificationCreate:
+    return NotificationCreate(
+        tipo=NotificationType.SYSTEM_ALERT,
+        titulo=titulo,
+        mensagem="Mensagem",
+        destinatario_id=destinatario_id
+    )
+
+
+def test_create_notifications_bulk_single_insert_and_commit(engine):
+    recipients = [str(uuid.uuid4()) for _ in range(3)]
+    prime_notification_stats(recipients)
+    db = sessionmaker(bind=engine)()
+    try:
+        data = [notification_data(user_id, f"Aviso {i}") for i, user_id in enumerate(recipients * 2)]
+        with count_queries(engine) as statements, count_commits(engine) as commits:
+            created = NotificationService(db).create_notifications_bulk(data)
+
+        assert [item.titulo for item in created] == [item.titulo for item in data]
+        assert sum(statement.lstrip().upper().startswith("INSERT") for statement in statements) == 1
+        assert len(commits) == 1
+        assert db.query(NotificationDB).count() == 6
+        # Deltas aplicados aos escopos dos destinatários, sem recontar
+        assert notification_totals(recipients) == {user_id: 2 for user_id in recipients}
+    finally:
+        db.close()
+
+
+def test_create_notifications_bulk_rolls_back_on_failure(engine, monkeypatch):
+    recipients = [str(uuid.uuid4()) for _ in range(2)]
+    prime_notification_stats(recipients)
+    # IDs repetidos: o INSERT falha no meio do lote
+    monkeypatch.setattr(NotificationService, "_generate_notification_id", staticmethod(lambda: "notif_repetido"))
+    db = sessionmaker(bind=engine)()
+    try:
+        with count_commits(engine) as commits:
+            with pytest.raises(NotificationError):
+                NotificationService(db).create_notifications_bulk(
+                    [notification_data(user_id) for user_id in recipients]
+                )
+
+        assert commits == []
+        assert db.query(NotificationDB).count() == 0
+        assert notification_totals(recipients) == {user_id: 0 for user_id in recipients}
+    finally:
+        db.close()
+
+
+@requires_postgres
+def test_notify_group_respects_filters_and_distinct_members(pg_session):
+    db = pg_session
+    group = Group(id=uuid.uuid4(), nome="Grupo")
+    users = {name: UserDB(id=uuid.uuid4(), cpf=f"{i:011d}", nome=name, senha_hash="x")
+             for i, name in enumerate(["admin", "membro", "repetido", "inativo", "remetente"])}
+    db.add(group)
+    db.add_all(users.values())
+    db.flush()
+    db.add_all([
+        UserGroupRole(user_id=users["admin"].id, group_id=group.id, role="admin"),
+        UserGroupRole(user_id=users["membro"].id, group_id=group.id, role="member"),
+        # Mesmo usuário com dois vínculos ativos recebe uma única notificação
+        UserGroupRole(user_id=users["repetido"].id, group_id=group.id, role="member"),
+        UserGroupRole(user_id=users["repetido"].id, group_id=group.id, role="member"),
+        UserGroupRole(user_id=users["inativo"].id, group_id=group.id, role="member", ativo=False),
+        UserGroupRole(user_id=users["remetente"].id, group_id=group.id, role="member"),
+    ])
+    db.commit()
+    user_ids = {name: str(user.id) for name, user in users.items()}
+    prime_notification_stats(user_ids.values())
+
+    service = NotificationService(db)
+    created = service.notify_group(
+        str(group.id), "Aviso", "Mensagem",
+        roles=["member"], exclude_user_ids=[user_ids["remetente"]]
+    )
+
+    recipients = [row[0] for row in db.query(NotificationDB.destinatario_id).all()]
+    assert created == 2
+    assert sorted(recipients) == sorted([user_ids["membro"], user_ids["repetido"]])
+    assert all(notification_id.startswith("notif_") and len(notification_id) == 18
+               for (notification_id,) in db.query(NotificationDB.id).all())
+    assert notification_totals(user_ids.values()) == {
+        user_ids["admin"]: 0, user_ids["membro"]: 1, user_ids["repetido"]: 1,
+        user_ids["inativo"]: 0, user_ids["remetente"]: 0
+    }
+
+    # Sem filtros: todos os membros ativos distintos
+    assert service.notify_group(str(group.id), "Aviso", "Mensagem") == 4
+    assert db.query(NotificationDB).count() == 6
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-v"]))
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Teste do cache de estatísticas do dashboard
+
+@fileoverview Teste dos deltas do DashboardStatsCache
+@directory .
+@description Garante que escritas atualizam os escopos em cache por deltas (sem recontar),
+             que uma falta calculada durante uma escrita não é gravada e que o escopo é
+             descartado quando o delta não pode ser calculado
+@created 2024-12-19
+@lastModified 2024-12-19
+@author Equipe DOM v1
+
+Não depende do banco: o cálculo das estatísticas é substituído por uma função local.
+"""
+
+from datetime import datetime
+
+from domcore.core.enums import UserProfile, TaskStatus
+from domcore.models.task import TaskStats
+from domcore.models.notification import NotificationStats
+from domcore.services.stats_cache import DashboardStatsCache
+
+
+def stats(total: int) -> TaskStats:
+    return TaskStats(total_tarefas=total, tarefas_pendentes=total)
+
+
+def task(criador_id: str, responsavel_id: str, status: TaskStatus = TaskStatus.PENDING) -> dict:
+    return {"ativo": True, "status": status, "data_limite": None,
+            "criador_id": criador_id, "responsavel_id": responsavel_id}
+
+
+def notification(destinatario_id: str, lida: bool = False) -> dict:
+    return {"ativo": True, "lida": lida, "data_criacao": datetime.utcnow(),
+            "prioridade": "normal", "tipo": "sistema", "destinatario_id": destinatario_id}
+
+
+def fail():
+    raise AssertionError("não deveria recontar")
+
+
+def test_hit_does_not_recompute():
+    cache = DashboardStatsCache(ttl=60, maxsize=100)
+    scope = cache.task_scope("u1", UserProfile.EMPREGADOR)
+    calls = []
+    compute = lambda: calls.append(1) or stats(1)
+    cache._get_counters(scope, compute)
+    cache._get_counters(scope, compute)
+    assert len(calls) == 1
+
+
+def test_task_deltas_update_cached_scopes_without_recount():
+    cache = DashboardStatsCache(ttl=60, maxsize=100)
+    employer = cache.task_scope("u1", UserProfile.EMPREGADOR)
+    employee = cache.task_scope("u2", UserProfile.EMPREGADO)
+    other = cache.task_scope("u3", UserProfile.EMPREGADOR)
+    admin = cache.task_scope("u4", UserProfile.ADMIN)
+    for scope in (employer, employee, other, admin):
+        cache._get_counters(scope, lambda: stats(1))
+
+    with cache.writing():
+        cache.apply_task_change(None, task("u1", "u2"))
+    assert cache._get_counters(employer, fail)["total_tarefas"] == 2
+    assert cache._get_counters(employee, fail)["total_tarefas"] == 2
+    assert cache._get_counters(admin, fail)["total_tarefas"] == 2
+    assert cache._get_counters(other, fail)["total_tarefas"] == 1
+
+    with cache.writing():
+        cache.apply_task_change(task("u1", "u2"), task("u1", "u2", TaskStatus.COMPLETED))
+    counters = cache._get_counters(employer, fail)
+    assert counters["total_tarefas"] == 2
+    assert counters["tarefas_pendentes"] == 1
+    assert counters["tarefas_concluidas"] == 1
+
+
+def test_notification_deltas_and_bulk_read():
+    cache = DashboardStatsCache(ttl=60, maxsize=100)
+    scope = cache.notification_scope("u1")
+    cache._get_counters(scope, lambda: NotificationStats())
+
+    with cache.writing():
+        for _ in range(3):
+            cache.apply_notification_change(None, notification("u1"))
+    counters = cache._get_counters(scope, fail)
+    assert counters["total_notificacoes"] == 3
+    assert counters["notificacoes_nao_lidas"] == 3
+    assert counters["notificacoes_por_tipo"] == {"sistema": 3}
+
+    with cache.writing():
+        cache.apply_notifications_read("u1", 2)
+    assert cache._get_counters(scope, fail)["notificacoes_nao_lidas"] == 1
+
+
+def test_unknown_rowcount_invalidates_scope():
+    cache = DashboardStatsCache(ttl=60, maxsize=100)
+    scope = cache.notification_scope("u1")
+    cache._get_counters(scope, lambda: NotificationStats(total_notificacoes=1))
+
+    with cache.writing():
+        cache.apply_notifications_read("u1", -1)
+    assert cache._cache.get(scope) is None
+
+
+def test_miss_during_write_is_not_cached():
+    cache = DashboardStatsCache(ttl=60, maxsize=100)
+    scope = cache.notification_scope("u1")
+
+    with cache.writing():
+        # A leitura pode já ver o commit; o delta a contaria de novo se ela fosse gravada
+        cache._get_counters(scope, lambda: NotificationStats(total_notificacoes=1))
+        cache.apply_notification_change(None, notification("u1"))
+    assert cache._cache.get(scope) is None
+
+
+def test_write_racing_with_compute_prevents_set():
+    cache = DashboardStatsCache(ttl=60, maxsize=100)
+    scope = cache.notification_scope("u1")
+
+    def compute_racing_with_write():
+        # Escrita concorrente confirmada depois da leitura do banco
+        with cache.writing():
+            cache.apply_notification_change(None, notification("u1"))
+        return NotificationStats()
+
+    cache._get_counters(scope, compute_racing_with_write)
+    assert cache._cache.get(scope) is None